@@ -1,13 +1,11 @@
 
 from typing import final, List, Dict, Final
-import enum, random
+import enum
 from bw4t.BW4TBrain import BW4TBrain
 from matrx.agents.agent_utils.state import State
-from matrx.agents.agent_utils.navigator import Navigator
-from matrx.agents.agent_utils.state_tracker import StateTracker
 from matrx.actions.door_actions import OpenDoorAction
 from matrx.actions.object_actions import GrabObject, DropObject
-from matrx.messages.message import Message
+from bw4t.BW4TMessages import BW4TMessage, MovingTo
 
 class Phase(enum.Enum):
     PLAN_PATH_TO_CLOSED_DOOR=1,
@@ -21,12 +19,13 @@ class BaseLineAgent(BW4TBrain):
         super().__init__(settings)
         self._phase = Phase.PLAN_PATH_TO_CLOSED_DOOR
         self._teamMembers = []
+        self._trustBeliefs = {}
 
     def initialize(self):
         super().initialize()
-        self._state_tracker = StateTracker(agent_id=self.agent_id)
-        self._navigator = Navigator(agent_id=self.agent_id, 
-            action_set=self.action_set, algorithm=Navigator.A_STAR_ALGORITHM)
+        self._trustBeliefs = {}
+        self._state_tracker = self.makeStateTracker()
+        self._navigator = self.makeNavigator()
 
     def filter_bw4t_observations(self, state):
         return state
@@ -50,12 +49,12 @@ class BaseLineAgent(BW4TBrain):
                 if len(closedDoors)==0:
                     return None, {}
                 # Randomly pick a closed door
-                self._door = random.choice(closedDoors)
+                self._door = self.random.choice(closedDoors)
                 doorLoc = self._door['location']
                 # Location in front of door is south from door
                 doorLoc = doorLoc[0],doorLoc[1]+1
                 # Send message of current action
-                self._sendMessage('Moving to door of ' + self._door['room_name'], agent_name)
+                self._sendMessage(MovingTo(self._door['room_name']), agent_name)
                 self._navigator.add_waypoints([doorLoc])
                 self._phase=Phase.FOLLOW_PATH_TO_CLOSED_DOOR
 
@@ -77,35 +76,35 @@ class BaseLineAgent(BW4TBrain):
         '''
         Enable sending messages in one line of code
         '''
-        msg = Message(content=mssg, from_id=sender)
-        if msg.content not in self.received_messages:
-            self.send_message(msg)
+        msg = BW4TMessage(content=mssg, from_id=sender)
+        self.send_message(msg)
 
     def _processMessages(self, teamMembers):
         '''
-        Process incoming messages and create a dictionary with received messages from each team member.
+        Process incoming messages and create a dictionary with the messages from each team member received since the
+        previous decision.
         '''
-        receivedMessages = {}
-        for member in teamMembers:
-            receivedMessages[member] = []
-        for mssg in self.received_messages:
-            for member in teamMembers:
-                if mssg.from_id == member:
-                    receivedMessages[member].append(mssg.content)       
-        return receivedMessages
+        # Typed messages of other agents are read as their text
+        return {member: [str(content) for content in self.new_messages_by_sender.get(member, [])]
+                for member in teamMembers}
 
     def _trustBlief(self, member, received):
         '''
-        Baseline implementation of a trust belief. Creates a dictionary with trust belief scores for each team member, for example based on the received messages.
+        Baseline implementation of a trust belief. Updates the trust belief scores for each team member with the
+        messages received since the previous decision, so the messages are looked at once.
+        @return dictionary with the trust belief score of each team member
         '''
         # You can change the default value to your preference
         default = 0.5
-        trustBeliefs = {}
         for member in received.keys():
-            trustBeliefs[member] = default
+            if member not in self._trustBeliefs:
+                self._trustBeliefs[member] = default
         for member in received.keys():
+            # A member loses trust once
+            if self._trustBeliefs[member] < default:
+                continue
             for message in received[member]:
                 if 'Found' in message and 'colour' not in message:
-                    trustBeliefs[member]-=0.1
+                    self._trustBeliefs[member]-=0.1
                     break
-        return trustBeliefs
+        return self._trustBeliefs
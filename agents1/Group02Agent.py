@@ -3,18 +3,19 @@ import os
 from _csv import writer
 from typing import Callable, Dict
 import enum
-import random
-import re
+from dataclasses import replace
 
 from matrx.actions.move_actions import MoveNorth, MoveWest
 from matrx.actions.object_actions import GrabObject, DropObject
 
 from bw4t.BW4TBrain import BW4TBrain
 from matrx.agents.agent_utils.state import State
-from matrx.agents.agent_utils.navigator import Navigator
-from matrx.agents.agent_utils.state_tracker import StateTracker
+from bw4t.BW4TLayout import KeyTileTable, sweepTour
+from bw4t.BW4TBlocks import CollectableBlock
+from bw4t.BW4TStateView import BW4TStateView
 from matrx.actions.door_actions import OpenDoorAction
-from matrx.messages.message import Message
+from bw4t.BW4TMessages import BW4TMessage, BlockMessage, RoomMessage, Found, PickingUp, Dropped, \
+    MovingTo, Opening, Searching, Distrust
 
 Action = tuple[str, dict] | None
 
@@ -40,6 +41,12 @@ class Phase(enum.Enum):
 class CustomBaselineAgent(BW4TBrain):
     """
     Agent that contains all non-agent specific logic
+
+    Besides the settings of BW4TBrain, the settings can have
+    * door_policy: how the agent picks the next door to go to. 'nearest' picks the door of the
+    room that the team went to least often (by its own choices and the MovingTo and Searching
+    messages of the team members it trusts), of those the nearest. 'random' picks a random door.
+    Default 'nearest', benchmarks/door_policy.py compares the two.
     """
 
     def __init__(self, settings: Dict[str, object]):
@@ -47,6 +54,12 @@ class CustomBaselineAgent(BW4TBrain):
         self._phase: Phase = Phase.PLAN_PATH_TO_CLOSED_DOOR
         self._teamMembers = []
 
+        self._door_policy: str = settings.get('door_policy', 'nearest')
+        if self._door_policy not in ('nearest', 'random'):
+            raise ValueError("Unknown door_policy ", self._door_policy)
+        # Per room name the number of times that this agent or a trusted team member went to it
+        self._room_visits: dict[str, int] = {}
+
         self._capacity: int = 1
         self._collectables: list[dict] = []
         self._target_items: list[dict] = []
@@ -66,6 +79,10 @@ class CustomBaselineAgent(BW4TBrain):
 
         self._prev_phase: Phase|None = None
 
+        # Time the phase handlers as well if this agent is profiled
+        if self.get_profiler() is not None:
+            self.get_profiler().register('phase_' + phase.name for phase in Phase)
+
         self._memory: dict[Phase, dict] = {
             Phase.PLAN_PATH_TO_CLOSED_DOOR: {},
             Phase.FOLLOW_PATH_TO_CLOSED_DOOR: {},
@@ -85,6 +102,8 @@ class CustomBaselineAgent(BW4TBrain):
 
         self._agent_name: None | str = None
         self._current_state: State
+        # Index of the current state for area and room queries, built on first use each tick
+        self._state_view: BW4TStateView | None = None
         self._repeat_action: int = 0
 
         self._switchPhase: dict[Phase, Callable[[], Action | None]] = {
@@ -107,9 +126,13 @@ class CustomBaselineAgent(BW4TBrain):
 
     def initialize(self) -> None:
         super().initialize()
-        self._state_tracker = StateTracker(agent_id=self.agent_id)
-        self._navigator = Navigator(agent_id=self.agent_id,
-                                    action_set=self.action_set, algorithm=Navigator.A_STAR_ALGORITHM)
+        # Use the static layout of the world for navigation if we got one, instead of memorizing all objects
+        self._state_tracker = self.makeStateTracker()
+        self._navigator = self.makeNavigator()
+        # The distances to the doors and drop tiles
+        self._key_tiles: KeyTileTable | None = None
+        if self.getLayout() is not None:
+            self._key_tiles = self.getLayout().getKeyTileTable()
 
     def filter_on_bw4t_observations(self, state: State) -> State:
         return state
@@ -118,13 +141,14 @@ class CustomBaselineAgent(BW4TBrain):
         assert state is not None
 
         self._current_state = state
+        self._state_view = None
         self._agent_name = self._current_state[self.agent_id]['obj_id']
 
         if len(self._goal_blocks) == 0:
             self._init_goal_targets()
 
         # Add team members
-        for member in self._current_state['World']['team_members']:
+        for member in self._getStateView().get_team_members():
             if member != self._agent_name and member not in self._teamMembers:
                 self._teamMembers.append(member)
 
@@ -133,12 +157,21 @@ class CustomBaselineAgent(BW4TBrain):
 
         # Update trust beliefs for team members
         self._updateTrustBelief(self._teamMembers, received_messages)
-        self._act_on_trust(self._teamMembers, received_messages)
+        self._updateRoomVisits(received_messages)
+        # A team member can place the goal that the agent carries a block for, the agent drops it off the goals then
+        action_and_subject = self._act_on_trust(self._teamMembers, received_messages)
+        if action_and_subject is not None:
+            return action_and_subject
 
         while True:
             assert self._phase is not None
             self._prev_phase = self._phase
-            action_and_subject = self._switchPhase[self._phase]()
+            profiler = self.get_profiler()
+            if profiler is None:
+                action_and_subject = self._switchPhase[self._phase]()
+            else:
+                with profiler.time('phase_' + self._phase.name):
+                    action_and_subject = self._switchPhase[self._phase]()
 
             if action_and_subject is not None and action_and_subject[0] is not None:
                 return action_and_subject
@@ -146,34 +179,45 @@ class CustomBaselineAgent(BW4TBrain):
     # ==== DOOR PHASE ====
 
     def _planPathToClosedDoorPhase(self) -> Action | None:
-        self._navigator.reset_full()
-        all_doors = [door for door in self._current_state.values()
-                     if 'class_inheritance' in door and 'Door' in door['class_inheritance']]
-        closed_doors = [door for door in all_doors if not door['is_open']]
+        all_doors = self._getStateView().get_doors()
+        closed_doors = self._getStateView().get_closed_doors()
 
         # TODO maybe separate state?
         if len(closed_doors) == 0:
             if self._checkForPossibleGoal():
                 return None
-            self._door = random.choice(all_doors)
+            self._door = self._chooseDoor(all_doors)
         else:
-            self._door = random.choice(closed_doors)
+            self._door = self._chooseDoor(closed_doors)
 
         door_loc = self._door['location']
         # Location in front of door is south from door
         door_loc = door_loc[0], door_loc[1] + 1
 
         # Send message of current action
-        self._sendMessage('Moving to ' + self._door['room_name'])
-        self._navigator.add_waypoints([door_loc])
+        self._sendMessage(MovingTo(self._door['room_name']))
+        self._planRoute([door_loc])
 
         self._phase = Phase.FOLLOW_PATH_TO_CLOSED_DOOR
 
-    def _followPathToClosedDoorPhase(self) -> Action | None:
-        self._state_tracker.update(self._current_state)
+    def _chooseDoor(self, doors: list[dict]) -> dict:
+        '''
+        @param doors the doors to choose from, not empty
+        @return the door to go to next, see the door_policy setting
+        '''
+        if self._door_policy == 'random':
+            door = self.random.choice(doors)
+        else:
+            location = self._current_state[self.agent_id]['location']
+            # The tile in front of the door is south of it
+            door = min(doors, key=lambda door: (self._room_visits.get(door['room_name'], 0),
+                                                self.__distance(location, (door['location'][0], door['location'][1] + 1))))
+        self._room_visits[door['room_name']] = self._room_visits.get(door['room_name'], 0) + 1
+        return door
 
+    def _followPathToClosedDoorPhase(self) -> Action | None:
         # Follow path to door
-        action = self._navigator.get_move_action(self._state_tracker)
+        action = self._getMoveAction()
 
         if action is not None:
             return action, {}
@@ -181,7 +225,7 @@ class CustomBaselineAgent(BW4TBrain):
         self._phase = Phase.OPEN_DOOR
 
     def _openDoorPhase(self) -> Action | None:
-        self._sendMessage('Opening door of ' + self._door['room_name'])
+        self._sendMessage(Opening(self._door['room_name']))
         self._phase = Phase.ENTER_ROOM
 
         # Open door
@@ -195,20 +239,20 @@ class CustomBaselineAgent(BW4TBrain):
     # ==== ROOM PHASE ====
 
     def _planRoomCheckPhase(self) -> Action | None:
-        current_x, current_y = self._current_state[self.agent_id]['location']
+        # Sweep the inside of the room so that each tile comes within the block sense range once
+        room_tiles = [obj['location'] for obj in self._getStateView().get_room(self._door['room_name']) or []
+                      if 'AreaTile' in obj['class_inheritance']]
         next_locations: list[tuple[int, int]] = \
-            [(current_x, current_y - 1), (current_x - 1, current_y - 1), (current_x - 1, current_y)]
+            sweepTour(room_tiles, self._current_state[self.agent_id]['location'], self.getSenseRange(CollectableBlock))
 
-        self._navigator.reset_full()
-        self._navigator.add_waypoints(next_locations)
+        self._planRoute(next_locations)
         self._phase = Phase.FOLLOW_ROOM_CHECK
 
     def _followRoomCheckPhase(self) -> Action | None:
-        self._sendMessage('Searching through ' + self._door['room_name'])
+        self._sendMessage(Searching(self._door['room_name']))
         self._saveObjectsAround()
 
-        self._state_tracker.update(self._current_state)
-        action = self._navigator.get_move_action(self._state_tracker)
+        action = self._getMoveAction()
 
         if action is not None:
             return action, {}
@@ -218,9 +262,7 @@ class CustomBaselineAgent(BW4TBrain):
         else:
             goal_target_items, all_found_goal_items = self._check_collectables()
             for goal in all_found_goal_items:
-                self._sendMessage(
-                    'Found goal block ' + str(goal['visualization']) + ' at location ' + str(goal['location'])
-                )
+                self._sendMessage(Found.fromBlock(goal))
 
             self._target_items = goal_target_items[0:self._capacity]
             self._collectables.clear()
@@ -232,16 +274,12 @@ class CustomBaselineAgent(BW4TBrain):
             self._phase = Phase.PLAN_PATH_TO_CLOSED_DOOR
             self._planPathToClosedDoorPhase()
         else:
-            self._navigator.reset_full()
-            for i in range(len(self._target_items)):
-                self._navigator.add_waypoints([self._target_items[i]['location']])
+            self._planRoute([item['location'] for item in self._target_items])
 
             self._phase = Phase.FOLLOW_PATH_TO_TARGET_ITEMS
 
     def _followPathToTargetItemsPhase(self) -> Action | None:
-        self._state_tracker.update(self._current_state)
-
-        action = self._navigator.get_move_action(self._state_tracker)
+        action = self._getMoveAction()
 
         if action is not None:
             return action, {}
@@ -262,13 +300,10 @@ class CustomBaselineAgent(BW4TBrain):
             return
 
         self._is_carrying.append(self._target_items[0])
+        self._forget_collectable_match(self._target_items[0])
         self._target_items.clear()
 
-        self._sendMessage(
-            'Picking up goal block ' + str(self._is_carrying[-1]['visualization']) + ' at location ' + str(
-                self._is_carrying[-1][
-                    'location'])
-        )
+        self._sendMessage(PickingUp.fromBlock(self._is_carrying[-1]))
 
         return GrabObject.__name__, {'object_id': self._is_carrying[0]['obj_id']}
 
@@ -279,17 +314,19 @@ class CustomBaselineAgent(BW4TBrain):
 
         # if target item is only a hint by another agent
         if not 'obj_id' in self._target_items[0]:
-            close_items = self._current_state.get_objects_in_area(
-                top_left=self._current_state[self.agent_id]['location'], width=1, height=1)
-            close_collectables = self._filter_collectables(close_items)
+            location = self._current_state[self.agent_id]['location']
+            close_items = self._getStateView().get_objects_in_area(top_left=location, width=1, height=1)
+            # The area also holds the tiles east and south of the agent, a block there can be placed on a goal
+            close_collectables = [collectable for collectable in self._filter_collectables(close_items)
+                                  if collectable['location'] == location]
 
             # check if the item under you matches the description
             if len(close_collectables) > 0 and self._compare_blocks(self._target_items[0], close_collectables[0]):
                 self._target_items[0]['obj_id'] = close_collectables[0]['obj_id']
             else:
                 # TODO Penalize lying agent
-                # if not the case, remove current item as considerable goal collectable match for goal object
-                self._goal_blocks[self._target_items[0]['goal_index']].pop('collectable_match')
+                # if not the case, remove current item as considerable goal collectable match for goal objects
+                self._forget_collectable_match(self._target_items[0])
                 self._target_items.clear()
                 return False
 
@@ -306,18 +343,20 @@ class CustomBaselineAgent(BW4TBrain):
             return
 
         else:  # Drop off goal object to its correct location
-            self._navigator.reset_full()
-            self._navigator.add_waypoints(target_locations)
+            self._planRoute(list(target_locations))
             self._phase = Phase.FOLLOW_PATH_TO_GOAL
 
     def _followPathToGoalPhase(self) -> Action | None:
-        self._state_tracker.update(self._current_state)
-
-        action = self._navigator.get_move_action(self._state_tracker)
+        action = self._getMoveAction()
 
         if action is not None:
             return action, {}
 
+        if not self._verify_goal_location():
+            # A team member placed the goal first, or stands on it
+            self._phase = Phase.CANCEL_GOAL
+            return None
+
         if self._verify_goal_index():
             # TODO Also update trust
             self._target_goal_index += 1
@@ -327,17 +366,32 @@ class CustomBaselineAgent(BW4TBrain):
         self._phase = Phase.CANCEL_GOAL
 
     def _cancelGoalPhase(self) -> Action | None:
-        if self._current_state[self.agent_id]['location'] != self._goal_blocks[self._target_goal_index]['location']:
+        # Drop the block next to the goals, where it does not take the place of a goal block
+        goal_locations = [goal_block['location'] for goal_block in self._goal_blocks]
+        if self._current_state[self.agent_id]['location'] not in goal_locations:
             self._phase = Phase.PLAN_PATH_TO_CLOSED_DOOR
             return self._dropBlockIfCarrying()
 
         return MoveWest.__name__, {}
 
+    def _verify_goal_location(self) -> bool:
+        '''
+        @return whether the agent is on the goal of the block it drops next, and no block was placed on it yet
+        '''
+        if len(self._is_carrying) == 0:
+            return False
+        current_location = self._current_state[self.agent_id]['location']
+        if current_location != self._goal_blocks[self._is_carrying[-1]['goal_index']]['location']:
+            return False
+        objects = self._getStateView().get_objects_in_area(top_left=current_location, width=1, height=1)
+        return all(block['location'] != current_location or len(block['carried_by']) > 0
+                   for block in self._filter_collectables(objects))
+
     def _verify_goal_index(self) -> bool:
         current_location = self._current_state[self.agent_id]['location']
         # south of us should be a collectable
         current_location = current_location[0], current_location[1] + 1
-        objects = self._current_state.get_objects_in_area(top_left=current_location, width=1, height=1)
+        objects = self._getStateView().get_objects_in_area(top_left=current_location, width=1, height=1)
 
         return self._target_goal_index == 0 or len(self._filter_collectables(objects)) > 0
 
@@ -348,8 +402,7 @@ class CustomBaselineAgent(BW4TBrain):
         block: dict = self._is_carrying.pop()
         current_location: tuple = self._current_state[self.agent_id]['location']
 
-        self._sendMessage(
-            'Dropped goal block ' + str(block['visualization']) + ' at drop location ' + str(current_location))
+        self._sendMessage(Dropped.fromBlock(block, current_location))
 
         if check_for_goal and not self._checkForPossibleGoal():
             self._phase = Phase.PLAN_PATH_TO_CLOSED_DOOR
@@ -365,63 +418,94 @@ class CustomBaselineAgent(BW4TBrain):
 
         return match is not None
 
+    # ==== NAVIGATION ====
+
+    def _planRoute(self, waypoints: list[tuple]) -> None:
+        '''
+        Starts a route along the waypoints, see _getMoveAction
+        '''
+        self._navigator.reset_full()
+        self._navigator.add_waypoints(waypoints)
+
+    def _getMoveAction(self) -> str | None:
+        '''
+        @return the next move on the route started by _planRoute, None when the route is done
+        '''
+        self._state_tracker.update(self._current_state)
+        return self._navigator.get_move_action(self._state_tracker)
+
     # ==== MESSAGES ====
 
     def _sendMessage(self, mssg) -> None:
         '''
         Enable sending messages in one line of code
         '''
-        msg = Message(content=mssg, from_id=self._agent_name)
-        if msg.content not in self.received_messages:
-            self.send_message(msg)
+        msg = BW4TMessage(content=mssg, from_id=self._agent_name)
+        self.send_message(msg)
 
     def _processMessages(self, teamMembers) -> dict:
         '''
-        Process incoming messages and create a dictionary with received messages from each team member.
+        Process the messages received since the previous decision and create a dictionary with
+        these messages from each team member. Older messages were processed before.
         '''
-        receivedMessages = {}
-        for member in teamMembers:
-            receivedMessages[member] = []
-        for mssg in self.received_messages:
-            for member in teamMembers:
-                if mssg.from_id == member:
-                    receivedMessages[member].append(mssg.content)
-        return receivedMessages
+        return {member: self.new_messages_by_sender.get(member, []) for member in teamMembers}
 
     # ==== TRUST ====
 
+    def _updateRoomVisits(self, received) -> None:
+        '''
+        Counts the rooms that the trusted team members go to, and counts the rooms
+        they search as visited, for the choice of the next door. If a team member goes to
+        the same room as this agent, the agent with the lower name keeps the room and the
+        other one chooses another door.
+        '''
+        for member, messages in received.items():
+            if not self._trusting_agent.get(member, True):
+                continue
+            for message in messages:
+                if isinstance(message, MovingTo):
+                    self._room_visits[message.room_name] = self._room_visits.get(message.room_name, 0) + 1
+                    if self._door_policy == 'nearest' and self._phase == Phase.FOLLOW_PATH_TO_CLOSED_DOOR \
+                            and message.room_name == self._door['room_name'] and member < self._agent_name:
+                        self._phase = Phase.PLAN_PATH_TO_CLOSED_DOOR
+                elif isinstance(message, Searching):
+                    self._room_visits[message.room_name] = max(1, self._room_visits.get(message.room_name, 0))
+
     def _act_on_trust(self, member, received) -> Action | None:
         for member in received.keys():
             # Ignore messages from agents we don't trust
             if self._trustBeliefs[member] <= 0.2 and self._trusting_agent[member]:
-                self._sendMessage("I don't trust " + member)
+                self._sendMessage(Distrust(member))
                 self._trusting_agent[member] = False
             else:
                 for message in received[member]:
                     if member != self.agent_id and self._trusting_agent[member]:
-                        # TODO if picking up object, remove from considered collectable goals
-                        if 'Found' in message:
-                            item = self.__object_from_message(message)
-                            self.__check_item_and_add_if_goal(item)
+                        if isinstance(message, PickingUp):
+                            self.__forget_picked_up_item(message.asBlock())
 
-                        if 'Dropped' in message:
-                            item = self.__object_from_message(message)
+                        if isinstance(message, Found):
+                            item = message.asBlock()
                             self.__check_item_and_add_if_goal(item)
-                            item_goal_index = self.__get_matching_goal_index(item)
 
-                            current_goal_block = self._goal_blocks[item_goal_index]
-                            # If the item matches the current goal and the drop location matches the target location
-                            if self._compare_blocks(item, current_goal_block) and item['location'] == current_goal_block[
-                                'location']:
-                                # set next goal as target, capping at the last
-                                next_goal_index = self._target_goal_index + 1
+                        if isinstance(message, Dropped):
+                            item = message.asBlock()
+                            placed_goal_index = self.__get_placed_goal_index(item)
+                            if placed_goal_index < 0:
+                                # Not placed on a goal, so it can be collected for one
+                                self.__check_item_and_add_if_goal(item)
 
-                                if not next_goal_index > 2:
+                            # If the item is placed on the current goal or a later one
+                            if placed_goal_index >= self._target_goal_index:
+                                # set the goal after it as target, capping at the last
+                                next_goal_index = placed_goal_index + 1
+
+                                if next_goal_index < len(self._goal_blocks):
                                     self._target_goal_index = next_goal_index
                                     # and look for collectable goal item
-                                    if self._checkForPossibleGoal():
+                                    if self._checkForPossibleGoal() and len(self._is_carrying) > 0:
                                         # drop everything we're doing now if it knows one exists
-                                        return self._dropBlockIfCarrying()
+                                        self._phase = Phase.CANCEL_GOAL
+                                        return self._cancelGoalPhase()
                                 else:
                                     # TODO liar liar
                                     pass
@@ -435,21 +519,21 @@ class CustomBaselineAgent(BW4TBrain):
 
         for member in members:
             for message in received[member]:
-                if 'Found' in message and '#00000' in message:
+                if isinstance(message, Found) and message.colour.startswith('#00000'):
                     self._trustBeliefs[member] -= 0.1
-                elif 'Found' in message:
-                    item = self.__object_from_message(message)
+                elif isinstance(message, Found):
+                    item = message.asBlock()
                     index = self.__get_matching_goal_index(item)
                     if index < 0:
                         self._trustBeliefs[member] -= 0.1
                     else:
                         self._trustBeliefs[member] += 0.1
-                if 'Opening' in message:
+                if isinstance(message, Opening):
                     self._door_trust_positive(message, member)
-                if 'Searching' in message:
+                if isinstance(message, Searching):
                     self._door_trust(message, member)
-                if 'Dropped' in message:
-                    item = self.__object_from_message(message)
+                if isinstance(message, Dropped):
+                    item = message.asBlock()
                     index = self.__get_matching_goal_index(item)
                     # This is just the messages receive by colorblind agent
                     if item['visualization']['colour'] == '#000000':
@@ -458,8 +542,8 @@ class CustomBaselineAgent(BW4TBrain):
                         self._trustBeliefs[member] -= 0.1
                     else:
                         self._trustBeliefs[member] += 0.1
-                if 'trust' in message:
-                    target_agent:str = message.split()[-1].strip()
+                if isinstance(message, Distrust):
+                    target_agent:str = message.agent_name
 
                     if self._trustBeliefs[member] > 0.5:
                         if not self._agent_name == target_agent:
@@ -533,14 +617,17 @@ class CustomBaselineAgent(BW4TBrain):
             return 'not a shape'
 
     def _init_goal_targets(self) -> None:
-        temp = self._current_state.as_dict()
-
         # Get all the Collect_Blocks
-        self._goal_blocks = [val for key, val in temp.items() if 'Collect_Block' in key]
+        self._goal_blocks = list(self._getStateView().get_goal_blocks())
         self._collectable_goal_blocks = [None] * len(self._goal_blocks)
 
+    def _getStateView(self) -> BW4TStateView:
+        if self._state_view is None:
+            self._state_view = BW4TStateView(self._current_state)
+        return self._state_view
+
     def _saveObjectsAround(self) -> None:
-        objects: list[dict] | None = self._current_state.get_room_objects(self._door['room_name'])
+        objects: list[dict] | None = self._getStateView().get_room_objects(self._door['room_name'])
         # TODO: if index doesn't equal current target goal index, drop off point should be around the goal
         if objects is None:
             return
@@ -570,12 +657,50 @@ class CustomBaselineAgent(BW4TBrain):
                             goal_block['collectable_match'] = block
 
                     # Not sure if this is the best solution, but this way it's quite simple to go
-                    # from carrying an item to matching it to a goal
-                    block['goal_index'] = index
+                    # from carrying an item to matching it to a goal. Goals can have the same colour and
+                    # shape, the item is for the target goal then, or else for the first goal after it.
+                    if self.__is_earlier_goal(index, block.get('goal_index')):
+                        block['goal_index'] = index
                     goal_blocks.append(block)
 
         return target_blocks, goal_blocks
 
+    def _forget_collectable_match(self, item: dict) -> None:
+        '''
+        Removes item as the collectable match of the goals, once it is picked up or turned out to be a wrong hint.
+        The same item is the match of every goal with its colour and shape, a goal left with it would pick it again.
+        '''
+        for goal_block in self._goal_blocks:
+            if 'collectable_match' in goal_block and self._is_same_item(goal_block['collectable_match'], item):
+                del goal_block['collectable_match']
+
+    def _is_same_item(self, a: dict, b: dict) -> bool:
+        '''
+        @return whether a and b are the same item. A hint of another agent has no obj_id, it is the item at its location.
+        '''
+        if a is b:
+            return True
+        if 'obj_id' in a and 'obj_id' in b:
+            return a['obj_id'] == b['obj_id']
+        return a['location'] == b['location'] and self._compare_blocks(a, b)
+
+    def __forget_picked_up_item(self, item: dict) -> None:
+        '''
+        A team member picked up item, it can not be collected anymore. If the agent was on its way to it,
+        it goes for another match of its target goal, or else to the next door.
+        '''
+        self._forget_collectable_match(item)
+        if self._phase not in (Phase.PLAN_PATH_TO_TARGET_ITEMS, Phase.FOLLOW_PATH_TO_TARGET_ITEMS):
+            return
+        target_items = [target for target in self._target_items if not self._is_same_item(target, item)]
+        if len(target_items) == len(self._target_items):
+            return
+        self._target_items = target_items
+        if len(target_items) == 0 and not self._checkForPossibleGoal():
+            self._phase = Phase.PLAN_PATH_TO_CLOSED_DOOR
+        elif len(target_items) > 0:
+            self._phase = Phase.PLAN_PATH_TO_TARGET_ITEMS
+
     def _check_for_duplicates(self) -> None:
         for i in range(len(self._target_items)):
             carrying = self._is_carrying
@@ -598,26 +723,29 @@ class CustomBaselineAgent(BW4TBrain):
         else:
             return None
 
+    def __is_earlier_goal(self, index: int, other: int | None) -> bool:
+        '''
+        @return whether goal index comes before goal other in the order that the goals are collected,
+            starting from the target goal. Goals before the target goal come last.
+        '''
+        if other is None:
+            return True
+        return (index < self._target_goal_index, index) < (other < self._target_goal_index, other)
+
     def __get_matching_goal_index(self, item):
         for index, goal in enumerate(self._goal_blocks):
             if self._compare_blocks(goal, item):
                 return index
         return -1
 
-    def __object_from_message(self, message):
-        location_string = str(re.findall(r'\(.*?\)', message)[0][1:-1])
-        location = tuple(map(lambda e: int(e), location_string.split(", ")))
-        found_object = re.findall(r'\{.*?\}', message)[0]
-        colour = re.findall(r"'colour':\s'#\w+'", found_object)[0].split(": ")[-1][1:-1]
-        shape = int(re.findall(r"\'shape\': \d+", found_object)[0].split(": ")[-1])
-
-        return {
-            "location": location,
-            "visualization": {
-                "colour": colour,
-                "shape": shape
-            },
-        }
+    def __get_placed_goal_index(self, item) -> int:
+        '''
+        @return the index of the goal that item is placed on, -1 if it is not on a goal that it matches
+        '''
+        for index, goal in enumerate(self._goal_blocks):
+            if goal['location'] == item['location'] and self._compare_blocks(goal, item):
+                return index
+        return -1
 
     def __check_item_and_add_if_goal(self, item: dict):
         old_collectables = self._collectables
@@ -634,26 +762,28 @@ class CustomBaselineAgent(BW4TBrain):
         return list(filter(lambda e: 'CollectableBlock' in e['class_inheritance'], objects))
 
     def __distance(self, a: tuple, b: tuple) -> int:
+        # The number of moves to b, if it is a key tile that can be reached
+        if self._key_tiles is not None and self._key_tiles.isKeyTile(b):
+            distance = self._key_tiles.getDistance(a, b)
+            if distance is not None:
+                return distance
+
         x_a, y_a = a
         x_b, y_b = b
         return abs(x_a - x_b) + abs(y_a - y_b)
 
-    def _door_trust_positive(self, message, member):
-        room_name = message.split()[-1]
-        all_doors = [door for door in self._current_state.values()
-                     if 'class_inheritance' in door and 'Door' in door['class_inheritance']]
-        closed_rooms = [door['room_name'] for door in all_doors if not door['is_open']]
+    def _door_trust_positive(self, message:Opening, member):
+        room_name = message.room_name
+        closed_rooms = [door['room_name'] for door in self._getStateView().get_closed_doors()]
 
         if room_name in closed_rooms:
             self._trustBeliefs[member] -= 0.1
         else:
             self._trustBeliefs[member] += 0.1
 
-    def _door_trust(self, message, member):
-        room_name = message.split()[-1]
-        all_doors = [door for door in self._current_state.values()
-                     if 'class_inheritance' in door and 'Door' in door['class_inheritance']]
-        closed_rooms = [door['room_name'] for door in all_doors if not door['is_open']]
+    def _door_trust(self, message:Searching, member):
+        room_name = message.room_name
+        closed_rooms = [door['room_name'] for door in self._getStateView().get_closed_doors()]
 
         if room_name in closed_rooms:
             self._trustBeliefs[member] -= 0.1
@@ -669,7 +799,7 @@ class StrongAgent(CustomBaselineAgent):
         self._capacity = 2
 
     def _saveObjectsAround(self) -> None:
-        objects: list[dict] | None = self._current_state.get_room_objects(self._door['room_name'])
+        objects: list[dict] | None = self._getStateView().get_room_objects(self._door['room_name'])
         # TODO: if index doesn't equal current target goal index, drop off point should be around the goal
         if objects is None:
             return
@@ -704,13 +834,11 @@ class StrongAgent(CustomBaselineAgent):
             return
 
         self._is_carrying.append(self._target_items[0])
+        self._forget_collectable_match(self._target_items[0])
         self._target_items.clear()
         self._target_goal_index += 1
 
-        self._sendMessage(
-            'Picking up goal block ' + str(self._is_carrying[-1]['visualization']) + ' at location ' + str(
-                self._is_carrying[-1]['location'])
-        )
+        self._sendMessage(PickingUp.fromBlock(self._is_carrying[-1]))
 
         temp: int = 0 if len(self._is_carrying) == 1 else 1
 
@@ -726,16 +854,13 @@ class StrongAgent(CustomBaselineAgent):
             return
 
         else:  # Drop off goal object to its correct location
-            self._navigator.reset_full()
-            self._navigator.add_waypoints([target_locations])
+            self._planRoute([target_locations])
             self._phase = Phase.FOLLOW_PATH_TO_GOAL
 
     def _followPathToGoalPhase(self) -> Action | None:
         # TODO: Check if goal object has already been placed,
         #  there are multiple of the same shapes that match the goals
-        self._state_tracker.update(self._current_state)
-
-        action = self._navigator.get_move_action(self._state_tracker)
+        action = self._getMoveAction()
 
         if action is not None:
             return action, {}
@@ -758,8 +883,7 @@ class StrongAgent(CustomBaselineAgent):
         elif len(self._is_carrying) == 1:
             target_loc: list[str] = self.__get_target_loc(self._is_carrying[0])
 
-            self._navigator.reset_full()
-            self._navigator.add_waypoints([target_loc])
+            self._planRoute([target_loc])
             self._phase = Phase.PLAN_PATH_TO_GOAL
         else:
             if not self._checkForPossibleGoal():
@@ -767,8 +891,7 @@ class StrongAgent(CustomBaselineAgent):
 
         loc = self._current_state[self.agent_id]['location']
 
-        self._sendMessage(
-            'Dropped goal block ' + str(block['visualization']) + ' at drop location ' + str(loc))
+        self._sendMessage(Dropped.fromBlock(block, loc))
 
         return DropObject.__name__, {'object_id': block['obj_id']}
 
@@ -818,85 +941,67 @@ class LiarAgent(CustomBaselineAgent):
             temp2 = self.__replace_room(temp1)
             temp3 = self.__replace_location(temp2)
 
-            msg = Message(content=temp3, from_id=self._agent_name)
+            msg = BW4TMessage(content=temp3, from_id=self._agent_name)
 
-            if msg.content not in self.received_messages:
-                self.send_message(msg)
+            self.send_message(msg)
         else:
-            msg = Message(content=mssg, from_id=self._agent_name)
-            if msg.content not in self.received_messages:
-                self.send_message(msg)
+            msg = BW4TMessage(content=mssg, from_id=self._agent_name)
+            self.send_message(msg)
 
     def __get_number(self) -> int:
         """
         Generate 1 80% of the time
         """
-        if random.random() <= 0.8:
+        if self.random.random() <= 0.8:
             return 1
         else:
             return 0
 
     def __get_random_color(self) -> str:
         """
-        Generate a random Hex color & replace in string
+        Generate a random Hex color
         """
-        temp: str = "'#%02x%02x%02x'" % (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-        return "'colour': " + temp
+        return '#%02x%02x%02x' % (self.random.randint(0, 255), self.random.randint(0, 255), self.random.randint(0, 255))
 
     def __get_random_room(self) -> str:
         """
-        Generate a random room & replace in string
+        Generate a random room
         """
         # TODO (maybe): Ensure that the chosen door isn't the door it is already headed to
-        all_doors = [door for door in self._current_state.values()
-                     if 'class_inheritance' in door and 'Door' in door['class_inheritance']]
-        door = random.choice(all_doors)
+        door = self.random.choice(self._getStateView().get_doors())
         return door['room_name']
 
-    def __get_random_location(self) -> str:
+    def __get_random_location(self) -> tuple:
         """
-        Generate a random location & replace in string
+        Generate a random location
         """
-        all_doors = [door for door in self._current_state.values()
-                     if 'class_inheritance' in door and 'Door' in door['class_inheritance']]
-        door = random.choice(all_doors)
-        return str(door['location'])
+        door = self.random.choice(self._getStateView().get_doors())
+        return tuple(door['location'])
 
-    def __replace_color(self, msg:str) -> str:
+    def __replace_color(self, msg):
         """
-        Check if the message contains a color
+        Replace the color if the message is about a block
         """
-        color = re.compile(r"'colour':\s'#(?:[0-9a-f]{3}){1,2}\b'")
-        if color.search(msg):
-            rand_color = self.__get_random_color()
-            temp: str = re.sub(color, rand_color, msg)
-            return temp
-        else:
-            return msg
+        if isinstance(msg, BlockMessage):
+            return replace(msg, colour=self.__get_random_color())
+        return msg
 
-    def __replace_room(self, msg:str) -> str:
+    def __replace_room(self, msg):
         """
-        Check if the message contains a room name
+        Replace the room if the message is about a room
         """
-        room = re.compile(r'room_\d')
-        if room.search(msg):
-            rand_room = self.__get_random_room()
-            temp: str = re.sub(room, rand_room, msg)
-            return temp
-        else:
-            return msg
+        if isinstance(msg, RoomMessage):
+            return replace(msg, room_name=self.__get_random_room())
+        return msg
 
-    def __replace_location(self, msg: str) -> str:
+    def __replace_location(self, msg):
         """
-        Check if the message contains a location
+        Replace the location if the message is about a block
         """
-        location = re.compile(r'\([0-9]+,\s[0-9]+\)')
-        if location.search(msg):
-            rand_loc = self.__get_random_location()
-            temp: str = re.sub(location, rand_loc, msg)
-            return temp
-        else:
-            return msg
+        if isinstance(msg, BlockMessage):
+            return replace(msg, location=self.__get_random_location())
+        return msg
+
 
 class LazyAgent(CustomBaselineAgent):
     """
@@ -956,7 +1061,7 @@ class LazyAgent(CustomBaselineAgent):
         Will stop doing whatever it is doing and default back to PLAN_PATH_TO_CLOSED_DOOR
         drops an object if it has one.
         """
-        if random.random() <= 0.5:
+        if self.random.random() <= 0.5:
             self._phase = Phase.PLAN_PATH_TO_CLOSED_DOOR
             return self._dropBlockIfCarrying(check_for_goal=False)
         return None
@@ -969,24 +1074,22 @@ class ColorblindAgent(CustomBaselineAgent):
         super().__init__(settings)
 
     def _planPathToClosedDoorPhase(self) -> Action | None:
-        self._navigator.reset_full()
-        all_doors = [door for door in self._current_state.values()
-                     if 'class_inheritance' in door and 'Door' in door['class_inheritance']]
-        closed_doors = [door for door in all_doors if not door['is_open']]
+        all_doors = self._getStateView().get_doors()
+        closed_doors = self._getStateView().get_closed_doors()
 
         # TODO maybe separate state?
         if len(closed_doors) == 0:
-            self._door = random.choice(all_doors)
+            self._door = self._chooseDoor(all_doors)
         else:
-            self._door = random.choice(closed_doors)
+            self._door = self._chooseDoor(closed_doors)
 
         door_loc = self._door['location']
         # Location in front of door is south from door
         door_loc = door_loc[0], door_loc[1] + 1
 
         # Send message of current action
-        self._sendMessage('Moving to ' + self._door['room_name'])
-        self._navigator.add_waypoints([door_loc])
+        self._sendMessage(MovingTo(self._door['room_name']))
+        self._planRoute([door_loc])
 
         self._phase = Phase.FOLLOW_PATH_TO_CLOSED_DOOR
 
@@ -995,39 +1098,22 @@ class ColorblindAgent(CustomBaselineAgent):
         Has agent continue opening the doors
         """
         self._phase = Phase.PLAN_PATH_TO_CLOSED_DOOR
-        self._sendMessage('Opening door of ' + self._door['room_name'])
+        self._sendMessage(Opening(self._door['room_name']))
 
         # Open door
         return OpenDoorAction.__name__, {'object_id': self._door['obj_id']}
 
     def _processMessages(self, teamMembers) -> dict:
         """
-        Process incoming messages by filtering out the color and create a dictionary with received messages
-        from each team member.
+        Process the messages received since the previous decision by filtering out the color and create
+        a dictionary with these messages from each team member.
         """
-        receivedMessages = {}
-        for member in teamMembers:
-            receivedMessages[member] = []
-
-        # Remove color from the ColorblindAgent's received messages
-        if len(self.received_messages) > 0:
-            self.__filter_messages(self.received_messages)
-
-        for mssg in self.received_messages:
-            for member in teamMembers:
-                if mssg.from_id == member:
-                    receivedMessages[member].append(mssg.content)
-        return receivedMessages
+        # Remove color from the ColorblindAgent's new messages, the older ones were filtered before
+        return {member: self.__filter_messages(self.new_messages_by_sender.get(member, []))
+                for member in teamMembers}
 
-    def __filter_messages(self, strings) -> list[str]:
+    def __filter_messages(self, messages) -> list:
         """
-        Replace any instance of colour in the message with black
+        Replace the colour of any message about a block with black
         """
-        color = re.compile(r"'colour':.*?,")
-        for i in range(len(strings)):
-            msg: str = strings[i].content
-            if color.search(msg):
-                temp: str = re.sub(color, "'colour': '#000000',", msg)
-                strings[i].content = temp
-
-        return strings
+        return [replace(msg, colour='#000000') if isinstance(msg, BlockMessage) else msg for msg in messages]
@@ -1,8 +1,10 @@
+from dataclasses import replace
+
 from matrx.actions import OpenDoorAction
 
 from agents1.CustomBaselineAgent import CustomBaselineAgent, Action, Phase
+from bw4t.BW4TMessages import BlockMessage, MovingTo, Opening
 
-import re, random
 
 
 class ColorblindAgent(CustomBaselineAgent):
@@ -14,24 +16,22 @@ class ColorblindAgent(CustomBaselineAgent):
         super().__init__(settings)
 
     def _planPathToClosedDoorPhase(self) -> Action | None:
-        self._navigator.reset_full()
-        all_doors = [door for door in self._current_state.values()
-                     if 'class_inheritance' in door and 'Door' in door['class_inheritance']]
-        closed_doors = [door for door in all_doors if not door['is_open']]
+        all_doors = self._getStateView().get_doors()
+        closed_doors = self._getStateView().get_closed_doors()
 
         # TODO maybe separate state?
         if len(closed_doors) == 0:
-            self._door = random.choice(all_doors)
+            self._door = self._chooseDoor(all_doors)
         else:
-            self._door = random.choice(closed_doors)
+            self._door = self._chooseDoor(closed_doors)
 
         door_loc = self._door['location']
         # Location in front of door is south from door
         door_loc = door_loc[0], door_loc[1] + 1
 
         # Send message of current action
-        self._sendMessage('Moving to ' + self._door['room_name'])
-        self._navigator.add_waypoints([door_loc])
+        self._sendMessage(MovingTo(self._door['room_name']))
+        self._planRoute([door_loc])
 
         self._phase = Phase.FOLLOW_PATH_TO_CLOSED_DOOR
 
@@ -40,40 +40,23 @@ class ColorblindAgent(CustomBaselineAgent):
         Has agent continue opening the doors
         """
         self._phase = Phase.PLAN_PATH_TO_CLOSED_DOOR
-        self._sendMessage('Opening door of ' + self._door['room_name'])
+        self._sendMessage(Opening(self._door['room_name']))
 
         # Open door
         return OpenDoorAction.__name__, {'object_id': self._door['obj_id']}
 
     def _processMessages(self, teamMembers) -> dict:
         """
-        Process incoming messages by filtering out the color and create a dictionary with received messages
-        from each team member.
+        Process the messages received since the previous decision by filtering out the color and create
+        a dictionary with these messages from each team member.
         """
-        receivedMessages = {}
-        for member in teamMembers:
-            receivedMessages[member] = []
-
-        # Remove color from the ColorblindAgent's received messages
-        if len(self.received_messages) > 0:
-            self.__filter_messages(self.received_messages)
-
-        for mssg in self.received_messages:
-            for member in teamMembers:
-                if mssg.from_id == member:
-                    receivedMessages[member].append(mssg.content)
-        return receivedMessages
+        # Remove color from the ColorblindAgent's new messages, the older ones were filtered before
+        return {member: self.__filter_messages(self.new_messages_by_sender.get(member, []))
+                for member in teamMembers}
 
-    def __filter_messages(self, strings) -> list[str]:
+    def __filter_messages(self, messages) -> list:
         """
-        Replace any instance of colour in the message with black
+        Replace the colour of any message about a block with black
         """
-        color = re.compile(r"'colour':.*?,")
-        for i in range(len(strings)):
-            msg: str = strings[i].content
-            if color.search(msg):
-                temp: str = re.sub(color, "'colour': '#000000',", msg)
-                strings[i].content = temp
-
-        return strings
+        return [replace(msg, colour='#000000') if isinstance(msg, BlockMessage) else msg for msg in messages]
 
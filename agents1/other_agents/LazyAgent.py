@@ -1,6 +1,5 @@
 from agents1.CustomBaselineAgent import CustomBaselineAgent, Phase, Action
 
-import random
 
 
 class LazyAgent(CustomBaselineAgent):
@@ -61,7 +60,7 @@ class LazyAgent(CustomBaselineAgent):
         Will stop doing whatever it is doing and default back to PLAN_PATH_TO_CLOSED_DOOR
         drops an object if it has one.
         """
-        if random.random() <= 0.5:
+        if self.random.random() <= 0.5:
             self._phase = Phase.PLAN_PATH_TO_CLOSED_DOOR
             return self._dropBlockIfCarrying(check_for_goal=False)
         return None
@@ -1,7 +1,6 @@
-import random
-import re
+from dataclasses import replace
 
-from matrx.messages.message import Message
+from bw4t.BW4TMessages import BW4TMessage, BlockMessage, RoomMessage
 
 from agents1.CustomBaselineAgent import CustomBaselineAgent
 
@@ -26,82 +25,63 @@ class LiarAgent(CustomBaselineAgent):
             temp2 = self.__replace_room(temp1)
             temp3 = self.__replace_location(temp2)
 
-            msg = Message(content=temp3, from_id=self._agent_name)
+            msg = BW4TMessage(content=temp3, from_id=self._agent_name)
 
-            if msg.content not in self.received_messages:
-                self.send_message(msg)
+            self.send_message(msg)
         else:
-            msg = Message(content=mssg, from_id=self._agent_name)
-            if msg.content not in self.received_messages:
-                self.send_message(msg)
+            msg = BW4TMessage(content=mssg, from_id=self._agent_name)
+            self.send_message(msg)
 
     def __get_number(self) -> int:
         """
         Generate 1 80% of the time
         """
-        if random.random() <= 0.8:
+        if self.random.random() <= 0.8:
             return 1
         else:
             return 0
 
     def __get_random_color(self) -> str:
         """
-        Generate a random Hex color & replace in string
+        Generate a random Hex color
         """
-        temp: str = "'#%02x%02x%02x'" % (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-        return "'colour': " + temp
+        return '#%02x%02x%02x' % (self.random.randint(0, 255), self.random.randint(0, 255), self.random.randint(0, 255))
 
     def __get_random_room(self) -> str:
         """
-        Generate a random room & replace in string
+        Generate a random room
         """
         # TODO (maybe): Ensure that the chosen door isn't the door it is already headed to
-        all_doors = [door for door in self._current_state.values()
-                     if 'class_inheritance' in door and 'Door' in door['class_inheritance']]
-        door = random.choice(all_doors)
+        door = self.random.choice(self._getStateView().get_doors())
         return door['room_name']
 
-    def __get_random_location(self) -> str:
+    def __get_random_location(self) -> tuple:
         """
-        Generate a random location & replace in string
+        Generate a random location
         """
-        all_doors = [door for door in self._current_state.values()
-                     if 'class_inheritance' in door and 'Door' in door['class_inheritance']]
-        door = random.choice(all_doors)
-        return str(door['location'])
+        door = self.random.choice(self._getStateView().get_doors())
+        return tuple(door['location'])
 
-    def __replace_color(self, msg:str) -> str:
+    def __replace_color(self, msg):
         """
-        Check if the message contains a color
+        Replace the color if the message is about a block
         """
-        color = re.compile(r"'colour':\s'#(?:[0-9a-f]{3}){1,2}\b'")
-        if color.search(msg):
-            rand_color = self.__get_random_color()
-            temp: str = re.sub(color, rand_color, msg)
-            return temp
-        else:
-            return msg
+        if isinstance(msg, BlockMessage):
+            return replace(msg, colour=self.__get_random_color())
+        return msg
 
-    def __replace_room(self, msg:str) -> str:
+    def __replace_room(self, msg):
         """
-        Check if the message contains a room name
+        Replace the room if the message is about a room
         """
-        room = re.compile(r'room_\d')
-        if room.search(msg):
-            rand_room = self.__get_random_room()
-            temp: str = re.sub(room, rand_room, msg)
-            return temp
-        else:
-            return msg
+        if isinstance(msg, RoomMessage):
+            return replace(msg, room_name=self.__get_random_room())
+        return msg
 
-    def __replace_location(self, msg: str) -> str:
+    def __replace_location(self, msg):
         """
-        Check if the message contains a location
+        Replace the location if the message is about a block
         """
-        location = re.compile(r'\([0-9]+,\s[0-9]+\)')
-        if location.search(msg):
-            rand_loc = self.__get_random_location()
-            temp: str = re.sub(location, rand_loc, msg)
-            return temp
-        else:
-            return msg
+        if isinstance(msg, BlockMessage):
+            return replace(msg, location=self.__get_random_location())
+        return msg
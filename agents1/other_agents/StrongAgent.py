@@ -5,6 +5,7 @@ import math
 from matrx.actions import GrabObject, DropObject
 
 from agents1.CustomBaselineAgent import CustomBaselineAgent, Action, Phase
+from bw4t.BW4TMessages import PickingUp, Dropped
 
 
 class StrongAgent(CustomBaselineAgent):
@@ -17,7 +18,7 @@ class StrongAgent(CustomBaselineAgent):
         self._capacity = 2
 
     def _saveObjectsAround(self) -> None:
-        objects: list[dict] | None = self._current_state.get_room_objects(self._door['room_name'])
+        objects: list[dict] | None = self._getStateView().get_room_objects(self._door['room_name'])
         # TODO: if index doesn't equal current target goal index, drop off point should be around the goal
         if objects is None:
             return
@@ -53,13 +54,11 @@ class StrongAgent(CustomBaselineAgent):
             return
 
         self._is_carrying.append(self._target_items[0])
+        self._forget_collectable_match(self._target_items[0])
         self._target_items.clear()
         self._target_goal_index += 1
 
-        self._sendMessage(
-            'Picking up goal block ' + str(self._is_carrying[-1]['visualization']) + ' at location ' + str(
-                self._is_carrying[-1]['location'])
-        )
+        self._sendMessage(PickingUp.fromBlock(self._is_carrying[-1]))
 
         temp: int = 0 if len(self._is_carrying) == 1 else 1
 
@@ -77,16 +76,13 @@ class StrongAgent(CustomBaselineAgent):
             return
 
         else:  # Drop off goal object to its correct location
-            self._navigator.reset_full()
-            self._navigator.add_waypoints([target_locations])
+            self._planRoute([target_locations])
             self._phase = Phase.FOLLOW_PATH_TO_GOAL
 
     def _followPathToGoalPhase(self) -> Action | None:
         # TODO: Check if goal object has already been placed,
         #  there are multiple of the same shapes that match the goals
-        self._state_tracker.update(self._current_state)
-
-        action = self._navigator.get_move_action(self._state_tracker)
+        action = self._getMoveAction()
 
         if action is not None:
             return action, {}
@@ -109,8 +105,7 @@ class StrongAgent(CustomBaselineAgent):
         elif len(self._is_carrying) == 1:
             target_loc: list[str] = self.__get_target_loc(self._is_carrying[0])
 
-            self._navigator.reset_full()
-            self._navigator.add_waypoints([target_loc])
+            self._planRoute([target_loc])
             self._phase = Phase.PLAN_PATH_TO_GOAL
         else:
             if not self._checkForPossibleGoal():
@@ -118,8 +113,7 @@ class StrongAgent(CustomBaselineAgent):
 
         loc = self._current_state[self.agent_id]['location']
 
-        self._sendMessage(
-            'Dropped goal block ' + str(block['visualization']) + ' at drop location ' + str(loc))
+        self._sendMessage(Dropped.fromBlock(block, loc))
 
         return DropObject.__name__, {'object_id': block['obj_id']}
 
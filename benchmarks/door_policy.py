@@ -0,0 +1,80 @@
+"""
+Measures the completion ticks of teams of CustomBaselineAgents for the door policies
+(see the door_policy setting of CustomBaselineAgent): 'random' sends the agents to
+random (closed) doors, 'nearest' to the nearest door of the rooms that the team
+visited least. Each team size runs in the default world with several random seeds.
+The world generator picks the colours and shapes of the goals and of the blocks
+independently, so some seeds give a world without a block for each goal. Those can
+not be completed and are left out of the results. Runs that do not reach the goal
+before the deadline count with the deadline.
+Run from the repository root: python -m benchmarks.door_policy [deadline] [nr_seeds]
+"""
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+from collections import Counter
+from agents1.Group02Agent import CustomBaselineAgent
+from bw4t.BW4TBlocks import CollectableBlock, GhostBlock
+from bw4t.BW4TWorld import BW4TWorld, DEFAULT_WORLDSETTINGS
+
+TEAM_SIZES = [2, 4, 8]
+POLICIES = ['random', 'nearest']
+
+
+def has_goal_blocks(grid_world) -> bool:
+    '''
+    @return whether the world has a block of the colour and shape of each goal, so that it can be completed
+    '''
+    objects = grid_world.environment_objects.values()
+    goals = Counter((obj.visualize_colour, obj.visualize_shape) for obj in objects if isinstance(obj, GhostBlock))
+    blocks = Counter((obj.visualize_colour, obj.visualize_shape) for obj in objects if isinstance(obj, CollectableBlock))
+    return all(blocks[block] >= nr for block, nr in goals.items())
+
+
+def run_team(nr_agents:int, door_policy:str, random_seed:int, deadline:int):
+    '''
+    @return the completion tick of a team of nr_agents CustomBaselineAgents with the door policy
+    in the default world with the random seed, None if the goal was not reached before the deadline.
+    False if the world can not be completed, it is not run then.
+    '''
+    settings = dict(DEFAULT_WORLDSETTINGS)
+    settings.update({'deadline': deadline, 'tick_duration': 0, 'random_seed': random_seed})
+    agents = [{'name': f'agent{nr}', 'botclass': CustomBaselineAgent, 'settings': {'door_policy': door_policy}}
+              for nr in range(nr_agents)]
+    world = BW4TWorld(agents, settings)
+    grid_world = world.getGridWorld()
+    if not has_goal_blocks(grid_world):
+        return False
+    with contextlib.redirect_stdout(io.StringIO()):  # the agents print their trust values at the end
+        world.run()
+    completed = grid_world.simulation_goal.isBlocksPlaced(grid_world)
+    return grid_world.current_nr_ticks if completed else None
+
+
+if __name__ == "__main__":
+    deadline = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    nr_seeds = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    print("agents;door policy;mean completion tick;median completion tick;completed;completion tick per seed")
+    for nr_agents in TEAM_SIZES:
+        ticks_by_policy = {}
+        for door_policy in POLICIES:
+            ticks = {}
+            for random_seed in range(1, nr_seeds + 1):
+                # the world writes its log folder and the agents their trust files in the working directory. Keep
+                # those out of the repository, and start each run without the trust files of the previous run.
+                os.chdir(tempfile.mkdtemp())
+                os.mkdir('agents1')
+                tick = run_team(nr_agents, door_policy, random_seed, deadline)
+                if tick is not False:
+                    ticks[random_seed] = deadline if tick is None else tick
+            ticks_by_policy[door_policy] = ticks
+            completed = [tick for tick in ticks.values() if tick < deadline]
+            per_seed = ' '.join(f"{seed}:{'-' if tick == deadline else tick}" for seed, tick in ticks.items())
+            print(f"{nr_agents};{door_policy};{statistics.mean(ticks.values()):.1f};"
+                  f"{statistics.median(ticks.values()):.0f};{len(completed)}/{len(ticks)};{per_seed}")
+        faster = Counter((nearest > random) - (nearest < random) for nearest, random
+                         in zip(ticks_by_policy['nearest'].values(), ticks_by_policy['random'].values()))
+        print(f"{nr_agents};nearest faster/same/slower than random;{faster[-1]}/{faster[0]}/{faster[1]}")
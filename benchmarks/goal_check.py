@@ -0,0 +1,51 @@
+"""
+Measures the cost of the CollectionGoal check against the number of drop zones.
+Run from the repository root: python -m benchmarks.goal_check [nr_blocks_needed]
+"""
+import os
+import sys
+import tempfile
+import time
+from bw4t.BW4TWorld import BW4TWorld, DEFAULT_WORLDSETTINGS
+
+ZONE_COUNTS = [1, 4, 16, 64]
+REPEATS = 200
+
+
+def bench_goal_check(nr_drop_zones:int, nr_blocks_needed:int, repeats:int=REPEATS):
+    '''
+    @return (first check, cached check, full check) in seconds per call for a
+    world with the given number of drop zones. The first check includes finding
+    the drop zones, a full check goes through all drop tiles again.
+    '''
+    settings = dict(DEFAULT_WORLDSETTINGS)
+    settings.update({'nr_drop_zones': nr_drop_zones, 'nr_blocks_needed': nr_blocks_needed, 'tick_duration': 0})
+    grid_world = BW4TWorld([], settings).getGridWorld()
+    goal = grid_world.simulation_goal
+
+    start = time.perf_counter()
+    goal.isBlocksPlaced(grid_world)
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        goal.isBlocksPlaced(grid_world)
+    cached = (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        goal.invalidate()
+        goal.isBlocksPlaced(grid_world)
+    full = (time.perf_counter() - start) / repeats
+
+    return first, cached, full
+
+
+if __name__ == "__main__":
+    nr_blocks_needed = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    # the world writes its log folder in the working directory, keep that out of the repository
+    os.chdir(tempfile.mkdtemp())
+    print("zones;drop tiles;first check (ms);cached check (us);full check (us)")
+    for nr_drop_zones in ZONE_COUNTS:
+        first, cached, full = bench_goal_check(nr_drop_zones, nr_blocks_needed)
+        print(f"{nr_drop_zones};{nr_drop_zones * nr_blocks_needed};{first * 1e3:.2f};{cached * 1e6:.1f};{full * 1e6:.1f}")
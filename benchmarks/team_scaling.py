@@ -0,0 +1,57 @@
+"""
+Measures ticks per second and completion ticks against the team size, for teams
+of CustomBaselineAgents. Teams that do not fit in the top row are spread over
+the doors by the spawn planner of BW4TWorld. With parallel_workers > 0 the agents
+decide in that many worker processes (see BW4TGridWorld.setParallelWorkers), which
+gives the same completion ticks. The navigation ('fields' or 'astar', see the agent
+setting in BW4TBrain) compares the distance fields with planning every move with A*.
+Run from the repository root: python -m benchmarks.team_scaling [deadline] [parallel_workers] [navigation]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from agents1.Group02Agent import CustomBaselineAgent
+from bw4t.BW4TWorld import BW4TWorld, DEFAULT_WORLDSETTINGS
+
+TEAM_SIZES = [4, 8, 16, 32, 64]
+
+
+def bench_team(nr_agents:int, deadline:int, parallel_workers:int=0, navigation:str='fields'):
+    '''
+    @param parallel_workers the nr of worker processes in which the agents decide, 0 to decide one by one
+    @param navigation the navigation setting of the agents
+    @return (ticks per second, completion tick) for a team of nr_agents CustomBaselineAgents
+    in the default world. The completion tick is None if the goal was not reached before the deadline.
+    '''
+    settings = dict(DEFAULT_WORLDSETTINGS)
+    settings.update({'deadline': deadline, 'tick_duration': 0, 'parallel_workers': parallel_workers})
+    agents = [{'name': f'agent{nr}', 'botclass': CustomBaselineAgent, 'settings': {'navigation': navigation}}
+              for nr in range(nr_agents)]
+    world = BW4TWorld(agents, settings)
+    grid_world = world.getGridWorld()
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # the agents print their trust values at the end
+        world.run()
+    duration = time.perf_counter() - start
+
+    ticks = grid_world.current_nr_ticks
+    completed = grid_world.simulation_goal.isBlocksPlaced(grid_world)
+    return ticks / duration, ticks if completed else None
+
+
+if __name__ == "__main__":
+    deadline = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_WORLDSETTINGS['deadline']
+    parallel_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    navigation = sys.argv[3] if len(sys.argv) > 3 else 'fields'
+    print("agents;ticks/s;completion tick")
+    for nr_agents in TEAM_SIZES:
+        # the world writes its log folder and the agents their trust files in the working directory. Keep those
+        # out of the repository, and start each team without the trust files of the previous team.
+        os.chdir(tempfile.mkdtemp())
+        os.mkdir('agents1')
+        ticks_per_second, completion = bench_team(nr_agents, deadline, parallel_workers, navigation)
+        print(f"{nr_agents};{ticks_per_second:.1f};{'-' if completion is None else completion}")
@@ -0,0 +1,52 @@
+"""
+Measures world build time and tick time against the number of rooms, for the
+default and the large_world (vectorized, bulk) world generation.
+Run from the repository root: python -m benchmarks.world_scaling [nr_agents] [nr_ticks]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from agents1.Group02Agent import CustomBaselineAgent
+from bw4t.BW4TWorld import BW4TWorld, DEFAULT_WORLDSETTINGS
+
+ROOM_COUNTS = [9, 36, 100, 400]
+
+
+def bench_world(nr_rooms:int, large_world:bool, nr_agents:int, nr_ticks:int):
+    '''
+    @return (build time, time per tick) in seconds for a square world with the given
+    number of rooms and CustomBaselineAgents, run for nr_ticks ticks.
+    '''
+    settings = dict(DEFAULT_WORLDSETTINGS)
+    settings.update({'nr_rooms': nr_rooms, 'rooms_per_row': int(np.ceil(np.sqrt(nr_rooms))),
+                     'large_world': large_world, 'deadline': nr_ticks, 'tick_duration': 0})
+    agents = [{'name': f'agent{nr}', 'botclass': CustomBaselineAgent, 'settings': {}} for nr in range(nr_agents)]
+
+    start = time.perf_counter()
+    world = BW4TWorld(agents, settings)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # the agents print their trust values at the end
+        world.run()
+    tick = (time.perf_counter() - start) / nr_ticks
+
+    return build, tick
+
+
+if __name__ == "__main__":
+    nr_agents = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    nr_ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    # the world writes its log folder and the agents their trust files in the working directory,
+    # keep those out of the repository
+    os.chdir(tempfile.mkdtemp())
+    os.mkdir('agents1')
+    print("rooms;large_world;build (s);tick (ms)")
+    for nr_rooms in ROOM_COUNTS:
+        for large_world in [False, True]:
+            build, tick = bench_world(nr_rooms, large_world, nr_agents, nr_ticks)
+            print(f"{nr_rooms};{large_world};{build:.2f};{tick * 1e3:.1f}")
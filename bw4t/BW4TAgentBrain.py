@@ -1,10 +1,16 @@
-import copy
+import random
+import time
 import warnings
+from collections import deque
 import numpy as np
 from matrx.agents.agent_brain import AgentBrain
 from matrx.actions import GrabObject, RemoveObject, OpenDoorAction, CloseDoorAction
 from matrx.agents.agent_utils.state import State
 from matrx.messages import Message
+from bw4t.BW4TMessages import BW4TMessage, fromText
+from bw4t.BW4TOutbox import BW4TOutbox
+from bw4t.BW4TProfiler import BW4TProfiler
+from bw4t.BW4TStateDelta import BW4TStateDelta
 
 
 class BW4TAgentBrain(AgentBrain):
@@ -13,7 +19,8 @@ class BW4TAgentBrain(AgentBrain):
     """
 
 
-    def __init__(self,memorize_for_ticks=None):
+    def __init__(self,memorize_for_ticks=None, message_history=None, dedup_window=None, rate_limits=None,
+                 profile=False):
         """ Defines the behavior of an agent.
         This class is the place where all the decision logic of an agent is
         contained. This class together with the
@@ -50,19 +57,34 @@ class BW4TAgentBrain(AgentBrain):
             the attribute `keys_of_agent_writable_props`).
         keys_of_agent_writable_props: [str, ...]
             List of property names that this agent can adjust.
-        messages_to_send: [Message, ...]
-            List of messages this agent will send. Use the method
-            :meth:`matrx.agents.agent_brain.AgentBrain.send_message` to append to
-            this list.
         previous_action: str
             The name of the previous performed or attempted action.
         previous_action_result: ActionResult
             The :class:`matrx.actions.action.ActionResult` of the previously
             performed or attempted action.
-        received_messages: [Message, ...]
-            The list of received messages.
+        received_messages: deque of Message
+            The received messages, the oldest are dropped once there are more than
+            message_history (the history is unbounded if message_history is None).
+            The content of a BW4TMessage is in its wire format, use its unpack method.
+        new_messages: [Message, ...]
+            The messages received since the previous decision (the previous call to
+            decide_on_action).
+        received_messages_by_sender: dict
+            From the id of a sender to a deque with the contents of its received
+            messages (unpacked), each bounded by message_history like received_messages.
+            Text contents in the format of a typed content (see BW4TMessages.fromText),
+            as sent by agents that send text, are in it as that typed content.
+        new_messages_by_sender: dict
+            From the id of a sender to a list with the contents of its new_messages.
+            Senders without new messages are not in it.
         rnd_gen: Random
             The random generator for this agent.
+        random: random.Random
+            A python random generator for this agent, seeded with `rnd_seed`. Use
+            this (or `rnd_gen`) instead of the random module, so that the decisions
+            of an agent do not depend on the random numbers drawn by the other
+            agents. This keeps runs the same when the agents decide in worker
+            processes (see BW4TGridWorld.setParallelWorkers).
         rnd_seed: int
             The random seed with which this agent's `rnd_gen` was initialized. This
             seed is based on the master random seed given of the
@@ -72,10 +94,21 @@ class BW4TAgentBrain(AgentBrain):
         self.previous_action = None
         self.previous_action_result = None
 
-        # A list of messages that may be filled by this agent, which is retrieved by the GridWorld and send towards the
-        # appropriate agents.
-        self.messages_to_send = []
-        self.received_messages = []
+        self.__message_history = message_history
+        self.received_messages = deque(maxlen=message_history)
+        self.new_messages = []
+        self.received_messages_by_sender = {}
+        self.new_messages_by_sender = {}
+        # The messages received since the previous decision, become new_messages at the next decision
+        self.__inbox = []
+        self.__inbox_by_sender = {}
+        # The messages sent by this agent, handed to the GridWorld once per tick
+        self.__dedup_window = dedup_window
+        self.__rate_limits = rate_limits
+        self.__outbox = BW4TOutbox(dedup_window, rate_limits)
+        self.__tick = 0
+        # Times the decisions of this agent if profile is set
+        self.__profiler = BW4TProfiler(['get_action', 'filter_observations', 'decide_on_action']) if profile else None
 
         # Filled by the WorldFactory during self.factory_initialise()
         self.agent_id = None
@@ -84,12 +117,15 @@ class BW4TAgentBrain(AgentBrain):
         self.sense_capability = None
         self.rnd_gen = None
         self.rnd_seed = None
+        self.random = None
         self.agent_properties = {}
         self.keys_of_agent_writable_props = []
         self.__memorize_for_ticks = memorize_for_ticks
 
         # The central state property (an extended dict with unique searching capabilities)
         self._state = None
+        # The properties of the objects in the previous state, by id, to which a BW4TStateDelta is applied
+        self.__perceived = {}
 
     def initialize(self):
         """ Method called by any world when it starts.
@@ -110,8 +146,15 @@ class BW4TAgentBrain(AgentBrain):
         """
         self.previous_action = None
         self.previous_action_result = None
-        self.messages_to_send = []
-        self.received_messages = []
+        self.received_messages = deque(maxlen=self.__message_history)
+        self.new_messages = []
+        self.received_messages_by_sender = {}
+        self.new_messages_by_sender = {}
+        self.__inbox = []
+        self.__inbox_by_sender = {}
+        self.__outbox = BW4TOutbox(self.__dedup_window, self.__rate_limits)
+        self.__tick = 0
+        self.__perceived = {}
         self._init_state()
 
     def filter_observations(self, state):
@@ -332,11 +375,14 @@ class BW4TAgentBrain(AgentBrain):
         message : Message
             A message object that needs to be send. Should be of type Message. It's to_id can contain a single
             recipient, a list of recipients or None. If None, it is send to all other agents.
+            The message goes through the outbox (see BW4TOutbox): if the same content was sent
+            to the same recipient(s) less than dedup_window ticks ago it is dropped, and messages
+            over the rate limit of their content type are coalesced.
         """
         # Check if the message is a true message
         self.__check_message(message, self.agent_id)
-        # Add the message to our list
-        self.messages_to_send.append(message)
+        # Add the message to our outbox
+        self.__outbox.add(message, self.__tick)
 
     def is_action_possible(self, action, action_kwargs):
         """ Checks if an action would be possible.
@@ -462,6 +508,7 @@ class BW4TAgentBrain(AgentBrain):
         # Setting the random seed and rng
         self.rnd_seed = rnd_seed
         self._set_rnd_seed(seed=rnd_seed)
+        self.random = random.Random(rnd_seed)
 
         # Initializing the State object
         self._init_state()
@@ -491,7 +538,8 @@ class BW4TAgentBrain(AgentBrain):
         ----------
         state_dict: dict
             A state description containing all properties of EnvObject that are within a certain range as defined by
-            self.sense_capability. It is a list of properties in a dictionary
+            self.sense_capability. It is a list of properties in a dictionary. A BW4TGridWorld gives a
+            BW4TStateDelta instead, with only the objects that changed since the previous state.
         agent_properties: dict
             The properties of the agent, which might have been changed by the environment as a result of actions of
             this or other agents.
@@ -508,32 +556,86 @@ class BW4TAgentBrain(AgentBrain):
         action_kwargs : dict
             Keyword arguments for the action
         """
+        start = time.perf_counter()
+
         # Process any properties of this agent which were updated in the environment as a result of actions
         self.agent_properties = agent_properties
 
+        # The messages received since the previous decision are the new messages for this decision
+        self.new_messages = self.__inbox
+        self.new_messages_by_sender = self.__inbox_by_sender
+        self.__inbox = []
+        self.__inbox_by_sender = {}
+
         # Update the state property of an agent with the GridWorld's state dictionary
-        self.state.state_update(state.as_dict())
+        state_dict = self.__state_dict(state)
+        self.__tick = state_dict['World']['nr_ticks']
+        self.state.state_update(state_dict)
 
-        # Call the filter method to filter the observation
-        self.state = self.filter_observations(self.state)
+        if self.__profiler is None:
+            # Call the filter method to filter the observation
+            self.state = self.filter_observations(self.state)
 
-        # Call the method that decides on an action
-        action, action_kwargs = self.decide_on_action(self.state)
+            # Call the method that decides on an action
+            action, action_kwargs = self.decide_on_action(self.state)
+        else:
+            with self.__profiler.time('filter_observations'):
+                self.state = self.filter_observations(self.state)
+            with self.__profiler.time('decide_on_action'):
+                action, action_kwargs = self.decide_on_action(self.state)
 
         # Store the action so in the next call the agent still knows what it did
         self.previous_action = action
 
+        if self.__profiler is not None:
+            self.__profiler.record('get_action', time.perf_counter() - start)
+
         # Return the filtered state, the (updated) properties, the intended actions and any keyword arguments for that
         # action if needed.
         return self.state, self.agent_properties, action, action_kwargs
 
     def _fetch_state(self, state):
-        self.state.state_update(state.as_dict())
+        self.state.state_update(self.__state_dict(state))
         filtered_state = self.filter_observations(self.state)
         return filtered_state
 
+    def __state_dict(self, state):
+        """ The state dictionary of the State or BW4TStateDelta that the GridWorld gave this agent.
+        The objects that did not change since the previous state get new dicts as well,
+        like the GridWorld gives them, so agents can change the dicts in their state.
+        """
+        if not isinstance(state, BW4TStateDelta):
+            return state.as_dict()
+        self.__perceived = state.apply(self.__perceived)
+        state_dict = {obj_id: {**properties, 'visualization': properties['visualization'].copy()}
+                      for obj_id, properties in self.__perceived.items()}
+        state_dict['World'] = state.world_info
+        return state_dict
+
     def _get_log_data(self):
-        return self.get_log_data()
+        # The message and byte counts of the outbox are logged for every agent, next to its own data.
+        # With profiling also the total times so far.
+        data = {**self.get_log_data(), 'messages_sent': self.__outbox.getNrSent(),
+                'messages_suppressed': self.__outbox.getNrSuppressed(), 'bytes_sent': self.__outbox.getNrBytesSent()}
+        if self.__profiler is not None:
+            data.update(self.__profiler.getLogData())
+        return data
+
+    def get_profiler(self):
+        """ The profiler with the wall times of the decisions of this agent.
+        Returns
+        -------
+        profiler : BW4TProfiler
+            The profiler, with the times of `_get_action`, `filter_observations` and `decide_on_action`. Agents can
+            time parts of their decision with it as well. None if this agent is not profiled.
+        """
+        return self.__profiler
+
+    def _set_profiler(self, profiler):
+        """ Private function, used by BW4TGridWorld to hand back the profiler of the copy of this brain that
+        decided in a worker process.
+        """
+        self.__profiler = profiler
 
     def _set_action_result(self, action_result):
         """ A function that the environment calls (similarly as the self.get_action method) to set the action_result of the
@@ -579,10 +681,8 @@ class BW4TAgentBrain(AgentBrain):
         # preprocessed_messages = self.preprocess_messages(this_agent_id=self.agent_id, agent_ids=all_agent_ids,
         # messages=self.messages_to_send)
 
-        send_messages = copy.copy(self.messages_to_send)
-
-        # Remove all messages that need to be send, as we have send them now
-        self.messages_to_send = []
+        # Take the messages of this tick from the outbox, this removes them from the outbox
+        send_messages = self.__outbox.flush(self.__tick)
 
         return send_messages
 
@@ -598,8 +698,8 @@ class BW4TAgentBrain(AgentBrain):
             messages are used as input), only the previous messages are removed
         """
 
-        # We empty all received messages as this is from the previous tick
-        # self.received_messages = []
+        # We do not empty the received messages, these are the history (bounded by message_history).
+        # Messages since the previous decision are collected in the inbox.
 
         # Loop through all messages and create a Message object out of the dictionaries.
         for mssg in messages:
@@ -608,11 +708,24 @@ class BW4TAgentBrain(AgentBrain):
             BW4TAgentBrain.__check_message(mssg, self.agent_id)
 
             # Since each message is secretly wrapped inside a Message (as its content), we unpack its content and
-            # set that as the actual received message.
-            received_message = mssg.content
+            # set that as the actual received message. The content of a BW4TMessage is in its wire format, a text
+            # content of another Message is read as the typed content with that text, if there is one.
+            if isinstance(mssg, BW4TMessage):
+                received_message = mssg.unpack()
+            elif isinstance(mssg.content, str):
+                received_message = fromText(mssg.content)
+            else:
+                received_message = mssg.content
 
             # Add the message object to the received messages
             self.received_messages.append(mssg)
+            self.__inbox.append(mssg)
+
+            # And its content to the messages of its sender
+            if mssg.from_id not in self.received_messages_by_sender:
+                self.received_messages_by_sender[mssg.from_id] = deque(maxlen=self.__message_history)
+            self.received_messages_by_sender[mssg.from_id].append(received_message)
+            self.__inbox_by_sender.setdefault(mssg.from_id, []).append(received_message)
 
     def _init_state(self):
         self._state = State(memorize_for_ticks=self.memorize_for_ticks,
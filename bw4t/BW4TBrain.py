@@ -1,6 +1,11 @@
 from abc import  ABC
+import numpy as np # type: ignore
 from matrx.agents.agent_utils.state import State
 from bw4t.BW4TAgentBrain import BW4TAgentBrain
+from bw4t.BW4TLayout import BW4TLayout, LayoutTracker
+from bw4t.BW4TNavigator import FieldNavigator
+from matrx.agents.agent_utils.navigator import Navigator
+from matrx.agents.agent_utils.state_tracker import StateTracker
 from typing import final, List, Dict, Final, Set
 from matrx.messages import Message
 
@@ -12,7 +17,8 @@ class BW4TBrain(BW4TAgentBrain, ABC):
         
     NOT_ALLOWED_PARAMS:Final[Set[str]] ={'remove_range', 'grab_range', 'door_range', 'action_duration'}
    
-    DEFAULT_SETTINGS:Final[Dict[str,object]]={'slowdown':1, 'grab_range':1}
+    DEFAULT_SETTINGS:Final[Dict[str,object]]={'slowdown':1, 'grab_range':1, 'message_history':100, 'dedup_window':10,
+        'message_rate_limits':{'Searching':5}, 'profile':False, 'navigation':'fields'}
 
     def __init__(self, settings:Dict[str,object]):
         '''
@@ -20,13 +26,74 @@ class BW4TBrain(BW4TAgentBrain, ABC):
         * slowdown : integer. Basically this sets action_duration
         field to the given slowdown. 1 implies normal speed
         of 1 action per tick. 3 givs 1 allowed action every 3 ticks. etc
+        * message_history: integer or None. The max number of messages kept in received_messages,
+        None to keep all. The messages since the previous decision are in new_messages.
+        * dedup_window: integer or None. Sending the same message content to the same receivers again
+        within this number of ticks is dropped. None sends all messages.
+        * message_rate_limits: dict with as key the class name of a message content (see BW4TMessages)
+        and as value the min number of ticks between two such messages. Messages over the limit wait
+        and are sent in turn when the limit allows, the same content is sent once.
+        * profile: boolean. If True the wall time of the decisions of the agent is recorded,
+        see get_profiler. The totals are logged and BW4TWorld prints a summary at the end.
+        * navigation: 'fields' or 'astar', the navigator made by makeNavigator. 'fields' looks up
+        the moves in the distance fields of the layout (see FieldNavigator), 'astar' plans every
+        move with A* (the MATRX Navigator).
         Implementors of BW4TBrain are NOT ALLOWED TO CHANGE THE VALUES OF NOT ALLOWED PARAMS.
         This is to ensure that agents run at the required speed.      
         Missing values get the value from DEFAULT_SETTINGS.
         '''
         self.__settings = self.DEFAULT_SETTINGS.copy()
         self.__settings.update(settings)
-        super().__init__()
+        self.__layout:BW4TLayout|None = None
+        super().__init__(message_history=self.__settings['message_history'],
+                         dedup_window=self.__settings['dedup_window'],
+                         rate_limits=self.__settings['message_rate_limits'],
+                         profile=self.__settings['profile'])
+
+    def _setLayout(self, layout:BW4TLayout):
+        '''
+        Called by BW4TWorld, before the agent is initialized, to give the static layout of the world.
+        '''
+        self.__layout = layout
+
+    def getLayout(self) -> BW4TLayout|None:
+        '''
+        @return the static layout of the world (walls, doors, drop tiles), or None
+        if this agent was not added by BW4TWorld.
+        '''
+        return self.__layout
+
+    def getSenseRange(self, obj_type:type) -> float:
+        '''
+        @param obj_type the class of the objects, eg CollectableBlock
+        @return the range within which this agent perceives objects of the type, see the
+        SenseCapability that BW4TWorld gives the agent. Call it after the agent is initialized.
+        '''
+        capabilities = self.sense_capability.get_capabilities()
+        return capabilities.get(obj_type, capabilities.get('*', np.inf))
+
+    def makeStateTracker(self) -> StateTracker|LayoutTracker:
+        '''
+        @return a new state tracker for this agent, for the navigator. Call it after the agent is
+        initialized. A LayoutTracker if the world has a layout, otherwise a MATRX StateTracker.
+        '''
+        if self.__layout is not None:
+            return LayoutTracker(agent_id=self.agent_id, layout=self.__layout)
+        return StateTracker(agent_id=self.agent_id)
+
+    def makeNavigator(self) -> Navigator|FieldNavigator:
+        '''
+        @return a new navigator for this agent, use it with the tracker of makeStateTracker. Call it
+        after the agent is initialized. A FieldNavigator if the 'navigation' setting is 'fields', the
+        world has a layout and the agent can make all its moves, otherwise a MATRX A* Navigator.
+        '''
+        navigation = self.__settings['navigation']
+        if navigation not in ('fields', 'astar'):
+            raise ValueError("Unknown navigation ", navigation)
+        if navigation == 'fields' and self.__layout is not None and \
+                set(self.__layout.getKeyTileTable().getMoveActions()).issubset(self.action_set):
+            return FieldNavigator(agent_id=self.agent_id, action_set=self.action_set, layout=self.__layout)
+        return Navigator(agent_id=self.agent_id, action_set=self.action_set, algorithm=Navigator.A_STAR_ALGORITHM)
     
     @final
     def initialize(self):
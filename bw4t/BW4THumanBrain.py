@@ -10,6 +10,7 @@ from matrx.agents import HumanAgentBrain
 import numpy as np
 
 from matrx.messages import Message
+from bw4t.BW4TMessages import BW4TMessage
 
 
 class HumanBrain(HumanAgentBrain):
@@ -330,6 +331,25 @@ class HumanBrain(HumanAgentBrain):
         """
         return state
 
+    def _set_messages(self, messages=None):
+        """ Sets the messages intended for this agent, as the AgentBrain
+        does. The content of a BW4TMessage is in its wire format, the human
+        gets its text instead.
+        Parameters
+        ----------
+        messages : list
+            The messages sent to this agent
+        """
+        for mssg in messages:
+            if not isinstance(mssg, Message):
+                raise Exception(f"A message to {self.agent_id} is not, nor inherits from, the class "
+                                f"{Message.__name__}. This is required for agents to be able to send and "
+                                f"receive them.")
+            if isinstance(mssg, BW4TMessage):
+                self.received_messages.append(str(mssg.unpack()))
+            else:
+                self.received_messages.append(mssg.content)
+
     def filter_user_input(self, user_input):
         """ From the received userinput, only keep those which are actually
         connected to a specific agent action.
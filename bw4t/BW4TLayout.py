@@ -0,0 +1,515 @@
+import warnings
+import numpy as np # type: ignore
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+from matrx import WorldBuilder # type: ignore
+from matrx.actions.move_actions import MoveEast, MoveNorth, MoveNorthEast, MoveNorthWest, MoveSouth, \
+    MoveSouthEast, MoveSouthWest, MoveWest # type: ignore
+from matrx.agents.agent_utils.navigator import AStarPlanner, get_move_actions # type: ignore
+from matrx.agents.agent_utils.state import State # type: ignore
+from matrx.objects import Door, Wall # type: ignore
+from bw4t.BW4TBlocks import GhostBlock
+
+
+class BW4TLayout:
+    '''
+    The static layout of a BW4T world, for navigation: which tiles
+    are blocked by walls, where the doors are and where the drop tiles
+    are. This does not change while the world runs, so BW4TWorld computes
+    it once and gives it to all agents (see BW4TBrain.getLayout), instead
+    of each agent reconstructing it from its State.
+    '''
+    def __init__(self, world_size:Tuple[int,int], walls:np.ndarray, doors:Dict[str, Tuple[int,int]],
+                 drop_tiles:Dict[int, List[Tuple[int,int]]], spawns:List[Tuple[int,int]]|None=None):
+        '''
+        @param world_size (width, height) of the world
+        @param walls bool array of shape world_size, True where there is a wall
+        @param doors dict with as key the door id and as value its location
+        @param drop_tiles dict with as key the drop zone nr and as value the locations of its
+            drop tiles, the first being the bottom one (where the first block must be dropped)
+        @param spawns the start locations of the agents, None if there are none
+        '''
+        self._world_size = tuple(world_size)
+        self._walls = walls
+        self._doors = doors
+        self._drop_tiles = drop_tiles
+        self._spawns = [tuple(loc) for loc in spawns or []]
+
+        # Doors are blocked when closed, the walls always. Same layout as StateTracker.get_traversability_map(inverted=True)
+        self._occupancy = walls.astype(int)
+        door_locs = np.array(list(doors.values()), dtype=int).reshape(-1, 2)
+        self._occupancy[door_locs[:, 0], door_locs[:, 1]] = 1
+
+        key_tiles = list(self.getDoorFronts().values()) + \
+            [loc for tiles in drop_tiles.values() for loc in tiles] + self._spawns
+        self._key_tile_table = KeyTileTable(walls, key_tiles)
+        self._path_cache = PathCache(self)
+
+    @staticmethod
+    def fromBuilder(builder:WorldBuilder, world_size:Tuple[int,int], spawns:List[Tuple[int,int]]|None=None) -> 'BW4TLayout':
+        '''
+        Computes the layout from the objects added to the builder, so that it is
+        known before the world (and the agents) are created.
+        @param builder the builder with all rooms and drop zones added
+        @param world_size (width, height) of the world
+        @param spawns the start locations of the agents, None if there are none
+        '''
+        walls = np.zeros(world_size, dtype=bool)
+        doors = {}
+        drop_tiles:Dict[int, List[Tuple[int,int]]] = {}
+        for settings in builder.object_settings:
+            loc = tuple(settings['mandatory_properties']['location'])
+            if settings['callable_class'] == Wall:
+                walls[loc] = True
+            elif settings['callable_class'] == Door:
+                # Same id as the world will give the door, doors have unique names
+                doors[settings['mandatory_properties']['name'].replace(" ", "_")] = loc
+            elif settings['callable_class'] == GhostBlock:
+                drop_tiles.setdefault(settings['custom_properties']['drop_zone_nr'], []).append(loc)
+        for tiles in drop_tiles.values():
+            tiles.sort(key=lambda loc: -loc[1])
+        return BW4TLayout(world_size, walls, doors, drop_tiles, spawns)
+
+    def getWorldSize(self) -> Tuple[int,int]:
+        '''
+        @return (width,height) (number of tiles)
+        '''
+        return self._world_size
+
+    def getOccupancy(self) -> np.ndarray:
+        '''
+        @return int array of shape world size, 1 for tiles with a wall or (closed) door and 0 for
+        the other tiles. Do not change it, use a copy.
+        '''
+        return self._occupancy
+
+    def getDoors(self) -> Dict[str, Tuple[int,int]]:
+        '''
+        @return dict with as key the door id and as value the location of the door
+        '''
+        return self._doors
+
+    def getDoorFronts(self) -> Dict[str, Tuple[int,int]]:
+        '''
+        @return dict with as key the door id and as value the location in front of (south of) the door
+        '''
+        return {door_id: (x, y + 1) for door_id, (x, y) in self._doors.items()}
+
+    def getDropTiles(self) -> Dict[int, List[Tuple[int,int]]]:
+        '''
+        @return dict with as key the drop zone nr and as value the locations of its drop tiles,
+        the first being the bottom one (where the first block must be dropped)
+        '''
+        return self._drop_tiles
+
+    def getSpawns(self) -> List[Tuple[int,int]]:
+        '''
+        @return the start locations of the agents, in the order of the agents
+        '''
+        return self._spawns
+
+    def getKeyTileTable(self) -> 'KeyTileTable':
+        '''
+        @return the distances and next hops between the key tiles of this world: the
+        door fronts, the drop tiles and the spawns. All agents share the table.
+        '''
+        return self._key_tile_table
+
+    def getPathCache(self) -> 'PathCache':
+        '''
+        @return the cache of the paths planned in this world. All agents share the cache.
+        '''
+        return self._path_cache
+
+
+# The moves of the agents, straight and diagonal
+_MOVES:Dict[str, Tuple[int,int]] = {name: move for name, move in get_move_actions([action.__name__ for action in (
+    MoveNorth, MoveNorthEast, MoveEast, MoveSouthEast, MoveSouth, MoveSouthWest, MoveWest, MoveNorthWest)]).items()
+    if name is not None}
+
+
+class KeyTileTable:
+    '''
+    The distance and next hop from any tile to the key tiles of a world (door
+    fronts, drop tiles, spawns), over the static layout. Per key tile a
+    breadth first search over the walls gives its distance field, once, when
+    the key tile is first asked for. The search is vectorized: each step
+    grows the whole wave front at once with numpy. After that the distance
+    (in moves, straight or diagonal, like the Navigator) from any tile is a
+    lookup, and the next hop is the neighbour one move closer.
+
+    Doors count as passable: agents open the doors they go through, and as
+    each room has one door the way between two hallway tiles never goes
+    through a room. Agents are not in the table either, so a next hop
+    can be blocked, see getNextHop.
+    '''
+    def __init__(self, walls:np.ndarray, key_tiles:List[Tuple[int,int]]):
+        '''
+        @param walls bool array of shape world size, True where there is a wall
+        @param key_tiles the locations of the key tiles
+        '''
+        self._free:np.ndarray = ~walls.astype(bool)
+        self._key_tiles = set(tuple(loc) for loc in key_tiles)
+        # Per key tile the int array with the distance of each tile, -1 for tiles from which it can not be reached
+        self._fields:Dict[Tuple[int,int], np.ndarray] = {}
+
+    def isKeyTile(self, loc) -> bool:
+        '''
+        @return True if the location is one of the key tiles
+        '''
+        return loc is not None and tuple(loc) in self._key_tiles
+
+    def getDistance(self, source, key_tile) -> int|None:
+        '''
+        @param source any location
+        @param key_tile the location of a key tile
+        @return the number of moves from the source to the key tile, None if it can not be reached
+        '''
+        distance = int(self._getField(key_tile)[source[0], source[1]])
+        return None if distance < 0 else distance
+
+    def getNextHop(self, source, key_tile, is_blocked:Callable[[tuple], bool]|None=None) -> Tuple[int,int]|None:
+        '''
+        @param source any location
+        @param key_tile the location of a key tile
+        @param is_blocked function that tells if a location is blocked now (eg by an agent or a closed door)
+        @return the neighbour of the source on a shortest way to the key tile that is not blocked,
+            the one closest to the key tile as the crow flies. None if the source is the key tile,
+            if the key tile can not be reached or if all the neighbours on a shortest way are blocked.
+        '''
+        field = self._getField(key_tile)
+        distance = field[source[0], source[1]]
+        if distance <= 0:
+            return None
+        hops = []
+        for dx, dy in _MOVES.values():
+            x, y = source[0] + dx, source[1] + dy
+            if 0 <= x < field.shape[0] and 0 <= y < field.shape[1] and field[x, y] == distance - 1 \
+                    and (is_blocked is None or not is_blocked((x, y))):
+                hops.append((x, y))
+        if len(hops) == 0:
+            return None
+        # Keep close to the straight line, like the paths of the Navigator
+        return min(hops, key=lambda hop: (hop[0] - key_tile[0]) ** 2 + (hop[1] - key_tile[1]) ** 2)
+
+    def getMoveActions(self) -> List[str]:
+        '''
+        @return the names of the move actions that the next hops take. An agent must have all of them.
+        '''
+        return list(_MOVES)
+
+    def getMoveAction(self, source, key_tile, is_blocked:Callable[[tuple], bool]|None=None) -> str|None:
+        '''
+        Same as getNextHop, but returns the name of the move action to the next hop
+        '''
+        return _moveAction(source, self.getNextHop(source, key_tile, is_blocked))
+
+    def _getField(self, key_tile) -> np.ndarray:
+        key_tile = tuple(key_tile)
+        if key_tile not in self._key_tiles:
+            raise ValueError(f"{key_tile} is not a key tile")
+        field = self._fields.get(key_tile)
+        if field is None:
+            field = distanceField(self._free, key_tile)
+            self._fields[key_tile] = field
+        return field
+
+
+def distanceField(free:np.ndarray, target:Tuple[int,int]) -> np.ndarray:
+    '''
+    Breadth first search from the target over the free tiles, with the straight and diagonal
+    moves. Each step adds the free neighbours of the whole wave front at once.
+    @param free bool array of shape world size, True for the tiles that can be traversed
+    @param target the location to compute the distances to
+    @return int array of shape world size with the number of moves from each tile to the
+        target, -1 for the tiles from which the target can not be reached
+    '''
+    field = np.full(free.shape, -1, dtype=np.int32)
+    field[target] = 0
+    reached = np.zeros(free.shape, dtype=bool)
+    reached[target] = True
+    front = reached.copy()
+    distance = 0
+    while front.any():
+        distance += 1
+        padded = np.pad(front, 1)
+        grown = np.zeros(free.shape, dtype=bool)
+        for dx, dy in _MOVES.values():
+            grown |= padded[1 + dx:1 + dx + free.shape[0], 1 + dy:1 + dy + free.shape[1]]
+        front = grown & free & ~reached
+        field[front] = distance
+        reached |= front
+    return field
+
+
+# The max number of (tile, seen tiles) states that sweepTour searches for the shortest tour. Enough for the
+# inside of 8x6 rooms at sense range 1, and a search that reaches it takes about a quarter of a second.
+_MAX_SWEEP_STATES = 100000
+
+
+def sweepTour(tiles:List[Tuple[int,int]], start:Tuple[int,int], sense_range:float) -> List[Tuple[int,int]]:
+    '''
+    Plans a tour over the tiles (eg the inside of a room) that sees each of them, for an agent
+    that sees the tiles within the (euclidean) sense range of where it is, like the blocks that
+    it perceives. Rooms of the same shape, entered at the same place, get the same tour, which
+    is planned once.
+    @param tiles the locations to see, the tour only goes over these tiles
+    @param start the location of the agent, where the tour starts (not part of the tour)
+    @param sense_range the range within which the agent sees the tiles
+    @return the waypoints of the tour: the shortest tour that sees all tiles, each waypoint one move
+        (straight or diagonal) from the previous one, and of those the one that ends closest to
+        the start. If that takes too long to find (more than _MAX_SWEEP_STATES states), the nearest
+        tile that sees unseen tiles (the one that sees most of them), and so on until all are seen.
+        That tour is not the shortest and its waypoints can be several moves apart, a warning says
+        so once per room shape.
+    '''
+    offsets = frozenset((x - start[0], y - start[1]) for x, y in tiles)
+    return [(start[0] + dx, start[1] + dy) for dx, dy in _sweepOffsets(offsets, sense_range)]
+
+
+@lru_cache(maxsize=64)
+def _sweepOffsets(offsets:frozenset, sense_range:float) -> Tuple[Tuple[int,int], ...]:
+    '''
+    sweepTour relative to the start, which is (0,0)
+    '''
+    positions = [(0, 0)] + sorted(offsets - {(0, 0)})
+    targets = sorted(offsets)
+    # Per position the bit mask of the targets within the sense range
+    seen = [sum(1 << nr for nr, (tx, ty) in enumerate(targets) if (tx - x) ** 2 + (ty - y) ** 2 <= sense_range ** 2)
+            for x, y in positions]
+    neighbours = [[positions.index((x + dx, y + dy)) for dx, dy in _MOVES.values() if (x + dx, y + dy) in offsets]
+                  for x, y in positions]
+    everything = (1 << len(targets)) - 1
+
+    # Breadth first over (position, seen targets), ending at the first layer that has seen everything
+    parents:Dict[tuple, tuple|None] = {(0, seen[0]): None}
+    layer = [(0, seen[0])]
+    while layer and len(parents) <= _MAX_SWEEP_STATES:
+        done = [state for state in layer if state[1] == everything]
+        if len(done) > 0:
+            state = min(done, key=lambda state: (max(abs(positions[state[0]][0]), abs(positions[state[0]][1])),
+                                                 positions[state[0]][0] ** 2 + positions[state[0]][1] ** 2))
+            tour = []
+            while parents[state] is not None:
+                tour.append(positions[state[0]])
+                state = parents[state]
+            return tuple(reversed(tour))
+        next_layer = []
+        for state in layer:
+            for neighbour in neighbours[state[0]]:
+                next_state = (neighbour, state[1] | seen[neighbour])
+                if next_state not in parents:
+                    parents[next_state] = state
+                    next_layer.append(next_state)
+        layer = next_layer
+
+    # Too many states: go greedily to the nearest position that sees unseen targets, of those the one that sees most
+    warnings.warn(f"No shortest sweep of {len(targets)} tiles with sense range {sense_range} within "
+                  f"{_MAX_SWEEP_STATES} states, using a greedy sweep")
+    tour = []
+    position, covered = (0, 0), seen[0]
+    while covered != everything:
+        nr = min((nr for nr in range(len(positions)) if seen[nr] & ~covered),
+                 key=lambda nr: (max(abs(positions[nr][0] - position[0]), abs(positions[nr][1] - position[1])),
+                                 -bin(seen[nr] & ~covered).count('1')))
+        position, covered = positions[nr], covered | seen[nr]
+        tour.append(position)
+    return tuple(tour)
+
+
+class PathCache:
+    '''
+    The paths that the A* planner of the Navigator finds, over the static
+    layout with a given set of open doors (the door signature), so that a
+    route that is planned again is a lookup. Every tile on a path gets the
+    next hop on it: a path from the start also serves the later steps, and
+    the routes of other agents that join it.
+
+    The paths ignore agents, which move every tick. An agent whose next hop
+    is taken by another agent has to plan around it itself. The paths of
+    a door signature are dropped when no tracker uses that signature anymore:
+    LayoutTrackers tell the cache when the doors they know change, see
+    useSignature.
+    '''
+    def __init__(self, layout:BW4TLayout):
+        '''
+        @param layout the layout of the world
+        '''
+        self._layout = layout
+        self._planner = AStarPlanner(action_set=list(_MOVES), metric=AStarPlanner.EUCLIDEAN_METRIC)
+        # Per door signature the occupancy and the next hops per (tile, goal), None if the goal can not be reached
+        self._occupancies:Dict[frozenset, np.ndarray] = {}
+        self._hops:Dict[frozenset, Dict[tuple, Tuple[int,int]|None]] = {}
+        self._users:Dict[frozenset, int] = {}
+        self._nr_plans = 0
+        self._nr_hits = 0
+
+    def useSignature(self, signature:frozenset, previous:frozenset|None=None):
+        '''
+        Tells that a tracker now knows the given open doors. The paths of the previous
+        signature are dropped if no other tracker uses it.
+        @param signature the ids of the doors that the tracker knows to be open
+        @param previous the signature that the tracker used before, None for a new tracker
+        '''
+        self._users[signature] = self._users.get(signature, 0) + 1
+        if previous is None:
+            return
+        self._users[previous] -= 1
+        if self._users[previous] == 0:
+            del self._users[previous]
+            self._occupancies.pop(previous, None)
+            self._hops.pop(previous, None)
+
+    def getNextHop(self, start, goal, signature:frozenset,
+                   is_blocked:Callable[[tuple], bool]|None=None) -> Tuple[int,int]|None:
+        '''
+        @param start the location of the agent
+        @param goal the location to go to
+        @param signature the ids of the open doors, the other doors are closed
+        @param is_blocked function that tells if a location is blocked now (eg by an agent)
+        @return the next hop on the path from the start to the goal, planned once per signature.
+            None if the start is the goal, if the goal can not be reached or if the next hop is blocked.
+        '''
+        start, goal = tuple(start), tuple(goal)
+        if start == goal:
+            return None
+        hops = self._hops.setdefault(signature, {})
+        if (start, goal) in hops:
+            self._nr_hits += 1
+        else:
+            self._plan(start, goal, signature, hops)
+        hop = hops[(start, goal)]
+        if hop is None or (is_blocked is not None and is_blocked(hop)):
+            return None
+        return hop
+
+    def getMoveAction(self, start, goal, signature:frozenset, is_blocked:Callable[[tuple], bool]|None=None) -> str|None:
+        '''
+        Same as getNextHop, but returns the name of the move action to the next hop
+        '''
+        return _moveAction(start, self.getNextHop(start, goal, signature, is_blocked))
+
+    def getNrPlans(self) -> int:
+        '''
+        @return the number of paths planned so far
+        '''
+        return self._nr_plans
+
+    def getNrHits(self) -> int:
+        '''
+        @return the number of next hops so far that were found on a path planned before
+        '''
+        return self._nr_hits
+
+    def _plan(self, start:tuple, goal:tuple, signature:frozenset, hops:dict):
+        occupancy = self._occupancies.get(signature)
+        if occupancy is None:
+            occupancy = self._layout.getOccupancy().copy()
+            doors = self._layout.getDoors()
+            for door_id in signature:
+                if door_id in doors:
+                    occupancy[doors[door_id]] = 0
+            self._occupancies[signature] = occupancy
+
+        self._nr_plans += 1
+        # The planner gives the path without the start, or only the start if there is none
+        path = self._planner.plan(start=start, goal=goal, occupation_map=occupancy)
+        if len(path) == 0 or path[-1] != goal:
+            hops[(start, goal)] = None
+            return
+        for tile, hop in zip([start] + path, path):
+            hops[(tuple(tile), goal)] = tuple(hop)
+
+
+def _moveAction(source, hop) -> str|None:
+    '''
+    @return the name of the move action from the source to the next hop, None if the hop is None
+    '''
+    if hop is None:
+        return None
+    delta = (hop[0] - source[0], hop[1] - source[1])
+    return next(action for action, move in _MOVES.items() if move == delta)
+
+
+class LayoutTracker:
+    '''
+    Can be used instead of a StateTracker for the Navigator. Instead of
+    memorizing the state and building the traversability map from all
+    objects every step, it starts from the static BW4TLayout and only
+    adds the open doors and the agents in the last state.
+    '''
+    def __init__(self, agent_id:str, layout:BW4TLayout):
+        '''
+        @param agent_id the id of the agent using this tracker
+        @param layout the layout of the world
+        '''
+        self.agent_id = agent_id
+        self._layout = layout
+        self._location:tuple = None
+        self._open_doors:set = set()
+        self._signature:frozenset = frozenset()
+        # The locations of the open doors (as of the signature) and of the other agents, for isBlocked
+        self._open_door_locs:set = set()
+        self._agent_locs:set = set()
+        layout.getPathCache().useSignature(self._signature)
+
+    def update(self, state:State):
+        '''
+        Takes the agent location, the doors and the other agents from the state.
+        Doors that are not in the state keep their last known status.
+        '''
+        self._location = state[self.agent_id]['location']
+        for door in state.values():
+            if 'class_inheritance' not in door or 'Door' not in door['class_inheritance']:
+                continue
+            if door['is_open']:
+                self._open_doors.add(door['obj_id'])
+            else:
+                self._open_doors.discard(door['obj_id'])
+        if self._open_doors != self._signature:
+            previous, self._signature = self._signature, frozenset(self._open_doors)
+            self._layout.getPathCache().useSignature(self._signature, previous)
+            doors = self._layout.getDoors()
+            self._open_door_locs = {doors[door_id] for door_id in self._signature if door_id in doors}
+        self._agent_locs = {tuple(obj['location']) for obj_id, obj in state.items()
+                            if obj_id != self.agent_id and 'class_inheritance' in obj
+                            and 'AgentBody' in obj['class_inheritance']}
+
+    def getSignature(self) -> frozenset:
+        '''
+        @return the ids of the doors that are open, as far as known. Do not change it.
+        '''
+        return self._signature
+
+    def get_memorized_state(self) -> dict:
+        '''
+        @return dict with only the location of this agent, which is all the Navigator uses
+        '''
+        return {self.agent_id: {'location': self._location}}
+
+    def get_traversability_map(self, inverted=False, state=None):
+        '''
+        @param inverted must be True, the Navigator always asks for the inverted map
+        @param state not supported, must be None
+        @return (map, None). The map is an int array of shape world size, 1 for tiles that can not
+            be traversed (walls, closed doors and other agents) and 0 for the others.
+            Unlike StateTracker, there is no object grid.
+        '''
+        assert inverted and state is None
+        occupancy = self._layout.getOccupancy().copy()
+        for loc in self._open_door_locs:
+            occupancy[loc] = 0
+        for loc in self._agent_locs:
+            occupancy[loc] = 1
+        return occupancy, None
+
+    def isBlocked(self, loc) -> bool:
+        '''
+        @param loc a location in the world
+        @return True if the location can not be traversed now: it has a wall, a closed
+            door or another agent (in the last state). Same as the traversability map.
+        '''
+        loc = tuple(loc)
+        if self._layout.getOccupancy()[loc] and loc not in self._open_door_locs:
+            return True
+        return loc in self._agent_locs
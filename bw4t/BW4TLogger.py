@@ -6,11 +6,14 @@ from matrx.grid_world import GridWorld
 class BW4TLogger(GridWorldLogger):
     '''
     Logs the things we need for bw4t:
-    agent actions, world-completed info, messages info
+    agent actions, world-completed info, progress info, messages info
     '''
     def __init__(self, save_path="", file_name_prefix="", file_extension=".csv", delimeter=";"):
         super().__init__(save_path=save_path, file_name=file_name_prefix, file_extension=file_extension,
                          delimiter=delimeter, log_strategy=1)
+        # Per agent the number of ticks in which it sent messages, counted up to the tick in _mssg_tick
+        self._mssg_counts:dict = {}
+        self._mssg_tick = 0
 
     def log(self, grid_world:GridWorld, agent_data):
         # So agent_data is a dictionary of shape: {<agent id>: <result from agent's get_log_data>, ...}
@@ -18,20 +21,34 @@ class BW4TLogger(GridWorldLogger):
         # nice columns
         data = {}
         # simulation goal must be our CollectionGoal
-        data['done'] = grid_world.simulation_goal.isBlocksPlaced(grid_world)
+        goal = grid_world.simulation_goal
+        data['done'] = goal.isBlocksPlaced(grid_world)
+        # partial progress, so runs can be compared without completing them
+        data['progress'] = goal.getProgress()
+        data['blocks_placed'] = goal.getNrBlocksPlaced()
         for agent_id, agent_body in grid_world.registered_agents.items():
             data[agent_id+'_acts'] = agent_body.current_action
 
+        # The number of ticks before the previous tick in which the agent sent messages. Only the
+        # ticks since the last log are counted, instead of all ticks every time.
         gwmm = grid_world.message_manager
         t = grid_world.current_nr_ticks-1
-        for agent_id, agent_body in grid_world.registered_agents.items():
-            data[agent_id+'_mssg']=0
-            for i in range(0,t):
-                if i in gwmm.preprocessed_messages.keys():
-                    for mssg in gwmm.preprocessed_messages[i]:
-                        if mssg.from_id==agent_id:
-                            data[agent_id+'_mssg']+=1
-                            break
+        for i in range(self._mssg_tick, t):
+            for agent_id in {mssg.from_id for mssg in gwmm.preprocessed_messages.get(i, [])}:
+                self._mssg_counts[agent_id] = self._mssg_counts.get(agent_id, 0) + 1
+        self._mssg_tick = max(self._mssg_tick, t)
+        for agent_id in grid_world.registered_agents.keys():
+            data[agent_id+'_mssg'] = self._mssg_counts.get(agent_id, 0)
+        # The message and byte counts of the outboxes of the agents (see BW4TAgentBrain._get_log_data)
+        for agent_id in grid_world.registered_agents.keys():
+            agent_log = agent_data.get(agent_id) or {}
+            data[agent_id+'_sent'] = agent_log.get('messages_sent', 0)
+            data[agent_id+'_suppressed'] = agent_log.get('messages_suppressed', 0)
+            data[agent_id+'_bytes'] = agent_log.get('bytes_sent', 0)
+            # The total decision times of profiled agents (see BW4TProfiler)
+            for key, value in agent_log.items():
+                if key.startswith('time_'):
+                    data[agent_id+'_'+key] = value
         return data
 
     # workaround for issue matrx267
@@ -0,0 +1,290 @@
+import ast
+import json
+import re
+import struct
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Final, Tuple
+from matrx.messages import Message # type: ignore
+
+# The colours that take a single byte in the wire format: the block colours and black (see ColorblindAgent).
+# Other colours '#rrggbb' take 4 bytes, any other colour text is sent as text.
+COLOUR_PALETTE: Final = ('#0008ff', '#ff1500', '#0dff00', '#000000')
+_RGB: Final = 0xFF
+_COLOUR_TEXT: Final = 0xFE
+# The room number of a room name that is not room_<nr>, the name is sent as text
+_ROOM_TEXT: Final = 0xFFFF
+# The shape byte of a shape that does not fit in a single byte, the shape follows in 4 bytes
+_SHAPE_INT: Final = 0xFF
+# The max number of decoded contents that fromBytes keeps. A run has few distinct contents (a message per
+# block and location, and per room), and all receivers of a message decode the same bytes, so this covers
+# the default worlds. Each entry is a key of about 10 bytes and a small frozen content, so the cache stays
+# well below a MB, also in long runs with many distinct messages.
+_FROM_BYTES_CACHE_SIZE: Final = 4096
+
+
+class BW4TMessage(Message):
+    '''
+    A Message with one of the typed contents below. When the message is
+    sent (see BW4TOutbox.flush) its content is packed into the compact wire
+    format of toBytes, the receiving BW4TAgentBrain unpacks it again. So
+    the messages kept by the MATRX message manager hold a few bytes each.
+    The content is rendered as its text when the message is sent to the
+    api (the visualizer), as the typed contents can not be converted to json.
+    '''
+    def pack(self):
+        '''
+        Replaces the content by its wire format, unless it is packed already or not a typed content
+        '''
+        if type(self.content) in _TYPE_CODES:
+            self.content = self.content.toBytes()
+
+    def unpack(self):
+        '''
+        @return the content, the typed content if it is packed
+        '''
+        return fromBytes(self.content) if isinstance(self.content, bytes) else self.content
+
+    def to_json(self):
+        return json.dumps({**self.__dict__, 'content': str(self.unpack())}, sort_keys=True, indent=4)
+
+
+@lru_cache(maxsize=_FROM_BYTES_CACHE_SIZE)
+def fromBytes(data:bytes):
+    '''
+    @param data the wire format of a typed content, see toBytes
+    @return the typed content. All receivers of a message get the same (frozen) content.
+    '''
+    return _WIRE_TYPES[data[0]]._fromBytes(data, 1)
+
+
+def _packText(text:str) -> bytes:
+    data = text.encode('utf-8')
+    return struct.pack('<H', len(data)) + data
+
+
+def _unpackText(data:bytes, offset:int) -> Tuple[str, int]:
+    '''
+    @return the text at offset, and the offset after it
+    '''
+    length, = struct.unpack_from('<H', data, offset)
+    return data[offset + 2:offset + 2 + length].decode('utf-8'), offset + 2 + length
+
+
+def _packShape(shape:int) -> bytes:
+    if 0 <= shape < _SHAPE_INT:
+        return bytes([shape])
+    return bytes([_SHAPE_INT]) + struct.pack('<i', shape)
+
+
+def _unpackShape(data:bytes, offset:int) -> Tuple[int, int]:
+    '''
+    @return the shape at offset, and the offset after it
+    '''
+    if data[offset] == _SHAPE_INT:
+        return struct.unpack_from('<i', data, offset + 1)[0], offset + 5
+    return data[offset], offset + 1
+
+
+def _packColour(colour:str) -> bytes:
+    if colour in COLOUR_PALETTE:
+        return bytes([COLOUR_PALETTE.index(colour)])
+    if len(colour) == 7 and colour[0] == '#' and all(c in '0123456789abcdef' for c in colour[1:]):
+        return bytes([_RGB]) + bytes.fromhex(colour[1:])
+    return bytes([_COLOUR_TEXT]) + _packText(colour)
+
+
+def _unpackColour(data:bytes, offset:int) -> Tuple[str, int]:
+    '''
+    @return the colour at offset, and the offset after it
+    '''
+    if data[offset] == _RGB:
+        return '#' + data[offset + 1:offset + 4].hex(), offset + 4
+    if data[offset] == _COLOUR_TEXT:
+        return _unpackText(data, offset + 1)
+    return COLOUR_PALETTE[data[offset]], offset + 1
+
+
+@dataclass(frozen=True, slots=True)
+class BlockMessage:
+    '''
+    Base of the messages about a (goal) block: its colour,
+    its shape and the location of the block.
+    '''
+    colour: str
+    shape: int
+    location: Tuple[int, int]
+
+    @classmethod
+    def fromBlock(cls, block:dict, location:Tuple[int,int]|None=None):
+        '''
+        @param block the block as it is in the state
+        @param location the location for the message, default the location of the block
+        '''
+        location = block['location'] if location is None else location
+        return cls(block['visualization']['colour'], block['visualization']['shape'], tuple(location))
+
+    def asBlock(self) -> dict:
+        '''
+        @return the block in this message as a dict with the location and the
+            visualization (colour and shape), like the blocks in the state.
+        '''
+        return {'location': self.location, 'visualization': {'colour': self.colour, 'shape': self.shape}}
+
+    def toBytes(self) -> bytes:
+        '''
+        @return the wire format: the type, the colour (1 byte for the colours of
+            COLOUR_PALETTE), the shape (1 byte for shapes up to 254) and the location
+            (2 bytes per coordinate)
+        '''
+        return bytes([_TYPE_CODES[type(self)]]) + _packColour(self.colour) + _packShape(self.shape) + \
+            struct.pack('<HH', self.location[0], self.location[1])
+
+    @classmethod
+    def _fromBytes(cls, data:bytes, offset:int):
+        colour, offset = _unpackColour(data, offset)
+        shape, offset = _unpackShape(data, offset)
+        x, y = struct.unpack_from('<HH', data, offset)
+        return cls(colour, shape, (x, y))
+
+    def _blockText(self) -> str:
+        return str({'colour': self.colour, 'shape': self.shape})
+
+
+@dataclass(frozen=True, slots=True)
+class Found(BlockMessage):
+    '''
+    The sender found a goal block.
+    '''
+    def __str__(self):
+        return 'Found goal block ' + self._blockText() + ' at location ' + str(self.location)
+
+
+@dataclass(frozen=True, slots=True)
+class PickingUp(BlockMessage):
+    '''
+    The sender picks up a goal block.
+    '''
+    def __str__(self):
+        return 'Picking up goal block ' + self._blockText() + ' at location ' + str(self.location)
+
+
+@dataclass(frozen=True, slots=True)
+class Dropped(BlockMessage):
+    '''
+    The sender dropped a goal block, the location is where it was dropped.
+    '''
+    def __str__(self):
+        return 'Dropped goal block ' + self._blockText() + ' at drop location ' + str(self.location)
+
+
+@dataclass(frozen=True, slots=True)
+class RoomMessage:
+    '''
+    Base of the messages about a room.
+    '''
+    room_name: str
+
+    def toBytes(self) -> bytes:
+        '''
+        @return the wire format: the type and the room number (2 bytes), other
+            room names than room_<nr> are sent as text
+        '''
+        prefix, _, nr = self.room_name.rpartition('_')
+        if prefix == 'room' and nr.isascii() and nr.isdigit() and str(int(nr)) == nr and int(nr) < _ROOM_TEXT:
+            return bytes([_TYPE_CODES[type(self)]]) + struct.pack('<H', int(nr))
+        return bytes([_TYPE_CODES[type(self)]]) + struct.pack('<H', _ROOM_TEXT) + _packText(self.room_name)
+
+    @classmethod
+    def _fromBytes(cls, data:bytes, offset:int):
+        nr, = struct.unpack_from('<H', data, offset)
+        if nr == _ROOM_TEXT:
+            return cls(_unpackText(data, offset + 2)[0])
+        return cls('room_' + str(nr))
+
+
+@dataclass(frozen=True, slots=True)
+class MovingTo(RoomMessage):
+    '''
+    The sender moves to the door of the room.
+    '''
+    def __str__(self):
+        return 'Moving to ' + self.room_name
+
+
+@dataclass(frozen=True, slots=True)
+class Opening(RoomMessage):
+    '''
+    The sender opens the door of the room.
+    '''
+    def __str__(self):
+        return 'Opening door of ' + self.room_name
+
+
+@dataclass(frozen=True, slots=True)
+class Searching(RoomMessage):
+    '''
+    The sender searches through the room.
+    '''
+    def __str__(self):
+        return 'Searching through ' + self.room_name
+
+
+@dataclass(frozen=True, slots=True)
+class Distrust:
+    '''
+    The sender does not trust the agent (anymore).
+    '''
+    agent_name: str
+
+    def toBytes(self) -> bytes:
+        '''
+        @return the wire format: the type and the agent name as text
+        '''
+        return bytes([_TYPE_CODES[type(self)]]) + _packText(self.agent_name)
+
+    @classmethod
+    def _fromBytes(cls, data:bytes, offset:int):
+        return cls(_unpackText(data, offset)[0])
+
+    def __str__(self):
+        return "I don't trust " + self.agent_name
+
+
+# The typed contents by their type byte in the wire format. Only add types at the end.
+_WIRE_TYPES: Final = (Found, PickingUp, Dropped, MovingTo, Opening, Searching, Distrust)
+_TYPE_CODES: Final = {cls: code for code, cls in enumerate(_WIRE_TYPES)}
+
+# The texts of the typed contents (their __str__), and 'Moving to door of <room>' that BaseLineAgent used to send.
+# The block of a block message may be its whole visualization dict, as agents sent before the typed messages.
+_BLOCK_TEXT: Final = re.compile(r"(Found|Picking up|Dropped) goal block (\{.*\}) at (?:drop )?location \((-?\d+), (-?\d+)\)")
+_BLOCK_TEXT_TYPES: Final = {'Found': Found, 'Picking up': PickingUp, 'Dropped': Dropped}
+_ROOM_TEXT_PATTERN: Final = re.compile(r"(Moving to(?: door of)?|Opening door of|Searching through) (\S+)")
+_ROOM_TEXT_TYPES: Final = {'Moving to': MovingTo, 'Moving to door of': MovingTo, 'Opening door of': Opening,
+                           'Searching through': Searching}
+_DISTRUST_TEXT: Final = "I don't trust "
+
+
+@lru_cache(maxsize=_FROM_BYTES_CACHE_SIZE)
+def fromText(text:str):
+    '''
+    Reads the text message of an agent that does not send typed contents.
+    @param text the content of a message
+    @return the typed content with this text, or the text itself if it is not the text of a typed content
+    '''
+    match = _BLOCK_TEXT.fullmatch(text)
+    if match is not None:
+        try:
+            block = ast.literal_eval(match[2])
+        except (ValueError, TypeError, SyntaxError):
+            return text
+        if not isinstance(block, dict) or not isinstance(block.get('colour'), str) or \
+                not isinstance(block.get('shape'), int):
+            return text
+        return _BLOCK_TEXT_TYPES[match[1]](block['colour'], block['shape'], (int(match[3]), int(match[4])))
+    match = _ROOM_TEXT_PATTERN.fullmatch(text)
+    if match is not None:
+        return _ROOM_TEXT_TYPES[match[1]](match[2])
+    if text.startswith(_DISTRUST_TEXT) and len(text) > len(_DISTRUST_TEXT):
+        return Distrust(text[len(_DISTRUST_TEXT):])
+    return text
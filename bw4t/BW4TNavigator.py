@@ -0,0 +1,126 @@
+from typing import List, Tuple
+from matrx.agents.agent_utils.navigator import Navigator # type: ignore
+from bw4t.BW4TLayout import BW4TLayout, LayoutTracker
+
+
+class FieldNavigator:
+    '''
+    Can be used instead of the MATRX Navigator, it has the same methods.
+    Instead of planning a path with A* every step, it looks up the next
+    move in the distance fields of the layout, which all agents of the
+    world share:
+    * to a key tile (door front, drop tile, spawn) it follows the distance
+      field of that tile, see KeyTileTable.
+    * to another tile it follows the path in the PathCache, which is planned
+      once per door signature.
+    Neither knows where the other agents are. If the next hop is taken by
+    another agent (or by a door that is closed), this navigator asks a
+    MATRX Navigator for a way around it, and keeps doing so until it is at
+    that waypoint. Going back to the field halfway would lead the agent
+    back to the blocked tile.
+
+    The fields need a LayoutTracker. With another state tracker, it
+    plans with the MATRX Navigator.
+    '''
+    def __init__(self, agent_id:str, action_set:List[str], layout:BW4TLayout):
+        '''
+        @param agent_id the id of the agent using this navigator
+        @param action_set the names of the actions of the agent, it must have all the move actions
+            of KeyTileTable.getMoveActions
+        @param layout the layout of the world
+        '''
+        if not set(layout.getKeyTileTable().getMoveActions()).issubset(action_set):
+            raise ValueError(f"The agent {agent_id} can not make all the moves of the distance fields")
+        self._agent_id = agent_id
+        self._key_tiles = layout.getKeyTileTable()
+        self._path_cache = layout.getPathCache()
+        self._navigator = Navigator(agent_id=agent_id, action_set=action_set, algorithm=Navigator.A_STAR_ALGORITHM)
+        self._waypoints:List[Tuple[int,int]] = []
+        self._current = 0
+        # The index of the waypoint to which A* plans the way, as the fields were blocked. None if there is none.
+        self._planned:int|None = None
+        self.is_done = False
+        self.is_circular = False
+
+    def add_waypoint(self, waypoint):
+        '''
+        Adds a waypoint, the (x,y) location of a tile, to the path.
+        '''
+        assert isinstance(waypoint, tuple) or isinstance(waypoint, list)
+        self._waypoints.append(tuple(waypoint))
+
+    def add_waypoints(self, waypoints, is_circular=False):
+        '''
+        Adds the waypoints to the path in order.
+        @param is_circular whether to continuously visit all waypoints (including the ones given before)
+        '''
+        self.is_circular = is_circular
+        for waypoint in waypoints:
+            self.add_waypoint(waypoint)
+
+    def get_all_waypoints(self) -> List[tuple]:
+        '''
+        @return list of (order, location) of all waypoints
+        '''
+        return list(enumerate(self._waypoints))
+
+    def get_upcoming_waypoints(self) -> List[tuple]:
+        '''
+        @return list of (order, location) of the waypoints that were not visited yet
+        '''
+        return list(enumerate(self._waypoints))[self._current:]
+
+    def get_current_waypoint(self) -> Tuple[int,int]:
+        '''
+        @return the location of the waypoint the navigator will try to visit
+        '''
+        return self._waypoints[self._current]
+
+    def get_move_action(self, state_tracker) -> str|None:
+        '''
+        @param state_tracker the state tracker of the agent, updated with the current state
+        @return the name of the move action to the next hop, None if all waypoints are visited
+            or if there is no way to the current waypoint.
+        '''
+        if self.is_done:
+            return None
+        location = tuple(state_tracker.get_memorized_state()[self._agent_id]['location'])
+        while self._current < len(self._waypoints) and self._waypoints[self._current] == location:
+            self._current += 1
+        if self._current >= len(self._waypoints):
+            if not self.is_circular or len(self._waypoints) == 0:
+                self.is_done = True
+                return None
+            self.reset()
+        waypoint = self._waypoints[self._current]
+
+        action = None
+        if self._planned != self._current and isinstance(state_tracker, LayoutTracker):
+            if self._key_tiles.isKeyTile(waypoint):
+                action = self._key_tiles.getMoveAction(location, waypoint, state_tracker.isBlocked)
+            else:
+                action = self._path_cache.getMoveAction(location, waypoint, state_tracker.getSignature(),
+                                                        state_tracker.isBlocked)
+        if action is None:
+            # The way is blocked (by an agent or a closed door), plan a way around it with A*
+            self._planned = self._current
+            self._navigator.reset_full()
+            self._navigator.add_waypoints([waypoint])
+            action = self._navigator.get_move_action(state_tracker)
+        return action
+
+    def reset(self):
+        '''
+        Sets all waypoints to not visited
+        '''
+        self.is_done = False
+        self._current = 0
+        self._planned = None
+
+    def reset_full(self):
+        '''
+        Clears all waypoints
+        '''
+        self._waypoints = []
+        self.reset()
+        self.is_circular = False
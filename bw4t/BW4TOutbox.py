@@ -0,0 +1,132 @@
+from typing import Dict, List
+from matrx.messages import Message # type: ignore
+from bw4t.BW4TMessages import BW4TMessage
+
+
+class BW4TOutbox:
+    '''
+    Collects the messages that an agent sends and hands them to the world
+    once per tick (see flush). On the way it suppresses
+    * duplicates: the same content for the same receivers, in the same tick or
+      within the dedup window after it was sent.
+    * messages over the rate limit of their content type: these wait, and are
+      sent in the order they were added, one each time the limit allows. A
+      message with the same content as a waiting one is merged into it.
+    It counts the messages that were sent and that were suppressed, and
+    the bytes of the contents that were sent. The contents of BW4TMessages
+    are packed into their wire format when they are sent.
+    '''
+    def __init__(self, dedup_window:int|None=None, rate_limits:Dict[str,int]|None=None):
+        '''
+        @param dedup_window the number of ticks in which the same content for the same
+            receivers is not sent again. None to not suppress duplicates over ticks.
+        @param rate_limits dict with as key the class name of a message content (eg 'Searching')
+            and as value the minimal number of ticks between two messages with such content
+            for the same receivers. None for no rate limits.
+        '''
+        self._dedup_window = dedup_window
+        self._rate_limits = {} if rate_limits is None else dict(rate_limits)
+        # The messages to send at the next flush, and the keys of the ones without rate limit
+        self._queue:List[Message] = []
+        self._queued_keys:set = set()
+        # Per (content type, receivers) with a rate limit, the messages that wait for the limit by their content
+        self._pending:Dict[tuple, Dict[object, Message]] = {}
+        # Per (content, receivers) and per (content type, receivers) the tick it was last sent
+        self._last_sent:Dict[tuple, int] = {}
+        self._last_sent_type:Dict[tuple, int] = {}
+        self._nr_sent = 0
+        self._nr_suppressed = 0
+        self._nr_bytes_sent = 0
+
+    def add(self, message:Message, tick:int):
+        '''
+        Adds a message to send at the next flush, unless it is suppressed.
+        @param message the message to send
+        @param tick the current tick
+        '''
+        receivers = tuple(message.to_id) if isinstance(message.to_id, list) else message.to_id
+        try:
+            key = (message.content, receivers)
+            last_sent = self._last_sent.get(key)
+            is_queued = key in self._queued_keys
+        except TypeError:
+            # Content that can not be hashed is not deduplicated
+            key, last_sent, is_queued = None, None, False
+
+        if is_queued or (last_sent is not None and self._dedup_window is not None
+                         and tick - last_sent < self._dedup_window):
+            self._nr_suppressed += 1
+            return
+
+        content_type = type(message.content).__name__
+        if content_type in self._rate_limits and key is not None:
+            # Merge with a waiting message with the same content, others wait in turn
+            pending = self._pending.setdefault((content_type, receivers), {})
+            if message.content in pending:
+                self._nr_suppressed += 1
+            else:
+                pending[message.content] = message
+        else:
+            self._queue.append(message)
+            if key is not None:
+                self._queued_keys.add(key)
+
+    def flush(self, tick:int) -> List[Message]:
+        '''
+        @param tick the current tick
+        @return the messages to send this tick: the added messages without rate limit
+            and per content type and receivers the first waiting message, if the rate
+            limit allows sending it now.
+        '''
+        messages = self._queue
+        for type_key, pending in list(self._pending.items()):
+            last_sent = self._last_sent_type.get(type_key)
+            if last_sent is None or tick - last_sent >= self._rate_limits[type_key[0]]:
+                messages.append(pending.pop(next(iter(pending))))
+                self._last_sent_type[type_key] = tick
+                if len(pending) == 0:
+                    del self._pending[type_key]
+
+        for message in messages:
+            receivers = tuple(message.to_id) if isinstance(message.to_id, list) else message.to_id
+            try:
+                self._last_sent[(message.content, receivers)] = tick
+            except TypeError:
+                pass
+            if isinstance(message, BW4TMessage):
+                message.pack()
+            self._nr_bytes_sent += len(message.content) if isinstance(message.content, bytes) \
+                else len(str(message.content).encode('utf-8'))
+        self._nr_sent += len(messages)
+
+        # Forget what is outside the windows, so memory does not grow with the length of the run
+        if self._dedup_window is not None:
+            self._last_sent = {key: sent for key, sent in self._last_sent.items()
+                               if tick - sent < self._dedup_window}
+        else:
+            self._last_sent = {}
+        self._last_sent_type = {type_key: sent for type_key, sent in self._last_sent_type.items()
+                                if tick - sent < self._rate_limits[type_key[0]]}
+
+        self._queue = []
+        self._queued_keys = set()
+        return messages
+
+    def getNrSent(self) -> int:
+        '''
+        @return the number of messages sent so far
+        '''
+        return self._nr_sent
+
+    def getNrBytesSent(self) -> int:
+        '''
+        @return the number of bytes of the contents of the messages sent so far: the
+            wire format of packed contents and the utf-8 text of other contents
+        '''
+        return self._nr_bytes_sent
+
+    def getNrSuppressed(self) -> int:
+        '''
+        @return the number of messages suppressed so far, as duplicate or merged with a waiting message
+        '''
+        return self._nr_suppressed
@@ -0,0 +1,62 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+
+class BW4TProfiler:
+    '''
+    Records the wall time of calls, per name (eg 'decide_on_action' or a
+    phase of an agent). A BW4TBrain has one if its 'profile' setting is True,
+    see BW4TAgentBrain.get_profiler.
+    '''
+    def __init__(self, names:Iterable[str]=()):
+        '''
+        @param names the names that are timed, so that they are in the log
+            data from the start. Other names can be timed as well.
+        '''
+        self._calls:Dict[str, int] = {}
+        self._totals:Dict[str, float] = {}
+        self.register(names)
+
+    def register(self, names:Iterable[str]):
+        '''
+        Adds names that are timed (with 0 calls), so that they are in the log data from the start.
+        '''
+        for name in names:
+            self._calls.setdefault(name, 0)
+            self._totals.setdefault(name, 0.0)
+
+    def record(self, name:str, seconds:float):
+        '''
+        @param name the name of what was timed
+        @param seconds the wall time of one call
+        '''
+        self._calls[name] = self._calls.get(name, 0) + 1
+        self._totals[name] = self._totals.get(name, 0.0) + seconds
+
+    @contextmanager
+    def time(self, name:str):
+        '''
+        Records the wall time of the with block under the given name.
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def getLogData(self) -> Dict[str, float]:
+        '''
+        @return dict with for each name the key 'time_<name>' and as value the total
+            wall time so far, in seconds. The keys do not change between calls
+            as long as only registered names are timed.
+        '''
+        return {'time_' + name: total for name, total in self._totals.items()}
+
+    def getSummary(self) -> List[tuple]:
+        '''
+        @return list of (name, calls, total seconds, mean milliseconds), the longest total first
+        '''
+        return sorted(((name, self._calls[name], total, 1000 * total / self._calls[name])
+                       for name, total in self._totals.items() if self._calls[name] > 0),
+                      key=lambda row: -row[2])
@@ -0,0 +1,149 @@
+import json
+from typing import Dict, List, Tuple
+from matrx import WorldBuilder # type: ignore
+from matrx.grid_world import GridWorld # type: ignore
+from matrx.objects import AreaTile, Door, Wall # type: ignore
+from bw4t.BW4TBlocks import CollectableBlock, GhostBlock
+
+
+class BW4TScenario:
+    '''
+    The layout of a generated BW4T world: rooms with their doors,
+    the blocks with their colour and shape, the drop zones with
+    their goal blocks and the agent spawns. A scenario can be saved
+    to a (json) file and added to a WorldBuilder, so that exactly the
+    same world can be used again, on any machine, without generating
+    it. See the 'scenario' world setting in BW4TWorld.
+    '''
+    def __init__(self, world_size:Tuple[int,int], rooms:List[dict], blocks:List[list],
+                 drop_zones:List[dict], spawns:List[list]):
+        '''
+        @param world_size (width, height) of the world
+        @param rooms list of dicts with the room name, top_left, width, height,
+            wall_colour, doors (list of [x, y, is_open]) and area_colour/area_opacity
+            (None if the room has no area tiles)
+        @param blocks list of [x, y, name, colour, shape, size] of the collectable blocks
+        @param drop_zones list of dicts with the zone nr, top_left, height, colour and goal_blocks
+            (list of [x, y, colour, shape, size])
+        @param spawns list of [agent name, x, y]
+        '''
+        self._world_size = tuple(world_size)
+        self._rooms = rooms
+        self._blocks = blocks
+        self._drop_zones = drop_zones
+        self._spawns = spawns
+
+    @staticmethod
+    def fromGridWorld(grid_world:GridWorld) -> 'BW4TScenario':
+        '''
+        Reads the scenario from the objects of a grid world. Use this
+        before running the world, as blocks and agents move around.
+        '''
+        rooms:Dict[str, dict] = {}
+        blocks = []
+        drop_zones:Dict[int, dict] = {}
+
+        # Rooms are ordered by their first object, so they are added in the original order again
+        def room(name):
+            if name not in rooms:
+                rooms[name] = {'name': name, 'walls': [], 'wall_colour': None, 'doors': [],
+                               'area_colour': None, 'area_opacity': None}
+            return rooms[name]
+
+        for obj in grid_world.environment_objects.values():
+            x, y = obj.location
+            if isinstance(obj, Wall):
+                room(obj.properties['room_name'])['walls'].append((x, y))
+                room(obj.properties['room_name'])['wall_colour'] = obj.visualize_colour
+            elif isinstance(obj, Door):
+                room(obj.properties['room_name'])['doors'].append([x, y, obj.is_open])
+            elif isinstance(obj, CollectableBlock):
+                blocks.append([x, y, obj.obj_name, obj.visualize_colour, obj.visualize_shape, obj.visualize_size])
+            elif isinstance(obj, GhostBlock):
+                drop_zones[obj.properties['drop_zone_nr']]['goal_blocks'].append(
+                    [x, y, obj.visualize_colour, obj.visualize_shape, obj.visualize_size])
+            elif isinstance(obj, AreaTile) and obj.properties.get('is_drop_zone', False):
+                zone_nr = obj.properties['drop_zone_nr']
+                if zone_nr not in drop_zones:
+                    drop_zones[zone_nr] = {'nr': zone_nr, 'tiles': [], 'colour': obj.visualize_colour, 'goal_blocks': []}
+                drop_zones[zone_nr]['tiles'].append((x, y))
+            elif isinstance(obj, AreaTile) and 'room_name' in obj.properties:
+                room(obj.properties['room_name'])['area_colour'] = obj.visualize_colour
+                room(obj.properties['room_name'])['area_opacity'] = obj.visualize_opacity
+
+        # The walls and tiles are stored as the rectangle around them
+        for room_dict in rooms.values():
+            walls = room_dict.pop('walls')
+            room_dict['top_left'] = [min(x for x, _ in walls), min(y for _, y in walls)]
+            room_dict['width'] = max(x for x, _ in walls) - room_dict['top_left'][0] + 1
+            room_dict['height'] = max(y for _, y in walls) - room_dict['top_left'][1] + 1
+        for zone in drop_zones.values():
+            tiles = zone.pop('tiles')
+            zone['top_left'] = [min(x for x, _ in tiles), min(y for _, y in tiles)]
+            zone['height'] = max(y for _, y in tiles) - zone['top_left'][1] + 1
+
+        spawns = [[agent_body.obj_name, *agent_body.location] for agent_body in grid_world.registered_agents.values()]
+
+        return BW4TScenario(grid_world.shape, list(rooms.values()), blocks, list(drop_zones.values()), spawns)
+
+    @staticmethod
+    def load(path:str) -> 'BW4TScenario':
+        '''
+        @param path the scenario file, as written by save
+        @return the scenario in the file
+        '''
+        with open(path) as file:
+            scenario = json.load(file)
+        return BW4TScenario(scenario['world_size'], scenario['rooms'], scenario['blocks'],
+                            scenario['drop_zones'], scenario['spawns'])
+
+    def save(self, path:str):
+        '''
+        Writes this scenario to a file.
+        @param path the file to write
+        '''
+        with open(path, 'w') as file:
+            json.dump({'world_size': self._world_size, 'rooms': self._rooms, 'blocks': self._blocks,
+                       'drop_zones': self._drop_zones, 'spawns': self._spawns}, file, separators=(',', ':'))
+
+    def getWorldSize(self) -> Tuple[int,int]:
+        '''
+        @return (width,height) (number of tiles)
+        '''
+        return self._world_size
+
+    def getSpawns(self) -> List[Tuple[int,int]]:
+        '''
+        @return the spawn locations of the agents, in the order the agents were added
+        '''
+        return [(x, y) for _, x, y in self._spawns]
+
+    def addTo(self, builder:WorldBuilder):
+        '''
+        Adds the rooms, blocks and drop zones of this scenario to the builder,
+        in the same order as BW4TWorld generates them. Agents are not added.
+        '''
+        for room in self._rooms:
+            with_area_tiles = room['area_colour'] is not None
+            builder.add_room(top_left_location=tuple(room['top_left']),
+                width=room['width'], height=room['height'], name=room['name'],
+                door_locations=[(x, y) for x, y, _ in room['doors']],
+                doors_open=any(is_open for _, _, is_open in room['doors']),
+                wall_visualize_colour=room['wall_colour'],
+                with_area_tiles=with_area_tiles,
+                area_visualize_colour=room['area_colour'] if with_area_tiles else None,
+                area_visualize_opacity=room['area_opacity'] if with_area_tiles else None)
+
+        for x, y, name, colour, shape, size in self._blocks:
+            builder.add_object((x, y), name, callable_class=CollectableBlock,
+                visualize_shape=shape, visualize_colour=colour, block_size=size)
+
+        for zone in self._drop_zones:
+            builder.add_area(tuple(zone['top_left']), width=1, height=zone['height'],
+                name=f"Drop off {zone['nr']}", visualize_colour=zone['colour'],
+                drop_zone_nr=zone['nr'], is_drop_zone=True,
+                is_goal_block=False, is_collectable=False)
+            for x, y, colour, shape, size in zone['goal_blocks']:
+                builder.add_object((x, y), name="Collect Block", callable_class=GhostBlock,
+                    visualize_colour=colour, visualize_shape=shape,
+                    drop_zone_nr=zone['nr'], block_size=size)
@@ -0,0 +1,35 @@
+from typing import Dict, List
+
+
+class BW4TStateDelta:
+    '''
+    The state of an agent as the change since its previous state. A
+    BW4TGridWorld hands this to a BW4TAgentBrain instead of a State.
+    The brain keeps the properties of the objects it perceived before, so
+    the world only takes the properties of the objects that are new to
+    the agent or that changed since the agent's previous state: the agent
+    bodies, and the objects that actions grabbed, dropped, opened or
+    removed. The walls, area tiles and most blocks and doors stay the same,
+    so their properties are not taken again every tick for every agent.
+    '''
+    def __init__(self, ids:List[str], changed:Dict[str, dict], world_info:dict):
+        '''
+        @param ids the ids of the objects that the agent perceives, in the order of the State
+            that the GridWorld would give the agent. The objects that the agent perceived
+            before but are not in ids are removed from its state.
+        @param changed the properties of the perceived objects that were added to the state
+            of the agent or changed since its previous state, by id
+        @param world_info the world info of the state (its 'World' entry)
+        '''
+        self.ids = ids
+        self.changed = changed
+        self.world_info = world_info
+
+    def apply(self, perceived:Dict[str, dict]) -> Dict[str, dict]:
+        '''
+        @param perceived the properties of the objects in the previous state of the agent, by id.
+            The dicts are shared with the world and other agents, do not change them.
+        @return the properties of the objects in this state of the agent, by id in state order
+        '''
+        changed = self.changed
+        return {obj_id: changed[obj_id] if obj_id in changed else perceived[obj_id] for obj_id in self.ids}
@@ -0,0 +1,122 @@
+from typing import Dict, List
+from matrx.agents.agent_utils.state import State # type: ignore
+
+
+class BW4TStateView:
+    '''
+    A spatial index of a State: from each tile to the objects on it and
+    from each room name to the objects of that room. It is built with a
+    single pass over the state, after which area and room queries cost
+    in proportion to the size of the area and the result, instead of a
+    scan of the whole state per query. The results are the same as those
+    of the State methods with the same name, in the same (state) order.
+
+    It also keeps the objects of the kinds that agents look for every tick
+    (doors, collectable blocks, goal blocks) so that these lists are made
+    once per state instead of once per use.
+
+    A view belongs to one state update, build a new one for the next state.
+    '''
+    def __init__(self, state:State):
+        '''
+        @param state the state to index
+        '''
+        # All objects with a location in state order, and per tile the positions of its objects in that list
+        self._objects:List[dict] = []
+        self._tiles:Dict[tuple, List[int]] = {}
+        self._rooms:Dict[str, List[dict]] = {}
+        self._doors:List[dict] = []
+        self._collectables:List[dict] = []
+        self._goal_blocks:List[dict] = []
+        self._closed_doors:List[dict] | None = None
+        self._team_members:List[str] = state.as_dict().get('World', {}).get('team_members', [])
+        for obj in state.as_dict().values():
+            if 'room_name' in obj:
+                self._rooms.setdefault(obj['room_name'], []).append(obj)
+            if 'class_inheritance' in obj:
+                if 'Door' in obj['class_inheritance']:
+                    self._doors.append(obj)
+                elif 'CollectableBlock' in obj['class_inheritance']:
+                    self._collectables.append(obj)
+                elif 'GhostBlock' in obj['class_inheritance']:
+                    self._goal_blocks.append(obj)
+            if 'location' not in obj:
+                continue
+            self._tiles.setdefault(tuple(obj['location']), []).append(len(self._objects))
+            self._objects.append(obj)
+
+    def get_objects_in_area(self, top_left, width=None, height=None, bottom_right=None) -> List[dict]:
+        '''
+        Same as State.get_objects_in_area: the objects within the area from top_left up to and
+        including bottom_right, or up to and including top_left + (width, height).
+        '''
+        if bottom_right is None:
+            if not width or not height:
+                raise Exception("Either a bottom_right coordinate, or width and height are required.")
+            bottom_right = (top_left[0] + width, top_left[1] + height)
+
+        positions = [pos for x in range(top_left[0], bottom_right[0] + 1)
+                     for y in range(top_left[1], bottom_right[1] + 1)
+                     for pos in self._tiles.get((x, y), [])]
+        return [self._objects[pos] for pos in sorted(positions)]
+
+    def get_room(self, room_name:str) -> List[dict] | None:
+        '''
+        @return the objects (walls, door, area tiles) with the given room name, None if there are none.
+        Unlike State.get_room, this does not also return the objects of rooms whose name contains
+        the given name (room_1 and room_10).
+        '''
+        return self._rooms.get(room_name)
+
+    def get_room_objects(self, room_name:str) -> List[dict] | None:
+        '''
+        Same as State.get_room_objects: the objects within the area of the given room.
+        @return None if there is no room with that name
+        '''
+        room_objs = self.get_room(room_name)
+        if room_objs is None:
+            return None
+
+        # Find the room's corners the way State does
+        room_locations = [obj['location'] for obj in room_objs]
+        top_left = room_locations[0]
+        bottom_right = room_locations[0]
+        for loc in room_locations:
+            if loc[0] < top_left[0] or loc[1] < top_left[1]:
+                top_left = loc
+            elif loc[0] > bottom_right[0] or loc[1] > bottom_right[1]:
+                bottom_right = loc
+        return self.get_objects_in_area(top_left=top_left, width=5, height=6)
+
+    def get_doors(self) -> List[dict]:
+        '''
+        @return all doors in the state, in state order. Do not change the list.
+        '''
+        return self._doors
+
+    def get_closed_doors(self) -> List[dict]:
+        '''
+        @return the doors in the state that are closed, in state order. Do not change the list.
+        '''
+        if self._closed_doors is None:
+            self._closed_doors = [door for door in self._doors if not door['is_open']]
+        return self._closed_doors
+
+    def get_collectables(self) -> List[dict]:
+        '''
+        @return all collectable blocks in the state, in state order. Do not change the list.
+        '''
+        return self._collectables
+
+    def get_goal_blocks(self) -> List[dict]:
+        '''
+        @return all goal (ghost) blocks of the drop zones in the state, in state order.
+            Do not change the list.
+        '''
+        return self._goal_blocks
+
+    def get_team_members(self) -> List[str]:
+        '''
+        @return the ids of the agents in the team of the agent, including the agent itself
+        '''
+        return self._team_members
@@ -0,0 +1,237 @@
+import multiprocessing
+import pickle
+import traceback
+from typing import Dict, List
+from matrx.agents.agent_utils.state import State # type: ignore
+from matrx.objects import AgentBody # type: ignore
+
+
+def _work(connection, brains:dict, all_agent_ids:List[str], return_states:bool):
+    '''
+    The loop of a worker process: runs the commands of the BW4TWorkerPool on the
+    given brains and sends back the results, until the pool closes.
+    '''
+    while True:
+        command, payload = connection.recv()
+        try:
+            if command == 'deliver':
+                # payload: per agent id the calls of the GridWorld to its brain since the last decision
+                for agent_id, calls in payload.items():
+                    for method, arg in calls:
+                        getattr(brains[agent_id], method)(arg)
+                result = {agent_id: brain._get_log_data() for agent_id, brain in brains.items()}
+            elif command == 'decide':
+                result = _decide(brains, *payload, all_agent_ids, return_states)
+            else:
+                result = {agent_id: brain.get_profiler() for agent_id, brain in brains.items()}
+        except Exception:
+            connection.send(('error', traceback.format_exc()))
+            return
+        connection.send(('ok', result))
+        if command == 'close':
+            return
+
+
+def _decide(brains:dict, objects:bytes, tasks:list, all_agent_ids:List[str], return_states:bool) -> dict:
+    '''
+    Lets the brains decide (or only observe, if they are busy) in the order of the tasks.
+    @param objects the pickled properties of all objects that the agents of the tasks perceive
+    @param tasks list of (agent id, ids of the perceived objects, world info, agent properties).
+        The agent properties are None if the agent is busy.
+    @return per agent id the filtered state if the agent is busy, otherwise
+        (filtered state, agent properties, action, action arguments, messages).
+        The filtered states are None unless return_states is set.
+    '''
+    results = {}
+    for agent_id, ids, world_info, properties in tasks:
+        # Each agent gets its own copy of the objects, like it gets new properties from the GridWorld
+        perceived = pickle.loads(objects)
+        state = State(agent_id)
+        state.state_update({obj_id: perceived[obj_id] for obj_id in ids})
+        state._add_world_info(world_info)
+
+        brain = brains[agent_id]
+        if properties is None:
+            filtered_state = brain._fetch_state(state)
+            results[agent_id] = (filtered_state if return_states else None,)
+        else:
+            filtered_state, properties, action, action_kwargs = brain._get_action(state, properties, agent_id)
+            messages = brain._get_messages(all_agent_ids)
+            results[agent_id] = (filtered_state if return_states else None, properties, action, action_kwargs, messages)
+    return results
+
+
+class _PooledBrain:
+    '''
+    Stands in for a brain that runs in a worker of a BW4TWorkerPool. It gives the
+    GridWorld the result of the decision that the brain made in the worker, and
+    passes the other calls of the GridWorld on to the brain.
+    '''
+    def __init__(self, agent_id:str, pool:'BW4TWorkerPool'):
+        self._agent_id = agent_id
+        self._pool = pool
+        # The result of the decision of this tick, None if the brain did not decide yet
+        self.result:tuple|None = None
+
+    def get_action(self, state, agent_properties, agent_id):
+        return self.result[:4]
+
+    def filter_observations(self, state):
+        return self.result[0]
+
+    def get_messages(self, all_agent_ids):
+        return self.result[4]
+
+    def set_action_result(self, action_result):
+        self._pool._call(self._agent_id, '_set_action_result', action_result)
+
+    def set_messages(self, messages):
+        self._pool._call(self._agent_id, '_set_messages', messages)
+
+    def get_log_data(self):
+        return self._pool._log_data[self._agent_id]
+
+
+class BW4TWorkerPool:
+    '''
+    Worker processes in which the brains of agents decide in parallel.
+    The workers are forked, so they start with a copy of the brains as they
+    are. From then on the copies in the workers are the ones that decide:
+    the pool replaces the callbacks of the agent bodies, so that the
+    GridWorld gets the decisions from the workers and its calls to the
+    brains go to the workers. Each worker runs the calls to its brains in
+    the order the GridWorld makes them, so each brain gets the same calls
+    with the same arguments as when it runs in the GridWorld itself.
+
+    Which agents decide together, and with which state, is up to the
+    GridWorld, see BW4TGridWorld.
+    '''
+    def __init__(self, bodies:Dict[str, AgentBody], nr_workers:int, all_agent_ids:List[str], return_states:bool=False):
+        '''
+        @param bodies dict with as key the agent id and as value the body of the agent, in
+            the order of the agents. Their brains are divided over the workers round robin.
+        @param nr_workers the number of worker processes, at most one per agent is started.
+        @param all_agent_ids the ids of all agents in the world, as the brains need them to send messages
+        @param return_states True to get the filtered states of the agents back, which the api shows.
+            Otherwise the GridWorld gets None as filtered state.
+        '''
+        # Forking copies the brains into the workers without pickling them.
+        # Raises ValueError on platforms that can not fork.
+        context = multiprocessing.get_context('fork')
+        agent_ids = list(bodies)
+        nr_workers = max(1, min(nr_workers, len(agent_ids)))
+
+        self._bodies = bodies
+        self._brains = {agent_id: body.get_action_func.__self__ for agent_id, body in bodies.items()}
+        self._connections = []
+        self._processes = []
+        self._worker_of:Dict[str, int] = {}
+        for nr in range(nr_workers):
+            brains = {agent_id: self._brains[agent_id] for agent_id in agent_ids[nr::nr_workers]}
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_work, daemon=True,
+                                      args=(worker_connection, brains, list(all_agent_ids), return_states))
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+            self._worker_of.update({agent_id: nr for agent_id in brains})
+
+        # The calls to each brain since its last decision, and its log data
+        self._calls:Dict[str, list] = {agent_id: [] for agent_id in agent_ids}
+        self._log_data:Dict[str, dict] = {}
+
+        self._callbacks = {}
+        self._pooled:Dict[str, _PooledBrain] = {}
+        for agent_id, body in bodies.items():
+            pooled = _PooledBrain(agent_id, self)
+            self._pooled[agent_id] = pooled
+            self._callbacks[agent_id] = (body.get_action_func, body.filter_observations, body.get_messages_func,
+                                         body.set_action_result_func, body.set_messages_func, body.get_log_data)
+            body.get_action_func = pooled.get_action
+            body.filter_observations = pooled.filter_observations
+            body.get_messages_func = pooled.get_messages
+            body.set_action_result_func = pooled.set_action_result
+            body.set_messages_func = pooled.set_messages
+            body.get_log_data = pooled.get_log_data
+
+    def isPooled(self, agent_id:str) -> bool:
+        '''
+        @return True if the brain of the agent runs in this pool
+        '''
+        return agent_id in self._pooled
+
+    def hasDecided(self, agent_id:str) -> bool:
+        '''
+        @return True if the brain of the (pooled) agent already decided (or observed) this tick
+        '''
+        return self._pooled[agent_id].result is not None
+
+    def startTick(self):
+        '''
+        Starts a tick: hands the action results and messages of the previous tick to the
+        brains and gets their log data, for the loggers at the start of the tick.
+        '''
+        for nr, connection in enumerate(self._connections):
+            connection.send(('deliver', {agent_id: self._calls[agent_id]
+                                         for agent_id, worker in self._worker_of.items() if worker == nr}))
+        for connection in self._connections:
+            self._log_data.update(self._receive(connection))
+        self._calls = {agent_id: [] for agent_id in self._calls}
+        for pooled in self._pooled.values():
+            pooled.result = None
+
+    def decide(self, objects:dict, tasks:list):
+        '''
+        Lets the brains decide in parallel, in their workers. The GridWorld gets the results
+        when it asks the agents for their decision.
+        @param objects dict with as key the object id and as value the properties of the object,
+            for all objects that the agents of the tasks perceive
+        @param tasks list of (agent id, ids of the perceived objects, world info, agent properties),
+            the agent properties being None for agents that are busy and only observe.
+            The tasks of a worker are run in the given order.
+        '''
+        objects_data = pickle.dumps(objects, protocol=pickle.HIGHEST_PROTOCOL)
+        worker_tasks:Dict[int, list] = {}
+        for task in tasks:
+            worker_tasks.setdefault(self._worker_of[task[0]], []).append(task)
+        for nr, own_tasks in worker_tasks.items():
+            self._connections[nr].send(('decide', (objects_data, own_tasks)))
+        for nr in worker_tasks:
+            for agent_id, result in self._receive(self._connections[nr]).items():
+                self._pooled[agent_id].result = result
+
+    def close(self):
+        '''
+        Stops the workers and gives the bodies their own callbacks back. The brains in this
+        process get the profilers of their copies in the workers (see BW4TAgentBrain.get_profiler).
+        The rest of their memory is not copied back, it is as it was when the pool started: the
+        brains refer to themselves (eg through bound methods), so a copy can not replace them.
+        '''
+        for agent_id, body in self._bodies.items():
+            (body.get_action_func, body.filter_observations, body.get_messages_func,
+             body.set_action_result_func, body.set_messages_func, body.get_log_data) = self._callbacks[agent_id]
+        for connection in self._connections:
+            try:
+                connection.send(('close', None))
+                for agent_id, profiler in self._receive(connection).items():
+                    self._brains[agent_id]._set_profiler(profiler)
+            except (OSError, EOFError):
+                pass  # the worker stopped after an error in one of its agents, which was raised already
+        for process, connection in zip(self._processes, self._connections):
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+            connection.close()
+
+    def _call(self, agent_id:str, method:str, arg):
+        '''
+        Records a call of the GridWorld to the brain, it is made in the worker at the start of the next tick
+        '''
+        self._calls[agent_id].append((method, arg))
+
+    def _receive(self, connection) -> dict:
+        status, result = connection.recv()
+        if status == 'error':
+            raise RuntimeError("An agent failed in a worker process:\n" + result)
+        return result
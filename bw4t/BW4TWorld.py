@@ -6,15 +6,19 @@ from typing import Final, List
 from matrx.actions.move_actions import MoveEast, MoveSouth, MoveWest 
 from matrx.actions import MoveNorth, OpenDoorAction, CloseDoorAction 
 from matrx.grid_world import GridWorld, DropObject, GrabObject, AgentBody 
-from matrx import WorldBuilder 
 from matrx.world_builder import RandomProperty
 from matrx.agents import SenseCapability 
 from matrx.utils import get_room_locations
+from matrx.objects import AreaTile, Door, Wall
 from bw4t.BW4TBlocks import CollectableBlock, GhostBlock
+from bw4t.BW4TWorldBuilder import BW4TWorldBuilder
+from bw4t.BW4TScenario import BW4TScenario
+from bw4t.BW4TLayout import BW4TLayout
 from agents1.BW4THuman import Human
 from bw4t.CollectionGoal import CollectionGoal
 from bw4t.BW4TLogger import BW4TLogger
 from bw4t.BW4THumanBrain import HumanBrain
+from bw4t.BW4TBrain import BW4TBrain
 
 DEFAULT_WORLDSETTINGS: dict={
     'deadline': 3000, # Ticks after which world terminates anyway 
@@ -39,15 +43,26 @@ DEFAULT_WORLDSETTINGS: dict={
     'nr_rooms' : 9, # total number of rooms.
     'rooms_per_row':3, #number of rooms per row.
     'average_blocks_per_room': 2,
+    'block_placement': 'prospect', # 'prospect': a prospect per room location, 'bulk': all locations sampled at once,
+                                   # 'exact': exactly round(average_blocks_per_room) blocks in every room, sampled at once
     'block_shapes': [0, 1, 2], # possible shapes of the blocks
     'block_colors': ['#0008ff', '#ff1500', '#0dff00'], #possible colors of blocks
     'room_colors': ['#0008ff', '#ff1500', '#0dff00'],
     'wall_color': "#8a8a8a",
     'drop_off_color': "#878787",
     'block_size' : 0.5,
-    'nr_drop_zones':  1, # All code assumes this is 1, don't change this.
-    'nr_blocks_needed':  3, # nr of drop tiles/target blocks
+    'nr_drop_zones':  1, # nr of drop zones. The agents in agents1 only handle a single zone.
+    'nr_blocks_needed':  3, # nr of drop tiles/target blocks per drop zone
     'hallway_space': 2, # width, height of corridors
+    'large_world': False, # compute all rooms at once with numpy and add them in bulk. Use for hundreds of rooms.
+    'agent_spawn': 'row', # 'row': agents start in a row at the top left, 'doors': agents start spread over the doors.
+                          # Large teams that do not fit in the row are always spread over the doors.
+    'scenario': None, # path of a scenario file (see saveScenario) to load the world from, instead of generating it
+    'parallel_workers': 0, # nr of worker processes in which the agents decide in parallel, 0 to decide one by one.
+                           # The run is the same, but after it the brains in this process only have their profilers
+                           # up to date, see BW4TGridWorld.setParallelWorkers.
+    'state_deltas': True, # give the agents their state as the change since their previous state, which gives the
+                          # same states with less work per tick, see BW4TGridWorld.setStateDeltas.
 
     'agent_sense_range':  2,  # the range with which agents detect other agents
     'block_sense_range': 1,  # the range with which agents detect blocks
@@ -82,13 +97,18 @@ class BW4TWorld:
         self._agents=agents
         
         np.random.seed(worldsettings['random_seed'])
-        world_size = self.world_size()
+        scenario = None
+        if worldsettings.get('scenario') is not None:
+            scenario = BW4TScenario.load(worldsettings['scenario'])
+            world_size = scenario.getWorldSize()
+        else:
+            world_size = self.world_size()
     
         # Create the goal
         goal = CollectionGoal(worldsettings['deadline'])
     
         # Create our world builder
-        self._builder = WorldBuilder(shape=world_size, tick_duration=worldsettings['tick_duration'], 
+        self._builder = BW4TWorldBuilder(shape=world_size, tick_duration=worldsettings['tick_duration'], 
            random_seed=worldsettings['random_seed'], 
            run_matrx_api=worldsettings['run_matrx_api'],
            run_matrx_visualizer=worldsettings['run_matrx_visualizer'], 
@@ -96,14 +116,31 @@ class BW4TWorld:
         
         self._builder.api_info['_matrx_paused']=worldsettings['matrx_paused']
     
-        # Add the world bounds (not needed, as agents cannot 'walk off' the grid, but for visual effects)
-        self._builder.add_room(top_left_location=(0, 0), width=world_size[0], height=world_size[1], name="world_bounds")
-        room_locations = self._addRooms()
-        self._addBlocks(room_locations)
-        self._addDropOffZones(world_size)
+        if scenario is not None:
+            # The scenario has the world bounds, rooms, blocks and drop zones
+            scenario.addTo(self._builder)
+            spawns = scenario.getSpawns()
+        else:
+            # Add the world bounds (not needed, as agents cannot 'walk off' the grid, but for visual effects)
+            self._builder.add_room(top_left_location=(0, 0), width=world_size[0], height=world_size[1], name="world_bounds")
+            if worldsettings.get('large_world', False):
+                room_locations = self._addRoomsInBulk()
+            else:
+                room_locations = self._addRooms()
+            self._addBlocks(room_locations)
+            self._addDropOffZones(world_size)
+            if worldsettings.get('agent_spawn', 'row') == 'doors' or len(agents) > world_size[0] - 2:
+                spawns = self._planSpawns(world_size)
+            else:
+                spawns = []
     
-        # Add the agents and human agents to the top row of the world
-        self._addAgents()
+        # The agents and human agents start in the top row of the world, or at the scenario's spawns
+        agent_locs = self._getAgentLocations(spawns)
+
+        # The static layout, computed once for all agents
+        self._layout = BW4TLayout.fromBuilder(self._builder, world_size, agent_locs)
+
+        self._addAgents(agent_locs)
         
         #media_folder = os.path.dirname(os.path.join(os.path.realpath(__file__), "media"))
         media_folder = pathlib.Path().resolve()
@@ -111,14 +148,38 @@ class BW4TWorld:
         self._builder.add_logger(BW4TLogger, save_path='.')
 
         self._gridworld = self._builder.worlds(nr_of_worlds=1).__next__()
+        self._gridworld.setParallelWorkers(worldsettings.get('parallel_workers', 0))
+        self._gridworld.setStateDeltas(worldsettings.get('state_deltas', False))
 
     def run(self):
         '''
         run the world till termination
         '''
         self._gridworld.run(self._builder.api_info)
+        self._printProfile()
         return self
         
+    def getGridWorld(self)->GridWorld:
+        '''
+        @return the GridWorld created for this BW4TWorld
+        '''
+        return self._gridworld
+
+    def saveScenario(self, path:str):
+        '''
+        Saves the layout of this world (rooms, blocks, drop zones and agent spawns)
+        so that it can be loaded again with the 'scenario' world setting.
+        Call this before run, as blocks and agents move around.
+        @param path the file to write
+        '''
+        BW4TScenario.fromGridWorld(self._gridworld).save(path)
+
+    def getLayout(self)->BW4TLayout:
+        '''
+        @return the static layout (walls, doors, drop tiles) of this world
+        '''
+        return self._layout
+
     def getLogger(self)->BW4TLogger:
         '''
         @return the logger. We assume there is only 1: BW4TLogger
@@ -147,6 +208,10 @@ class BW4TWorld:
         '''
         Add blocks to all given room locations
         '''
+        if self._worldsettings.get('block_placement', 'prospect') != 'prospect':
+            self._addBlocksInBulk(room_locations)
+            return
+
         for room_name, locations in room_locations.items():
             for loc in locations:
                 # Get the block's name
@@ -170,21 +235,78 @@ class BW4TWorld:
                     visualize_shape=shape_property, visualize_colour=colour_property,
                     block_size=self._worldsettings['block_size'])
 
-    def _addAgents(self):
+    def _addBlocksInBulk(self, room_locations):
         '''
-        Add bots as specified, starting top left corner. 
+        Add blocks to the given room locations, sampling the presence, colour and shape
+        of the blocks at all locations in one draw from the world's random generator.
+        Only the blocks that are present are added to the builder.
+        '''
+        room_names = list(room_locations.keys())
+        locations = np.array([loc for locs in room_locations.values() for loc in locs], dtype=int).reshape(-1, 2)
+        room_idx = np.repeat(np.arange(len(room_names)), [len(locs) for locs in room_locations.values()])
+        room_sizes = np.bincount(room_idx, minlength=len(room_names))
+
+        # One uniform sample per location for the presence, colour and shape
+        samples = self._builder.rng.rand(len(locations), 3)
+
+        if self._worldsettings['block_placement'] == 'exact':
+            # The locations with the lowest samples in a room get a block
+            order = np.lexsort((samples[:, 0], room_idx))
+            rank = np.empty(len(locations), dtype=int)
+            rank[order] = np.arange(len(locations)) - np.repeat(np.cumsum(room_sizes) - room_sizes, room_sizes)
+            present = rank < int(round(self._worldsettings['average_blocks_per_room']))
+        elif self._worldsettings['block_placement'] == 'bulk':
+            # The probability for a block so we get on average the requested number of blocks per room
+            prob = np.minimum(1.0, self._worldsettings['average_blocks_per_room'] / np.maximum(room_sizes, 1))
+            present = samples[:, 0] < prob[room_idx]
+        else:
+            raise ValueError(f"Unknown block_placement {self._worldsettings['block_placement']}")
+
+        colours = np.array(self._worldsettings['block_colors'])
+        shapes = np.array(self._worldsettings['block_shapes'])
+        colour_idx = (samples[present, 1] * len(colours)).astype(int)
+        shape_idx = (samples[present, 2] * len(shapes)).astype(int)
+
+        self._builder.add_multiple_objects(locations=[tuple(loc) for loc in locations[present].tolist()],
+            names=[f"Block in {room_names[nr]}" for nr in room_idx[present]],
+            callable_classes=CollectableBlock,
+            visualize_colours=colours[colour_idx].tolist(), visualize_shapes=shapes[shape_idx].tolist(),
+            custom_properties={'block_size': self._worldsettings['block_size']})
+
+    def _getAgentLocations(self, spawns:list|None=None) -> list:
+        '''
+        @param spawns the locations for the first agents, the others are placed as usual:
+            in a row from the top left corner. None to place all agents as usual.
+        @return list with the start location of each agent
+        '''
+        if spawns is None:
+            spawns = []
+        locs = []
+        loc = (0,1) # agents start in horizontal row at top left corner.
+        for nr in range(len(self._agents)):
+            loc = spawns[nr] if nr < len(spawns) else (loc[0] + 1, loc[1])
+            locs.append(loc)
+        return locs
+
+    def _addAgents(self, locs:list):
+        '''
+        Add bots as specified. 
         All bots have the same sense_capability.
+        @param locs the start location of each agent, see _getAgentLocations
         '''
         sense_capability = SenseCapability({
             AgentBody: self._worldsettings['agent_sense_range'],
             CollectableBlock: self._worldsettings['block_sense_range'],
             None: self._worldsettings['other_sense_range']})
     
-        loc = (0,1) # agents start in horizontal row at top left corner.
         team_name = "Team 1" # currently this supports 1 team 
-        for agent in self._agents:
+        self._brains = {}
+        for nr, agent in enumerate(self._agents):
             brain = agent['botclass'](agent['settings'])
-            loc = (loc[0] + 1, loc[1])
+            self._brains[agent['name']] = brain
+            if isinstance(brain, BW4TBrain):
+                brain._setLayout(self._layout)
+            loc = locs[nr]
             if agent['botclass']==Human:
                 self._builder.add_human_agent(loc, brain,
                 team=team_name, name=agent['name'],
@@ -195,6 +317,63 @@ class BW4TWorld:
                 team=team_name, name=agent['name'], 
                 sense_capability=sense_capability, visualize_shape=1, visualize_colour=self._worldsettings['block_colors'][random.randint(0,2)])
      
+    def _printProfile(self):
+        '''
+        Prints the decision times of the profiled agents (see the 'profile' agent
+        setting), per agent the longest total first.
+        '''
+        for name, brain in self._brains.items():
+            if not isinstance(brain, BW4TBrain) or brain.get_profiler() is None:
+                continue
+            print(f"Profile of {name}: calls, total s, mean ms")
+            for timed, calls, total, mean in brain.get_profiler().getSummary():
+                print(f"  {timed:<36}{calls:>8}{total:>10.3f}{mean:>10.3f}")
+
+    def _planSpawns(self, world_size):
+        '''
+        Finds free hallway tiles for all agents, spread over the doors: the first
+        agent gets the free tile closest to the first door, the second agent the
+        one closest to the second door, and so on.
+        @return list with a location for each agent
+        '''
+        width, height = world_size
+        nr_agents = len(self._agents)
+        room_width, room_height = self._worldsettings['room_size']
+        room_top_lefts, door_locs = self.get_room_locs(np.arange(self._worldsettings['nr_rooms']))
+
+        # Free tiles are all tiles within the world bounds that are not part of a room, a drop zone or
+        # right in front of a door (so agents do not block the way in)
+        free = np.zeros((width, height), dtype=bool)
+        free[1:-1, 1:-1] = True
+        for x, y in room_top_lefts:
+            free[x:x + room_width, y:y + room_height] = False
+        free[door_locs[:, 0], np.minimum(door_locs[:, 1] + 1, height - 1)] = False
+        drop_x, drop_y = self._getDropZoneLoc(world_size)
+        zone_xs = drop_x + np.arange(self._worldsettings['nr_drop_zones']) * (self._worldsettings['hallway_space'] + 1)
+        free[zone_xs, drop_y - self._worldsettings['nr_blocks_needed'] + 1:drop_y + 1] = False
+
+        tiles = np.argwhere(free)
+        if nr_agents > len(tiles):
+            raise ValueError(f"Can not place {nr_agents} agents, there are only {len(tiles)} free hallway tiles")
+        if len(door_locs) == 0:
+            return [tuple(loc) for loc in tiles[:nr_agents].tolist()]
+
+        # For each door, the tiles ordered by their distance to it
+        distances = np.abs(tiles[:, None, :] - (door_locs + [0, 1])[None, :, :]).sum(axis=2)
+        closest = np.argsort(distances, axis=0, kind='stable')
+
+        taken = np.zeros(len(tiles), dtype=bool)
+        next_closest = np.zeros(len(door_locs), dtype=int)
+        spawns = []
+        for nr in range(nr_agents):
+            door = nr % len(door_locs)
+            while taken[closest[next_closest[door], door]]:
+                next_closest[door] += 1
+            tile = closest[next_closest[door], door]
+            taken[tile] = True
+            spawns.append(tuple(tiles[tile].tolist()))
+        return spawns
+
     def _addRooms(self):
         '''
         @return room locations
@@ -223,31 +402,92 @@ class BW4TWorld:
         return room_locations       
     
         
+    def _addRoomsInBulk(self):
+        '''
+        Same rooms as _addRooms, but the walls, doors and area tiles of all rooms
+        are computed at once and added with a single builder call per object type.
+        @return room locations
+        '''
+        nr_rooms = self._worldsettings['nr_rooms']
+        width, height = self._worldsettings['room_size']
+        room_top_lefts, door_locs = self.get_room_locs(np.arange(nr_rooms))
+        room_names = [f"room_{room_nr}" for room_nr in range(nr_rooms)]
+        room_colors = [random.choice(self._worldsettings['room_colors']) for _ in range(nr_rooms)]
+
+        # The offsets from the top left of the walls (the border of the room except the door) and of the inside of a room
+        xs, ys = np.meshgrid(np.arange(width), np.arange(height), indexing='ij')
+        border = (xs == 0) | (xs == width - 1) | (ys == 0) | (ys == height - 1)
+        border &= ~((xs == door_locs[0, 0] - room_top_lefts[0, 0]) & (ys == height - 1))
+        wall_offsets = np.stack([xs[border], ys[border]], axis=1)
+        inside_offsets = np.stack([xs[1:-1, 1:-1].ravel(), ys[1:-1, 1:-1].ravel()], axis=1)
+
+        # rooms x tiles x 2 arrays of all locations
+        walls = (room_top_lefts[:, None, :] + wall_offsets[None, :, :]).tolist()
+        insides = (room_top_lefts[:, None, :] + inside_offsets[None, :, :]).tolist()
+        doors = door_locs.tolist()
+
+        wall_locs = [tuple(loc) for room in walls for loc in room]
+        self._builder.add_multiple_objects(locations=wall_locs,
+            names=[f"{room_names[room_nr]} - wall@{loc}" for room_nr, room in enumerate(walls) for loc in map(tuple, room)],
+            callable_classes=Wall, visualize_colours=self._worldsettings['wall_color'],
+            custom_properties=[{"room_name": room_names[room_nr]} for room_nr, room in enumerate(walls) for _ in room])
+
+        self._builder.add_multiple_objects(locations=[tuple(loc) for loc in doors],
+            names=[f"{room_names[room_nr]} - door@{tuple(loc)}" for room_nr, loc in enumerate(doors)],
+            callable_classes=Door,
+            custom_properties=[{"room_name": room_name, "is_open": False} for room_name in room_names])
+
+        self._builder.add_multiple_objects(locations=[tuple(loc) for room in insides for loc in room],
+            names=[f"{room_names[room_nr]}_area" for room_nr, room in enumerate(insides) for _ in room],
+            callable_classes=AreaTile,
+            visualize_colours=[room_colors[room_nr] for room_nr, room in enumerate(insides) for _ in room],
+            visualize_opacities=0.1,
+            custom_properties=[{"room_name": room_names[room_nr]} for room_nr, room in enumerate(insides) for _ in room])
+
+        return {room_name: [tuple(loc) for loc in room] for room_name, room in zip(room_names, insides)}
+
     def get_room_loc(self,room_nr):
         '''
         @return room location (room_x, room_y), (door_x, door_y) for given room nr
         '''
-        row = np.floor(room_nr / self._worldsettings['rooms_per_row'])
-        column = room_nr % self._worldsettings['rooms_per_row']
-    
+        room_top_lefts, door_locs = self.get_room_locs(np.array([room_nr]))
+        return tuple(room_top_lefts[0].tolist()), tuple(door_locs[0].tolist())
+
+    def get_room_locs(self, room_nrs:np.ndarray):
+        '''
+        @param room_nrs array of room numbers
+        @return (room locations, door locations), both arrays of shape (len(room_nrs), 2)
+        with the (x,y) of each given room nr
+        '''
+        row = room_nrs // self._worldsettings['rooms_per_row']
+        column = room_nrs % self._worldsettings['rooms_per_row']
+
         # x is: +1 for the edge, +edge hallway, +room width * column nr, +1 off by one
-        room_x = int(1 + self._worldsettings['hallway_space'] + (self._worldsettings['room_size'][0] * column) )
-    
+        room_x = 1 + self._worldsettings['hallway_space'] + (self._worldsettings['room_size'][0] * column)
+
         # y is: +1 for the edge, +hallway space * (nr row + 1 for the top hallway), +row * room height, +1 off by one
-        room_y = int(1 + self._worldsettings['hallway_space'] * (row + 1) + row * self._worldsettings['room_size'][1] + 1)
-    
+        room_y = 1 + self._worldsettings['hallway_space'] * (row + 1) + row * self._worldsettings['room_size'][1] + 1
+
         # door location is always center bottom
         door_x = room_x + int(np.ceil(self._worldsettings['room_size'][0] / 2))
         door_y = room_y + self._worldsettings['room_size'][1] - 1
-    
-        return (room_x, room_y), (door_x, door_y)
+
+        return np.stack([room_x, room_y], axis=1).astype(int), np.stack([door_x, door_y], axis=1).astype(int)
     
     
-    def _addDropOffZones(self, world_size):
+    def _getDropZoneLoc(self, world_size):
+        '''
+        @return (x, y) of the bottom tile of the first drop zone. The next zones
+        are hallway_space + 1 further to the right.
+        '''
         x = int(np.ceil(world_size[0] / 2)) - \
             (int(np.floor(self._worldsettings['nr_drop_zones'] / 2)) * \
                 (self._worldsettings['hallway_space'] + 1))
         y = world_size[1] - 1 - 1  # once for off by one, another for world bound
+        return x, y
+
+    def _addDropOffZones(self, world_size):
+        x, y = self._getDropZoneLoc(world_size)
         for nr_zone in range(self._worldsettings['nr_drop_zones']):
             # Add the zone's tiles. Area tiles are special types of objects in MATRX that simply function as
             # a kind of floor. They are always traversable and cannot be picked up.
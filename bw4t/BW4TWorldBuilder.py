@@ -0,0 +1,334 @@
+import time
+import numpy as np # type: ignore
+from typing import Dict, List
+from matrx import WorldBuilder # type: ignore
+from matrx.grid_world import GridWorld # type: ignore
+from matrx.objects import AgentBody, AreaTile, EnvObject # type: ignore
+from matrx.utils import get_distance # type: ignore
+from bw4t.BW4TAgentBrain import BW4TAgentBrain
+from bw4t.BW4TStateDelta import BW4TStateDelta
+from bw4t.BW4TWorkerPool import BW4TWorkerPool
+
+
+class BW4TGridWorld(GridWorld):
+    '''
+    GridWorld with a faster check of object placements.
+    GridWorld checks every new object against all objects
+    in the world, which makes building a world quadratic
+    in its number of objects. This keeps an index from
+    location to the objects registered there instead.
+    The outcome of the check is the same.
+
+    The agents can also decide in parallel, in worker processes,
+    see setParallelWorkers, and get their state as the change since
+    their previous state, see setStateDeltas.
+    '''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # location -> objects registered at that location. Objects can be removed
+        # (grabbed) or become traversable (doors) later on, so entries are
+        # verified against the current world when used.
+        self.__placed:Dict[tuple, List[EnvObject]] = {}
+        self.__nr_workers = 0
+        self.__pool:BW4TWorkerPool|None = None
+        self.__state_deltas = False
+        # The properties of the environment objects as the agents last got them, and the ids of the objects that
+        # changed since then (None for all objects). Objects that update themselves every tick change every tick.
+        self.__properties:Dict[str, dict] = {}
+        self.__changed_ids:set|None = None
+        self.__updating_ids:set = set()
+        # The objects that the agents perceive this tick: (tick, generation, objects, locations, type masks,
+        # ids of the objects that changed since the previous generation)
+        self.__tick_objects:tuple|None = None
+        # Per agent id the generation and the ids of its previous state delta
+        self.__agent_views:Dict[str, tuple] = {}
+
+    def setParallelWorkers(self, nr_workers:int):
+        '''
+        Lets the agents decide in parallel, in nr_workers worker processes. The
+        run is exactly the same as when the agents decide one after the other in
+        this process, as long as the agents do not share anything but their
+        messages (use BW4TAgentBrain.random instead of the random module) and do
+        not call is_action_possible. Human agents and agents that are not
+        BW4TAgentBrains still decide in this process.
+
+        In the GridWorld each agent perceives the world as the agents before it
+        in the tick left it: an agent that decided is busy with its new action.
+        So an agent decides in parallel with the agents before it that it does
+        not perceive, and waits for those it does perceive.
+
+        Requires that processes can be forked (not on Windows). The brains in
+        this process are copied into the workers when the world starts running,
+        and from then on only the copies decide. After the run the brains in this
+        process get the profilers of their copies back, but nothing else: their
+        state, memory and beliefs are still those from before the run. Read what
+        the agents did from the log (or the agents' own files), not from the
+        brains in this process.
+        @param nr_workers the number of worker processes, 0 to decide in this process
+        '''
+        self.__nr_workers = nr_workers
+
+    def setStateDeltas(self, state_deltas:bool):
+        '''
+        Gives BW4TAgentBrains their state as a BW4TStateDelta: only the properties of the
+        objects that are new to the agent or that changed since the previous tick, which the
+        brain applies to the properties it kept. The brains get the same states as without
+        deltas. Human agents, agents that are not BW4TAgentBrains and agents that decide in
+        worker processes get the full state.
+
+        The world knows which objects changed from the actions: the acting agent, the objects
+        it carries and the object named by the object_id argument of the action, and objects
+        that are added or removed. Objects whose class overrides EnvObject.update change
+        every tick. An action that changes other objects must call markChanged for them.
+        @param state_deltas True to give the state deltas, False to give the full states
+        '''
+        self.__state_deltas = state_deltas
+
+    def markChanged(self, obj_id:str):
+        '''
+        Marks an environment object as changed, so that agents get its new properties in
+        their next state delta, see setStateDeltas.
+        @param obj_id the id of the object
+        '''
+        if self.__changed_ids is not None and obj_id is not None:
+            self.__changed_ids.add(obj_id)
+
+    #override
+    def run(self, api_info):
+        try:
+            super().run(api_info)
+        finally:
+            if self.__pool is not None:
+                self.__pool.close()
+                self.__pool = None
+
+    #override
+    def _GridWorld__step(self):
+        if self.__nr_workers > 0:
+            if self.__pool is None:
+                bodies = {agent_id: body for agent_id, body in self.registered_agents.items()
+                          if not body.is_human_agent and isinstance(getattr(body.get_action_func, '__self__', None), BW4TAgentBrain)}
+                self.__pool = BW4TWorkerPool(bodies, self.__nr_workers, list(self.registered_agents),
+                                             return_states=self._GridWorld__run_matrx_api)
+            self.__pool.startTick()
+        return GridWorld._GridWorld__step(self)
+
+    #override
+    def _GridWorld__get_agent_state(self, agent_obj:AgentBody):
+        if self.__pool is None or not self.__pool.isPooled(agent_obj.obj_id):
+            if self.__state_deltas and not agent_obj.is_human_agent and \
+                    isinstance(getattr(agent_obj.get_action_func, '__self__', None), BW4TAgentBrain):
+                return self.__getStateDelta(agent_obj)
+            return GridWorld._GridWorld__get_agent_state(self, agent_obj)
+        if not self.__pool.hasDecided(agent_obj.obj_id):
+            self.__decideInParallel(agent_obj.obj_id)
+        # The brain got its state in its worker, the pool gives the GridWorld the result
+        return None
+
+    def __decideInParallel(self, agent_id:str):
+        '''
+        Lets the pool decide for the given agent, which is the next agent of the tick, and for the
+        agents after it whose state can not change anymore before the GridWorld gets to them.
+        Agents change their bodies only when the GridWorld gets to them: the agents that decide get
+        their new action, and busy agents may get another is_blocked_by_action. The actions
+        themselves are performed after all agents decided. So an agent can decide now if it
+        does not perceive any agent between the given agent and itself that may still change.
+        '''
+        tick = self.current_nr_ticks
+        bodies = list(self.registered_agents.values())
+        first = [body.obj_id for body in bodies].index(agent_id)
+
+        # The agents from the given agent on that may still change, and the ones that can decide now
+        changing:List[AgentBody] = []
+        deciding:List[AgentBody] = []
+        for body in bodies[first:]:
+            if self.__pool.isPooled(body.obj_id) and not self.__pool.hasDecided(body.obj_id) and \
+                    not any(self.__perceives(body, other) for other in changing):
+                deciding.append(body)
+            # Same as AgentBody._check_agent_busy, which we can not call as it sets is_blocked_by_action
+            busy = tick <= body.current_action_tick_started + body.current_action_duration_in_ticks
+            if not busy or busy != body.is_blocked:
+                changing.append(body)
+
+        objects:List[EnvObject] = list(self.environment_objects.values()) + list(self.registered_agents.values())
+        locations = np.array([obj.location for obj in objects], dtype=float)
+        type_masks:Dict[type, np.ndarray] = {}
+        properties:Dict[str, dict] = {}
+        tasks = []
+        for body in deciding:
+            perceived = self.__perceive(body, objects, locations, type_masks)
+            for obj_id, nr in perceived.items():
+                if obj_id not in properties:
+                    properties[obj_id] = objects[nr].properties
+            busy = tick <= body.current_action_tick_started + body.current_action_duration_in_ticks
+            agent_properties = None
+            if not busy:
+                agent_properties = body.properties
+                # as it will be when the GridWorld gets to the agent and finds it is not busy
+                agent_properties['is_blocked_by_action'] = False
+            tasks.append((body.obj_id, list(perceived), self.__getWorldInfo(body), agent_properties))
+        self.__pool.decide(properties, tasks)
+
+    def __getStateDelta(self, agent_obj:AgentBody) -> BW4TStateDelta:
+        '''
+        @return the state of the agent as the change since its previous state delta, see setStateDeltas
+        '''
+        tick, generation, objects, locations, type_masks, changed_ids = self.__getTickObjects()
+        perceived = self.__perceive(agent_obj, objects, locations, type_masks)
+
+        last_generation, last_ids = self.__agent_views.get(agent_obj.obj_id, (None, set()))
+        if last_generation == generation:
+            new_ids = perceived.keys() - last_ids
+        elif last_generation == generation - 1:
+            new_ids = (perceived.keys() - last_ids) | (perceived.keys() & changed_ids)
+        else:
+            new_ids = perceived.keys()
+        changed = {obj_id: self.__properties[obj_id] for obj_id in new_ids if obj_id in self.__properties}
+        # The agent bodies change every tick, also during the tick as the agents before this one decide
+        for obj_id in perceived.keys() & self.registered_agents.keys():
+            changed[obj_id] = self.registered_agents[obj_id].properties
+        self.__agent_views[agent_obj.obj_id] = (generation, set(perceived))
+        return BW4TStateDelta(list(perceived), changed, self.__getWorldInfo(agent_obj))
+
+    def __getTickObjects(self) -> tuple:
+        '''
+        Takes the properties of the environment objects that changed since the previous tick, once
+        per tick. The agents do not act until all of them decided, so the objects stay the same
+        while the agents get their states.
+        @return (tick, generation, objects, locations, type masks, changed ids), see __tick_objects
+        '''
+        tick = self.current_nr_ticks
+        if self.__tick_objects is not None and self.__tick_objects[0] == tick:
+            return self.__tick_objects
+
+        all_objs = self.environment_objects
+        changed_ids = set(all_objs) if self.__changed_ids is None else self.__changed_ids | self.__updating_ids
+        for obj_id in changed_ids:
+            if obj_id in all_objs:
+                self.__properties[obj_id] = all_objs[obj_id].properties
+            else:
+                self.__properties.pop(obj_id, None)
+        self.__changed_ids = set()
+
+        generation = 0 if self.__tick_objects is None else self.__tick_objects[1] + 1
+        objects:List[EnvObject] = list(all_objs.values()) + list(self.registered_agents.values())
+        locations = np.array([obj.location for obj in objects], dtype=float)
+        self.__tick_objects = (tick, generation, objects, locations, {}, changed_ids)
+        return self.__tick_objects
+
+    #override
+    def _GridWorld__perform_action(self, agent_id, action_name, action_kwargs, world_state):
+        agent_obj = self.registered_agents[agent_id]
+        carried = [obj.obj_id for obj in agent_obj.is_carrying]
+        result = GridWorld._GridWorld__perform_action(self, agent_id, action_name, action_kwargs, world_state)
+        for obj_id in carried + [obj.obj_id for obj in agent_obj.is_carrying] + [action_kwargs.get('object_id')]:
+            self.markChanged(obj_id)
+        return result
+
+    #override
+    def _register_env_object(self, env_object:EnvObject, ensure_unique_id=True):
+        obj_id = super()._register_env_object(env_object, ensure_unique_id)
+        self.markChanged(obj_id)
+        if type(env_object).update is not EnvObject.update:
+            self.__updating_ids.add(obj_id)
+        return obj_id
+
+    #override
+    def remove_from_grid(self, object_id, remove_from_carrier=True):
+        if object_id in self.registered_agents:
+            for obj in self.registered_agents[object_id].is_carrying:
+                self.markChanged(obj.obj_id)
+        self.markChanged(object_id)
+        self.__updating_ids.discard(object_id)
+        return super().remove_from_grid(object_id, remove_from_carrier)
+
+    def __perceives(self, agent:AgentBody, other:AgentBody) -> bool:
+        '''
+        @return True if the other agent is in the state of the agent, see GridWorld.__get_agent_state
+        '''
+        capabilities = agent.sense_capability.get_capabilities()
+        distance = get_distance(other.location, agent.location)
+        wildcard_range = capabilities.pop("*", None)
+        if wildcard_range is not None and type(other) not in capabilities and distance <= wildcard_range:
+            return True
+        return any(isinstance(other, obj_type) and distance <= sense_range
+                   for obj_type, sense_range in capabilities.items())
+
+    def __perceive(self, agent:AgentBody, objects:List[EnvObject], locations:np.ndarray,
+                   type_masks:Dict[type, np.ndarray]) -> Dict[str, int]:
+        '''
+        Finds the objects that the agent perceives, the same ones in the same order as
+        GridWorld.__get_agent_state, but with the distances of all objects computed at once.
+        @param objects the environment objects followed by the agents
+        @param locations array with the location of each of the objects
+        @param type_masks per object type an array that is True for the objects of that type,
+            filled when needed
+        @return dict with as key the id of a perceived object and as value its index in objects
+        '''
+        capabilities = agent.sense_capability.get_capabilities()
+        distances = np.sqrt(((locations - np.array(agent.location, dtype=float)) ** 2).sum(axis=1))
+
+        wildcard = []
+        if "*" in capabilities:
+            wildcard = np.flatnonzero(distances <= capabilities.pop("*"))
+
+        perceived:Dict[str, int] = {}
+        for obj_type, sense_range in capabilities.items():
+            if obj_type not in type_masks:
+                type_masks[obj_type] = np.array([isinstance(obj, obj_type) for obj in objects], dtype=bool)
+            for nr in np.flatnonzero(type_masks[obj_type] & (distances <= sense_range)):
+                perceived[objects[nr].obj_id] = nr
+        for nr in wildcard:
+            if type(objects[nr]) not in capabilities:
+                perceived[objects[nr].obj_id] = nr
+        return perceived
+
+    def __getWorldInfo(self, agent:AgentBody) -> dict:
+        '''
+        @return the world info in the state of the agent, see GridWorld.__get_agent_state
+        '''
+        return {
+            "nr_ticks": self.current_nr_ticks,
+            "curr_tick_timestamp": int(round(time.time() * 1000)),
+            "grid_shape": self.shape,
+            "tick_duration": self.tick_duration,
+            "team_members": [agent_id for agent_id, other in self.registered_agents.items() if agent.team == other.team],
+            "world_ID": self.world_id,
+            "vis_settings": {
+                "vis_bg_clr": self._GridWorld__visualization_bg_clr,
+                "vis_bg_img": self._GridWorld__visualization_bg_img
+            }
+        }
+
+    #override
+    def _GridWorld__validate_obj_placement(self, env_object:EnvObject):
+        loc = tuple(env_object.location)
+        all_objs = self.environment_objects
+        placed = [obj for obj in self.__placed.get(loc, []) if all_objs.get(obj.obj_id) is obj and tuple(obj.location) == loc]
+        self.__placed[loc] = placed
+
+        # Agents move around, so these are always checked like GridWorld does.
+        # Only intraversable objects can be placed wrongly.
+        if not env_object.is_traversable:
+            intraversable_objs = [obj.obj_id for obj in placed + list(self.registered_agents.values())
+                                  if tuple(obj.location) == loc and not obj.is_traversable
+                                  and AreaTile.__name__ not in obj.class_inheritance]
+            if len(intraversable_objs) > 0:
+                raise Exception(f"Invalid placement. Could not place object {env_object.obj_id} in grid, location already "
+                                f"occupied by intraversable object {intraversable_objs} at location {env_object.location}")
+
+        if not isinstance(env_object, AgentBody):
+            placed.append(env_object)
+
+
+class BW4TWorldBuilder(WorldBuilder):
+    '''
+    WorldBuilder that creates BW4TGridWorlds, so that
+    worlds with hundreds of rooms can be built quickly.
+    '''
+    #override
+    def _WorldBuilder__create_grid_world(self):
+        args = self.world_settings
+        # create a world ID in the shape of "world_" + world number, like WorldBuilder does
+        args['world_id'] = f"world_{self.worlds_created}"
+        return BW4TGridWorld(**args)
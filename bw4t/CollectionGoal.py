@@ -1,4 +1,5 @@
 import numpy as np # type: ignore
+from typing import Dict, List
 
 from matrx.goals import WorldGoal # type: ignore
 from matrx.grid_world import GridWorld # type: ignore
@@ -17,16 +18,45 @@ class CollectionGoal(WorldGoal):
         super().__init__()
         self.max_nr_ticks = max_nr_ticks
 
-        # A dictionary of all drop locations. The keys is the drop zone number, the value another dict.
-        # This dictionary contains as key the rank of the to be collected object and as value the location
-        # of where it should be dropped, the shape and colour of the block, and the tick number the correct
-        # block was delivered. The rank and tick number is there so we can check if objects are dropped in
-        # the right order.
-        self.__drop_off:dict = {}
+        # The drop zones as arrays so that all zones and ranks are checked at once. Row i describes the zone with
+        # number __zone_nrs[i], column j its rank j. __ticks holds the tick number the correct block was delivered
+        # at that rank (nan if there is none), which is there so we can check if objects are dropped in the right
+        # order. Zones with fewer ranks than the longest zone are padded with nan, which never counts as placed.
+        self.__zone_nrs:list = []
+        self.__nr_ranks = np.zeros(0, dtype=int)
+        self.__ticks = np.zeros((0, 0))
+
+        # An index from each drop tile location to its (zone index, rank, shape, colour), and the ids of the
+        # collectable blocks currently lying on each drop tile (in the order they were put there) plus the reverse
+        # mapping.
+        self.__drop_tiles:dict = {}
+        self.__tile_blocks:dict = {}
+        self.__block_tile:dict = {}
 
         # We also track the progress
         self.__progress = 0
 
+        # The progress at each tick (index is the tick number), the tick at which each rank of each zone was first
+        # satisfied (same shape as __ticks, nan if never) and the tick at which the n-th block (over all zones) was
+        # first placed in the right order.
+        self.__progress_series:list = []
+        self.__first_ticks = np.zeros((0, 0))
+        self.__block_ticks:list = []
+        self.__nr_blocks_placed = 0
+
+        # The drop zone only changes when a block is grabbed from or dropped on it, or when objects are removed from
+        # or added to the world, so the result of the last check is cached. We detect Grab/Drop events by comparing
+        # what the agents carry with the previous tick, removals by checking the few blocks on drop tiles against the
+        # world, and additions by comparing the number of objects and the last added object. Only the drop tiles
+        # touched by those events are looked at again.
+        self.__carried:set = set()
+        self.__nr_objs = 0
+        self.__last_obj_id = None
+        self.__changed_tiles:set = set()
+        self.__needs_check = True
+        self.__is_satisfied = False
+        self.__zone_progress = np.zeros(0, dtype=int)
+
     #override
     def goal_reached(self, grid_world: GridWorld):
         if grid_world.current_nr_ticks >= self.max_nr_ticks:
@@ -38,16 +68,150 @@ class CollectionGoal(WorldGoal):
         @return true if all blocks have been placed in right order
         '''
 
-        if self.__drop_off =={}:  # find all drop off locations, its tile ID's and goal blocks
+        if self.__drop_tiles =={}:  # find all drop off locations, its tile ID's and goal blocks
             self.__find_drop_off_locations(grid_world)
 
-        # Go through each drop zone, and check if the blocks are there in the right order
-        is_satisfied, progress = self.__check_completion(grid_world)
+        # Only go through the drop zones if a block was grabbed from or dropped on one, otherwise nothing changed
+        if self.__needs_check:
+            self.__collect_drop_tile_blocks(grid_world)
+            self.__changed_tiles = set(self.__drop_tiles.keys())
+        if self.__drop_zone_changed(grid_world) or self.__needs_check:
+            tiles = self.__changed_tiles
+            self.__needs_check = False
+
+            # Go through the changed drop tiles, and check if the blocks are there in the right order
+            self.__is_satisfied, self.__zone_progress = self.__check_completion(grid_world, tiles)
+            progress = int(self.__zone_progress.sum())
+
+            # Progress in percentage
+            self.__nr_blocks_placed = progress
+            self.__progress = progress / self.__nr_ranks.sum()
+
+        self.__record_progress(grid_world.current_nr_ticks)
+        return self.__is_satisfied
+
+    def invalidate(self):
+        '''
+        Forces the next check to look for blocks on all drop tiles again. Only needed when
+        blocks are moved on or off a drop zone other than through Grab/Drop actions or by
+        removing or adding objects, eg when a block is moved to another location.
+        '''
+        self.__needs_check = True
+
+    def getProgress(self) -> float:
+        '''
+        @return fraction of the goal blocks that are placed in the right order, as of the last check
+        '''
+        return self.__progress
+
+    def getNrBlocksPlaced(self) -> int:
+        '''
+        @return number of goal blocks (summed over all zones) that are placed in the right order,
+        as of the last check
+        '''
+        return self.__nr_blocks_placed
+
+    def getProgressSeries(self) -> List[float]:
+        '''
+        @return the progress fraction per tick, the index being the tick number
+        '''
+        return list(self.__progress_series)
+
+    def getRankTicks(self) -> Dict[int, Dict[int, int]]:
+        '''
+        @return dict with as key the zone nr and as value a dict from rank to the tick at which
+        that rank (and all ranks below it) was first satisfied. Ranks never satisfied are absent.
+        '''
+        return {zone_nr: {rank: int(tick) for rank, tick in enumerate(ticks) if not np.isnan(tick)}
+                for zone_nr, ticks in zip(self.__zone_nrs, self.__first_ticks)}
+
+    def getTicksToBlocks(self) -> List[int]:
+        '''
+        @return list of ticks, element n being the tick at which n+1 blocks were first placed in the right order
+        (ticks-to-first-block, ticks-to-second-block, ...)
+        '''
+        return list(self.__block_ticks)
+
+    def __record_progress(self, tick:int):
+        # isBlocksPlaced is called several times per tick (goal check, logger), keep only the latest value per tick
+        del self.__progress_series[tick:]
+        last = self.__progress_series[-1] if self.__progress_series else 0
+        self.__progress_series.extend([last] * (tick - len(self.__progress_series)))
+        self.__progress_series.append(self.__progress)
 
-        # Progress in percentage
-        self.__progress = progress / sum([len(goal_blocks)\
-            for goal_blocks in self.__drop_off.values()])
-        return is_satisfied
+        # All ranks below the zone's progress are satisfied, store the tick for those seen for the first time
+        ranks = np.arange(self.__first_ticks.shape[1])
+        first_time = (ranks < self.__zone_progress[:, None]) & np.isnan(self.__first_ticks)
+        self.__first_ticks[first_time] = tick
+
+        while len(self.__block_ticks) < self.__nr_blocks_placed:
+            self.__block_ticks.append(tick)
+
+    def __drop_zone_changed(self, grid_world:GridWorld) -> bool:
+        '''
+        Updates the blocks per drop tile with the blocks grabbed, dropped, removed and added since the previous call.
+        @return true if a block was grabbed from, dropped on, removed from or added to a drop tile
+        '''
+        all_objs = grid_world.environment_objects
+        carried = {obj.obj_id for agent_body in grid_world.registered_agents.values()
+                   for obj in agent_body.is_carrying}
+        # Removed from a drop tile other than by grabbing it (eg RemoveObject)
+        removed = [obj_id for obj_id in self.__block_tile if obj_id not in all_objs and obj_id not in carried]
+        # MATRX appends added and dropped objects to the environment objects, so this also notices an addition in the
+        # same tick as a removal
+        last_obj_id = next(reversed(all_objs), None)
+        if carried == self.__carried and len(all_objs) == self.__nr_objs and last_obj_id == self.__last_obj_id \
+                and len(removed) == 0:
+            return False
+
+        # Blocks that were picked up or put down since the previous call. A grabbed block leaves the environment
+        # objects until it is dropped, so any other difference in the number of objects was a removal or addition.
+        moved = carried ^ self.__carried
+        dropped = self.__carried - carried
+        unexplained = len(all_objs) - self.__nr_objs - len(dropped) + len(carried - self.__carried)
+        added = unexplained > 0 or (last_obj_id != self.__last_obj_id and last_obj_id not in dropped)
+        self.__carried = carried
+        self.__nr_objs = len(all_objs)
+        self.__last_obj_id = last_obj_id
+
+        if not self.__needs_check:
+            self.__changed_tiles = set()
+        for obj_id in moved:
+            # Grabbed from a drop tile
+            if obj_id in self.__block_tile:
+                self.__remove_from_drop_tile(obj_id)
+            # Dropped on a drop tile
+            if obj_id in all_objs and self.__add_if_on_drop_tile(all_objs[obj_id]):
+                self.__changed_tiles.add(tuple(all_objs[obj_id].location))
+
+        for obj_id in removed:
+            self.__remove_from_drop_tile(obj_id)
+        if added:
+            # Added other than by dropping it, which can be anywhere, so look at all drop tiles again
+            self.__collect_drop_tile_blocks(grid_world)
+            self.__changed_tiles = set(self.__drop_tiles.keys())
+        return len(self.__changed_tiles) > 0
+
+    def __remove_from_drop_tile(self, obj_id:str):
+        '''
+        Removes the block from the blocks of its drop tile, and marks the tile as changed.
+        '''
+        loc = self.__block_tile.pop(obj_id)
+        self.__tile_blocks[loc].remove(obj_id)
+        self.__changed_tiles.add(loc)
+
+    def __add_if_on_drop_tile(self, obj:EnvObject) -> bool:
+        '''
+        Adds the object to the blocks of its drop tile if it is a collectable block lying on one.
+        @return true if the object was added
+        '''
+        loc = tuple(obj.location)
+        if loc not in self.__drop_tiles or not obj.properties.get("is_collectable", False) \
+                or obj.obj_id in self.__block_tile:
+            return False
+        self.__tile_blocks[loc].append(obj.obj_id)
+        self.__block_tile[obj.obj_id] = loc
+        return True
 
     def __find_drop_off_locations(self, grid_world:GridWorld):
 
@@ -62,81 +226,68 @@ class CollectionGoal(WorldGoal):
                     else:
                         goal_blocks[zone_nr] = [obj]
 
-        self.__drop_off:dict = {}
-        for zone_nr in goal_blocks.keys():  # go through all drop of zones and fill the drop_off dict
-            # Instantiate the zone's dict.
-            self.__drop_off[zone_nr] = {}
-
-            # Obtain the zone's goal blocks.
-            blocks = goal_blocks[zone_nr].copy()
+        # The number of blocks is the max number blocks to collect for each zone.
+        self.__zone_nrs = sorted(goal_blocks.keys())
+        self.__nr_ranks = np.array([len(goal_blocks[zone_nr]) for zone_nr in self.__zone_nrs], dtype=int)
+        max_rank = int(self.__nr_ranks.max()) if len(self.__zone_nrs) > 0 else 0
+        self.__ticks = np.full((len(self.__zone_nrs), max_rank), np.nan)
+        self.__first_ticks = np.full((len(self.__zone_nrs), max_rank), np.nan)
+        self.__zone_progress = np.zeros(len(self.__zone_nrs), dtype=int)
 
-            # The number of blocks is the maximum the max number blocks to collect for this zone.
-            max_rank = len(blocks)
-
-            # Find the 'bottom' location
-            bottom_loc = (-np.inf, -np.inf)
+        for zone_idx, zone_nr in enumerate(self.__zone_nrs):  # go through all drop of zones and fill the index
+            # Obtain the zone's goal blocks, the rank is the distance from the 'bottom' location
+            blocks = goal_blocks[zone_nr]
+            bottom_y = max(block.location[1] for block in blocks)
             for block in blocks:
-                if block.location[1] > bottom_loc[1]:
-                    bottom_loc = block.location
-
-            # Now loop through blocks lists and add them to their appropriate ranks
-            for rank in range(max_rank):
-                loc = (bottom_loc[0], bottom_loc[1] - rank)
+                loc = tuple(block.location)
+                rank = bottom_y - loc[1]
+                self.__drop_tiles[loc] = (zone_idx, rank, block.visualize_shape, block.visualize_colour)
 
-                # find the block at that location
-                for block in blocks:
-                    if block.location == loc:
-                        # Add to self.drop_off
-                        self.__drop_off[zone_nr][rank] = [loc, block.visualize_shape, block.visualize_colour, None]
+    def __collect_drop_tile_blocks(self, grid_world:GridWorld):
+        '''
+        Finds the blocks that lie on a drop tile by going through all objects. After this the index
+        is kept up to date by Grab/Drop events and objects removed from or added to the world.
+        '''
+        self.__tile_blocks = {loc: [] for loc in self.__drop_tiles.keys()}
+        self.__block_tile = {}
+        for obj in grid_world.environment_objects.values():
+            self.__add_if_on_drop_tile(obj)
+        self.__carried = {obj.obj_id for agent_body in grid_world.registered_agents.values()
+                          for obj in agent_body.is_carrying}
+        self.__nr_objs = len(grid_world.environment_objects)
+        self.__last_obj_id = next(reversed(grid_world.environment_objects), None)
 
-    def __check_completion(self, grid_world:GridWorld):
+    def __check_completion(self, grid_world:GridWorld, tiles):
         # Get the current tick number
         curr_tick = grid_world.current_nr_ticks
+        all_objs = grid_world.environment_objects
+
+        # Go through the given drop tiles, check the blocks and set the tick if satisfied
+        for loc in tiles:
+            zone_idx, rank, shape, colour = self.__drop_tiles[loc]
+            block_ids = self.__tile_blocks[loc]
+
+            # Blocks that are gone without an event that we noticed are dropped from the index
+            while len(block_ids) > 0 and block_ids[0] not in all_objs:
+                del self.__block_tile[block_ids.pop(0)]
+
+            # Check if there is a block, and if so if it is the right one and the tick is not yet set, then set the
+            # current tick.
+            if len(block_ids) > 0:
+                block = all_objs[block_ids[0]]
+                if block.visualize_shape == shape and block.visualize_colour == colour and \
+                        np.isnan(self.__ticks[zone_idx, rank]):
+                    self.__ticks[zone_idx, rank] = curr_tick
+            # if there is no block, reset its tick
+            else:
+                self.__ticks[zone_idx, rank] = np.nan
+
+        # Now check for all zones at once if the blocks are collected in the right order: a rank is in order if its
+        # block is there and was delivered after the block of the rank below it. The progress of a zone is the
+        # number of ranks in order before the first one that is not (nan never compares as in order).
+        in_order = ~np.isnan(self.__ticks)
+        in_order[:, 1:] &= self.__ticks[:, 1:] > self.__ticks[:, :-1]
+        zone_progress = np.cumprod(in_order, axis=1).sum(axis=1)
 
-        # loop through all zones, check the blocks and set the tick if satisfied
-        for zone_nr, goal_blocks in self.__drop_off.items():
-            # Go through all ranks of this drop off zone
-            for rank, block_data in goal_blocks.items():
-                loc = block_data[0]  # the location, needed to find blocks here
-                shape = block_data[1]  # the desired shape
-                colour = block_data[2]  # the desired colour
-                tick = block_data[3]
-
-                # Retrieve all objects, the object ids at the location and obtain all BW4T Blocks from it
-                all_objs = grid_world.environment_objects
-                obj_ids = grid_world.get_objects_in_range(loc, object_type=EnvObject, sense_range=0)
-                blocks = [all_objs[obj_id] for obj_id in obj_ids
-                          if obj_id in all_objs.keys() and "is_collectable" in all_objs[obj_id].properties.keys()]
-                blocks = [b for b in blocks if b.properties["is_collectable"]]
-
-                # Check if there is a block, and if so if it is the right one and the tick is not yet set, then set the
-                # current tick.
-                if len(blocks) > 0 and blocks[0].visualize_shape == shape and blocks[0].visualize_colour == colour and \
-                        tick is None:
-                    self.__drop_off[zone_nr][rank][3] = curr_tick
-                # if there is no block, reset its tick to None
-                elif len(blocks) == 0:
-                    self.__drop_off[zone_nr][rank][3] = None
-
-        # Now check if all blocks are collected in the right order
-        is_satisfied = True
-        progress = 0
-        for zone_nr, goal_blocks in self.__drop_off.items():
-            zone_satisfied = True
-            ticks = [goal_blocks[r][3] for r in range(len(goal_blocks))]  # list of ticks in rank order
-
-            # check if all ticks are increasing
-            for idx, tick in enumerate(ticks[:-1]):
-                if tick is None or ticks[idx+1] is None or not tick < ticks[idx+1]:
-                    progress += (idx+1) if tick is not None else idx  # increment progress
-                    zone_satisfied = False  # zone is not complete or ordered
-                    break  # break this loop
-
-            # if all ticks were increasing, check if the last tick is set and set progress to full for this zone
-            if zone_satisfied and ticks[-1] is not None:
-                progress += len(goal_blocks)
-
-            # update our satisfied boolean
-            is_satisfied = is_satisfied and zone_satisfied
-
-        return is_satisfied, progress
\ No newline at end of file
+        is_satisfied = bool(np.all(zone_progress == self.__nr_ranks))
+        return is_satisfied, zone_progress
@@ -19,6 +19,11 @@ class Statistics:
 
         done is True only in the last row.
         drops contains number of drops IN DROP ZONE.
+        progress and blocks_placed (if present) contain the fraction and
+        number of goal blocks placed in the right order at that tick.
+        <agent>_sent and <agent>_suppressed (if present) contain the number of
+        messages the agent sent and suppressed (duplicates, rate limits) so far.
+        <agent>_bytes (if present) contains the number of bytes the agent sent so far.
         '''
         self._filename=filename
         self._contents=self._read()
@@ -60,13 +65,25 @@ class Statistics:
         self._moves={agent:0 for agent in agents}
         self._messages={agent:0 for agent in agents}
         self._drops={agent:0 for agent in agents}
+        self._sent={agent:0 for agent in agents}
+        self._suppressed={agent:0 for agent in agents}
+        self._bytes={agent:0 for agent in agents}
+        self._ticks_to_blocks:List[int]=[]
         for row in self._contents:
+            if 'blocks_placed' in row:
+                while len(self._ticks_to_blocks) < int(row['blocks_placed']):
+                    self._ticks_to_blocks.append(int(row['tick_nr']))
             for agent in agents:
                 if row[agent+'_acts']  in MOVES:
                     self._moves[agent] += 1
                 if 'DropObject'==row[agent+'_acts']:
                     self._drops[agent]+=1
                 self._messages[agent] = row[agent+'_mssg']
+                if agent+'_sent' in row:
+                    self._sent[agent] = int(row[agent+'_sent'])
+                    self._suppressed[agent] = int(row[agent+'_suppressed'])
+                if agent+'_bytes' in row:
+                    self._bytes[agent] = int(row[agent+'_bytes'])
                 
     def getLastTick(self):
         '''
@@ -74,6 +91,20 @@ class Statistics:
         '''
         return self._contents[-1]['tick_nr']        
     
+    def getTicksToBlocks(self)->List[int]:
+        '''
+        @return list of tick nrs, element n being the tick at which n+1 goal
+        blocks were first placed in the right order (ticks-to-first-block,
+        ticks-to-second-block, ...). Empty for logs without progress columns.
+        '''
+        return self._ticks_to_blocks
+
+    def getProgress(self)->float:
+        '''
+        @return progress field of last row, 0 for logs without progress columns
+        '''
+        return float(self._contents[-1].get('progress', 0))
+
     def isSucces(self):
         '''
         return 'done' field of last row 
@@ -97,7 +128,12 @@ class Statistics:
         return "Statistics for "+self._filename\
             +"\nagents:"+str(self.getAgents())\
             +"\nsuccess:"+str(self.isSucces())\
+            +"\nprogress:"+str(self.getProgress())\
+            +"\nticks to blocks:"+str(self.getTicksToBlocks())\
             +"\nmessages:"+str(self._messages)\
+            +"\nmessages sent:"+str(self._sent)\
+            +"\nmessages suppressed:"+str(self._suppressed)\
+            +"\nbytes sent:"+str(self._bytes)\
             +"\ndrops:"+str(self._drops)\
             +"\nmoves:"+str(self._moves)\
             +"\ntotal moves:"+str(sum(self._moves.values()))\
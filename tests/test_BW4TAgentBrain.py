@@ -0,0 +1,117 @@
+import unittest
+from matrx.agents.agent_utils.state import State # type: ignore
+from matrx.messages import Message # type: ignore
+from agents1.BW4TBaselineAgent import BaseLineAgent
+from bw4t.BW4TAgentBrain import BW4TAgentBrain
+from bw4t.BW4THumanBrain import HumanBrain
+from bw4t.BW4TMessages import BW4TMessage, Found, MovingTo
+
+
+class RecordingBrain(BW4TAgentBrain):
+    '''
+    Records the new messages it gets for each decision.
+    '''
+    def decide_on_action(self, state):
+        self.decided_with = (list(self.new_messages), dict(self.new_messages_by_sender))
+        return None, {}
+
+
+class TestInbox(unittest.TestCase):
+
+    def setUp(self):
+        self.brain = RecordingBrain(message_history=3)
+        self.brain.agent_id = 'me'
+        self.brain.initialize()
+        self.tick = 0
+
+    def receive(self, sender, *contents):
+        messages = [Message(content, from_id=sender, to_id='me') for content in contents]
+        self.brain._set_messages(messages)
+        return messages
+
+    def decide(self):
+        self.tick += 1
+        state = State(own_id='me')
+        state.state_update({'World': {'nr_ticks': self.tick}, 'me': {'obj_id': 'me'}})
+        self.brain._get_action(state, {}, 'me')
+        return self.brain.decided_with
+
+    def test_history_is_bounded(self):
+        messages = self.receive('a', 'one', 'two') + self.receive('b', 'three', 'four')
+        self.assertEqual(messages[1:], list(self.brain.received_messages))
+        self.assertEqual(['one', 'two'], list(self.brain.received_messages_by_sender['a']))
+        self.receive('a', 'five', 'six')
+        self.assertEqual(['two', 'five', 'six'], list(self.brain.received_messages_by_sender['a']))
+        self.assertEqual(['three', 'four'], list(self.brain.received_messages_by_sender['b']))
+
+    def test_unbounded_history(self):
+        self.brain = RecordingBrain()
+        self.brain.agent_id = 'me'
+        self.brain.initialize()
+        self.receive('a', *[str(nr) for nr in range(100)])
+        self.assertEqual(100, len(self.brain.received_messages))
+
+    def test_inbox_becomes_new_messages_at_the_decision(self):
+        first = self.receive('a', 'one')
+        # Not yet new before the next decision
+        self.assertEqual([], self.brain.new_messages)
+        self.assertEqual((first, {'a': ['one']}), self.decide())
+
+        second = self.receive('b', 'two') + self.receive('a', 'three')
+        self.assertEqual((second, {'b': ['two'], 'a': ['three']}), self.decide())
+        # Nothing received since the previous decision
+        self.assertEqual(([], {}), self.decide())
+        self.assertEqual(first + second, list(self.brain.received_messages))
+
+    def test_new_messages_are_bounded_by_the_decision_not_the_history(self):
+        messages = self.receive('a', 'one', 'two', 'three', 'four', 'five')
+        self.assertEqual((messages, {'a': ['one', 'two', 'three', 'four', 'five']}), self.decide())
+
+    def test_typed_contents_are_unpacked_per_sender(self):
+        message = BW4TMessage(Found('#0008ff', 1, (2, 3)), from_id='a', to_id='me')
+        message.pack()
+        self.brain._set_messages([message])
+        self.assertEqual([Found('#0008ff', 1, (2, 3))], list(self.brain.received_messages_by_sender['a']))
+        self.assertEqual({'a': [Found('#0008ff', 1, (2, 3))]}, self.decide()[1])
+
+    def test_texts_of_typed_contents_are_read_as_typed_contents(self):
+        messages = self.receive('a', 'Moving to door of room_1', 'hello')
+        self.assertEqual([MovingTo('room_1'), 'hello'], list(self.brain.received_messages_by_sender['a']))
+        # The messages themselves are kept as they were sent
+        self.assertEqual(['Moving to door of room_1', 'hello'], [message.content for message in messages])
+
+    def test_initialize_clears_the_messages(self):
+        self.receive('a', 'one')
+        self.decide()
+        self.receive('a', 'two')
+        self.brain.initialize()
+        self.assertEqual(0, len(self.brain.received_messages))
+        self.assertEqual({}, self.brain.received_messages_by_sender)
+        self.assertEqual(([], {}), self.decide())
+
+
+class TestHumanInbox(unittest.TestCase):
+
+    def test_typed_contents_reach_the_human_as_text(self):
+        brain = HumanBrain()
+        brain.agent_id = 'human'
+        message = BW4TMessage(Found('#0008ff', 1, (2, 3)), from_id='a', to_id='human')
+        message.pack()
+        brain._set_messages([message, Message('hello', from_id='b', to_id='human')])
+        self.assertEqual(["Found goal block {'colour': '#0008ff', 'shape': 1} at location (2, 3)", 'hello'],
+                         brain.received_messages)
+
+
+class TestBaselineTrust(unittest.TestCase):
+
+    def test_trust_is_kept_between_decisions(self):
+        agent = BaseLineAgent({})
+        self.assertEqual({'a': 0.5, 'b': 0.5}, agent._trustBlief(['a', 'b'], {'a': [], 'b': ['Moving to room_1']}))
+        self.assertEqual({'a': 0.4, 'b': 0.5}, agent._trustBlief(['a', 'b'], {'a': ['Found block'], 'b': []}))
+        # The message is not new anymore, the member keeps its trust, and loses trust once
+        self.assertEqual({'a': 0.4, 'b': 0.5}, agent._trustBlief(['a', 'b'], {'a': [], 'b': []}))
+        self.assertEqual({'a': 0.4, 'b': 0.5}, agent._trustBlief(['a', 'b'], {'a': ['Found block'], 'b': []}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+import unittest
+from collections import deque
+import numpy as np # type: ignore
+from matrx.agents.agent_utils.navigator import get_move_actions # type: ignore
+from matrx.objects import AreaTile, Door # type: ignore
+from bw4t.BW4TLayout import BW4TLayout, LayoutTracker, distanceField, sweepTour
+from bw4t.BW4TNavigator import FieldNavigator
+from bw4t.BW4TWorld import BW4TWorld, DEFAULT_WORLDSETTINGS
+
+
+def small_layout() -> BW4TLayout:
+    '''
+    @return a 9x7 world with walls around it and a wall across at y=3 with two doors in it,
+        at (2,3) and (6,3), and a drop zone of two tiles at x=4 in the bottom row and the one above
+    '''
+    walls = np.zeros((9, 7), dtype=bool)
+    walls[0, :] = walls[-1, :] = walls[:, 0] = walls[:, -1] = True
+    walls[:, 3] = True
+    doors = {'door_a': (2, 3), 'door_b': (6, 3)}
+    walls[2, 3] = walls[6, 3] = False
+    return BW4TLayout((9, 7), walls, doors, {0: [(4, 5), (4, 4)]}, [(1, 1)])
+
+
+def door(door_id, location, is_open):
+    return {'obj_id': door_id, 'location': location, 'is_open': is_open, 'class_inheritance': ['Door', 'EnvObject']}
+
+
+def agent(agent_id, location):
+    return {'obj_id': agent_id, 'location': location, 'class_inheritance': ['AgentBody', 'EnvObject']}
+
+
+class TestLayoutTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.layout = small_layout()
+        self.tracker = LayoutTracker('me', self.layout)
+
+    def check_same_as_map(self):
+        occupancy, _ = self.tracker.get_traversability_map(inverted=True)
+        for x in range(9):
+            for y in range(7):
+                self.assertEqual(bool(occupancy[x, y]), self.tracker.isBlocked((x, y)), (x, y))
+
+    def test_closed_doors_are_blocked(self):
+        self.tracker.update({'me': agent('me', (1, 1)), 'door_a': door('door_a', (2, 3), False)})
+        self.assertTrue(self.tracker.isBlocked((2, 3)))
+        self.assertTrue(self.tracker.isBlocked([6, 3]))
+        self.assertFalse(self.tracker.isBlocked((1, 2)))
+        self.check_same_as_map()
+
+    def test_open_doors_and_agents(self):
+        self.tracker.update({'me': agent('me', (1, 1)), 'door_a': door('door_a', (2, 3), True),
+                             'other': agent('other', (5, 5))})
+        self.assertFalse(self.tracker.isBlocked((2, 3)))
+        self.assertTrue(self.tracker.isBlocked((5, 5)))
+        self.assertFalse(self.tracker.isBlocked((1, 1)))
+        self.assertEqual(frozenset({'door_a'}), self.tracker.getSignature())
+        self.check_same_as_map()
+
+    def test_doors_keep_their_last_known_status(self):
+        self.tracker.update({'me': agent('me', (1, 1)), 'door_a': door('door_a', (2, 3), True),
+                             'door_b': door('door_b', (6, 3), True)})
+        # door_b is out of sight, door_a is closed again
+        self.tracker.update({'me': agent('me', (1, 2)), 'door_a': door('door_a', (2, 3), False)})
+        self.assertTrue(self.tracker.isBlocked((2, 3)))
+        self.assertFalse(self.tracker.isBlocked((6, 3)))
+        self.check_same_as_map()
+
+
+
+def queue_distances(free:np.ndarray, target:tuple) -> np.ndarray:
+    '''
+    @return the distance field of distanceField, with a breadth first search over a queue
+    '''
+    moves = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)]
+    field = np.full(free.shape, -1, dtype=int)
+    field[target] = 0
+    queue = deque([target])
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in moves:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < free.shape[0] and 0 <= ny < free.shape[1] and free[nx, ny] and field[nx, ny] == -1:
+                field[nx, ny] = field[x, y] + 1
+                queue.append((nx, ny))
+    return field
+
+
+class TestDistanceField(unittest.TestCase):
+
+    def test_same_as_queue_search(self):
+        rng = np.random.default_rng(1)
+        for _ in range(50):
+            free = rng.random((int(rng.integers(1, 20)), int(rng.integers(1, 20)))) < 0.7
+            target = (int(rng.integers(free.shape[0])), int(rng.integers(free.shape[1])))
+            np.testing.assert_array_equal(queue_distances(free, target), distanceField(free, target))
+
+    def test_unreachable_tiles(self):
+        free = ~small_layout().getOccupancy().astype(bool)
+        field = distanceField(free, (1, 1))
+        self.assertEqual(-1, field[1, 5])
+        self.assertEqual(-1, field[0, 0])
+        self.assertEqual(3, field[4, 2])
+
+
+ALL_MOVES = get_move_actions(['MoveNorth', 'MoveNorthEast', 'MoveEast', 'MoveSouthEast', 'MoveSouth',
+                              'MoveSouthWest', 'MoveWest', 'MoveNorthWest'])
+
+
+class TestFieldNavigator(unittest.TestCase):
+
+    def setUp(self):
+        self.layout = small_layout()
+        self.tracker = LayoutTracker('me', self.layout)
+        self.navigator = FieldNavigator('me', [name for name in ALL_MOVES if name is not None], self.layout)
+
+    def walk(self, start, others, max_steps=20) -> list:
+        '''
+        Moves the agent with the navigator from start, with both doors open and the other agents standing still.
+        @return the locations of the agent on its way, the start first
+        '''
+        way = [start]
+        objects = {'door_a': door('door_a', (2, 3), True), 'door_b': door('door_b', (6, 3), True)}
+        objects.update({f'other{nr}': agent(f'other{nr}', loc) for nr, loc in enumerate(others)})
+        for _ in range(max_steps):
+            self.tracker.update({'me': agent('me', way[-1]), **objects})
+            action = self.navigator.get_move_action(self.tracker)
+            if action is None:
+                return way
+            dx, dy = ALL_MOVES[action]
+            way.append((way[-1][0] + dx, way[-1][1] + dy))
+            self.assertFalse(self.tracker.isBlocked(way[-1]), way)
+        self.fail(f"No way after {max_steps} steps: {way}")
+
+    def shortest(self, start, target) -> int:
+        '''
+        @return the number of moves from start to target with both doors open
+        '''
+        free = ~self.layout.getOccupancy().astype(bool)
+        for loc in self.layout.getDoors().values():
+            free[loc] = True
+        return queue_distances(free, target)[start]
+
+    def test_to_key_tile_along_the_field(self):
+        # The tile in front of door_a is a key tile
+        self.navigator.add_waypoints([(2, 4)])
+        way = self.walk((1, 1), [])
+        self.assertEqual((2, 4), way[-1])
+        self.assertEqual(self.shortest((1, 1), (2, 4)), len(way) - 1)
+
+    def test_to_other_tile_along_the_cached_path(self):
+        self.navigator.add_waypoints([(7, 5)])
+        way = self.walk((1, 1), [])
+        self.assertEqual((7, 5), way[-1])
+        self.assertEqual(self.shortest((1, 1), (7, 5)), len(way) - 1)
+
+    def test_around_an_agent_in_the_next_hop(self):
+        # The other agent stands in door_a, the shortest way, so A* goes through door_b
+        self.navigator.add_waypoints([(2, 4)])
+        way = self.walk((1, 1), [(2, 3)])
+        self.assertEqual((2, 4), way[-1])
+        self.assertIn((6, 3), way)
+
+    def test_no_way(self):
+        # Both doors are taken, the agent stops when it finds the next hop blocked
+        self.navigator.add_waypoints([(2, 4)])
+        way = self.walk((1, 1), [(2, 3), (6, 3)])
+        self.assertNotEqual((2, 4), way[-1])
+        self.assertTrue(self.navigator.get_move_action(self.tracker) is None)
+
+
+
+def room_of_world(room_size) -> tuple:
+    '''
+    @return the area tiles of the first room of a world with rooms of the given size, and the location
+        where an agent is after entering the room: two moves north from the tile in front of the door.
+    '''
+    world = BW4TWorld([], dict(DEFAULT_WORLDSETTINGS, room_size=room_size))
+    objects = world.getGridWorld().environment_objects.values()
+    tiles = [tuple(obj.location) for obj in objects
+             if isinstance(obj, AreaTile) and obj.properties.get('room_name') == 'room_0']
+    door_x, door_y = next(obj.location for obj in objects
+                          if isinstance(obj, Door) and obj.properties['room_name'] == 'room_0')
+    return tiles, (door_x, door_y - 1)
+
+
+def unseen(tiles, start, tour, sense_range) -> set:
+    '''
+    @return the tiles that are not within the sense range of the start or a waypoint of the tour
+    '''
+    return {(x, y) for x, y in tiles
+            if all((x - wx) ** 2 + (y - wy) ** 2 > sense_range ** 2 for wx, wy in [start] + list(tour))}
+
+
+class TestSweepTour(unittest.TestCase):
+
+    def check_exact(self, tiles, start, sense_range) -> list:
+        '''
+        @return the tour, after checking that it sees all tiles, with one move between its waypoints
+        '''
+        tour = sweepTour(tiles, start, sense_range)
+        self.assertEqual(set(), unseen(tiles, start, tour, sense_range))
+        for (x, y), (nx, ny) in zip([start] + tour, tour):
+            self.assertEqual(1, max(abs(nx - x), abs(ny - y)))
+            self.assertIn((nx, ny), tiles)
+        return tour
+
+    def test_default_room(self):
+        tiles, start = room_of_world((6, 4))
+        x, y = start
+        old_route = [(x, y - 1), (x - 1, y - 1), (x - 1, y)]
+        # At sense range 1 the old route was already a shortest sweep, at range 2 one move is enough
+        self.assertEqual(len(old_route), len(self.check_exact(tiles, start, 1)))
+        self.assertEqual(1, len(self.check_exact(tiles, start, 2)))
+
+    def test_old_route_misses_tiles_of_larger_rooms(self):
+        tiles, start = room_of_world((8, 6))
+        x, y = start
+        old_route = [(x, y - 1), (x - 1, y - 1), (x - 1, y)]
+        self.assertNotEqual(set(), unseen(tiles, start, old_route, 1))
+        for sense_range in [1, 1.5, 2, 3]:
+            self.check_exact(tiles, start, sense_range)
+
+    def test_start_outside_the_tiles(self):
+        tiles = [(x, y) for x in range(1, 5) for y in range(1, 3)]
+        self.check_exact(tiles, (3, 3), 1)
+
+    def test_same_tour_for_the_same_room_shape(self):
+        tiles = [(x, y) for x in range(1, 5) for y in range(1, 3)]
+        tour = sweepTour(tiles, (3, 2), 1)
+        moved = sweepTour([(x + 10, y + 20) for x, y in tiles], (13, 22), 1)
+        self.assertEqual([(x + 10, y + 20) for x, y in tour], moved)
+
+    def test_greedy_sweep_of_a_large_room(self):
+        tiles = [(x, y) for x in range(40) for y in range(20)]
+        with self.assertWarns(UserWarning):
+            tour = sweepTour(tiles, (20, 19), 1)
+        self.assertEqual(set(), unseen(tiles, (20, 19), tour, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from bw4t.BW4TMessages import BW4TMessage, COLOUR_PALETTE, Distrust, Dropped, Found, MovingTo, Opening, \
+    PickingUp, Searching, fromBytes, fromText, _FROM_BYTES_CACHE_SIZE, _WIRE_TYPES
+
+
+class TestWireFormat(unittest.TestCase):
+
+    def check(self, content):
+        data = content.toBytes()
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(content, fromBytes(data))
+        self.assertIs(type(content), type(fromBytes(data)))
+
+    def test_all_types(self):
+        contents = [Found('#0008ff', 1, (2, 3)), PickingUp('#ff1500', 0, (0, 0)), Dropped('#0dff00', 2, (65535, 7)),
+                    MovingTo('room_0'), Opening('room_8'), Searching('room_65534'), Distrust('agent_1')]
+        self.assertEqual(set(_WIRE_TYPES), {type(content) for content in contents})
+        for content in contents:
+            self.check(content)
+
+    def test_palette_colours_take_one_byte(self):
+        for colour in COLOUR_PALETTE:
+            self.check(Found(colour, 1, (2, 3)))
+            self.assertEqual(7, len(Found(colour, 1, (2, 3)).toBytes()))
+
+    def test_other_colours(self):
+        for colour in ['#123abc', '#ffffff', '#ABCDEF', 'red', '', 'kleur ë']:
+            self.check(Found(colour, 1, (2, 3)))
+
+    def test_shapes(self):
+        for shape in [0, 2, 254, 255, 256, -1, 2 ** 31 - 1]:
+            self.check(PickingUp('#0008ff', shape, (2, 3)))
+        self.assertEqual(7, len(PickingUp('#0008ff', 254, (2, 3)).toBytes()))
+
+    def test_room_names(self):
+        for name in ['room_1', 'room_01', 'room_65535', 'room_', 'room_-1', 'world_bounds', 'room_١', 'kamer 2']:
+            self.check(Searching(name))
+
+    def test_agent_names(self):
+        for name in ['', 'agent', 'ägent ' * 100]:
+            self.check(Distrust(name))
+
+    def test_message_pack_and_unpack(self):
+        message = BW4TMessage(content=Found('#0008ff', 1, (2, 3)), from_id='agent')
+        message.pack()
+        self.assertIsInstance(message.content, bytes)
+        message.pack()
+        self.assertEqual(Found('#0008ff', 1, (2, 3)), message.unpack())
+        text = BW4TMessage(content='hello', from_id='agent')
+        text.pack()
+        self.assertEqual('hello', text.unpack())
+
+    def test_cache_is_bounded(self):
+        self.assertEqual(_FROM_BYTES_CACHE_SIZE, fromBytes.cache_info().maxsize)
+        for x in range(_FROM_BYTES_CACHE_SIZE + 10):
+            fromBytes(Found('#0008ff', 1, (x, 0)).toBytes())
+        self.assertLessEqual(fromBytes.cache_info().currsize, _FROM_BYTES_CACHE_SIZE)
+
+
+class TestText(unittest.TestCase):
+
+    def test_text_of_all_types(self):
+        for content in [Found('#0008ff', 1, (2, 3)), PickingUp('#123abc', 300, (0, 0)), Dropped('red', 2, (12, 7)),
+                        MovingTo('room_0'), Opening('room_8'), Searching('world_bounds'), Distrust('agent 1')]:
+            self.assertEqual(content, fromText(str(content)))
+
+    def test_texts_sent_before_the_typed_messages(self):
+        self.assertEqual(MovingTo('room_2'), fromText('Moving to door of room_2'))
+        visualization = {'size': 0.5, 'shape': 1, 'colour': '#0008ff', 'depth': 80, 'opacity': 1.0}
+        self.assertEqual(Found('#0008ff', 1, (3, 4)), fromText(f'Found goal block {visualization} at location (3, 4)'))
+        self.assertEqual(Dropped('#0008ff', 1, (3, 4)),
+                         fromText(f'Dropped goal block {visualization} at drop location (3, 4)'))
+
+    def test_other_texts(self):
+        for text in ['', 'hello', 'Moving to', 'Moving to room 2', "I don't trust ", 'Found goal block',
+                     "Found goal block {'colour': '#0008ff'} at location (3, 4)",
+                     "Found goal block {[]: 1} at location (3, 4)", 'Found goal block {(} at location (3, 4)',
+                     "Found goal block {'colour': '#0008ff', 'shape': 1} at location (3, 4) and more"]:
+            self.assertEqual(text, fromText(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from matrx.messages import Message # type: ignore
+from bw4t.BW4TMessages import BW4TMessage, Found, Searching, fromBytes
+from bw4t.BW4TOutbox import BW4TOutbox
+
+
+def message(content, to_id=None):
+    return Message(content=content, from_id='agent', to_id=to_id)
+
+
+class TestDedup(unittest.TestCase):
+
+    def test_same_tick(self):
+        outbox = BW4TOutbox()
+        outbox.add(message('hello'), 0)
+        outbox.add(message('hello'), 0)
+        self.assertEqual(['hello'], [m.content for m in outbox.flush(0)])
+        self.assertEqual(1, outbox.getNrSuppressed())
+
+    def test_other_receivers_are_not_duplicates(self):
+        outbox = BW4TOutbox()
+        outbox.add(message('hello', 'a'), 0)
+        outbox.add(message('hello', 'b'), 0)
+        outbox.add(message('hello', ['a', 'b']), 0)
+        self.assertEqual(3, len(outbox.flush(0)))
+
+    def test_window(self):
+        outbox = BW4TOutbox(dedup_window=3)
+        sent = []
+        for tick in range(7):
+            outbox.add(message('hello'), tick)
+            sent.append(len(outbox.flush(tick)))
+        self.assertEqual([1, 0, 0, 1, 0, 0, 1], sent)
+        self.assertEqual(3, outbox.getNrSent())
+        self.assertEqual(4, outbox.getNrSuppressed())
+
+    def test_no_window(self):
+        outbox = BW4TOutbox(dedup_window=None)
+        for tick in range(3):
+            outbox.add(message('hello'), tick)
+            self.assertEqual(1, len(outbox.flush(tick)))
+
+    def test_unhashable_content_is_sent(self):
+        outbox = BW4TOutbox(dedup_window=10)
+        outbox.add(message(['not', 'hashable']), 0)
+        outbox.add(message(['not', 'hashable']), 0)
+        self.assertEqual(2, len(outbox.flush(0)))
+
+
+class TestRateLimits(unittest.TestCase):
+
+    def test_messages_over_the_limit_are_sent_in_turn(self):
+        outbox = BW4TOutbox(rate_limits={'Searching': 3})
+        sent = []
+        for tick, room in enumerate(['room_1', 'room_2', 'room_3', None, None, None, None, None]):
+            if room is not None:
+                outbox.add(message(Searching(room)), tick)
+            sent.append([m.content for m in outbox.flush(tick)])
+        self.assertEqual([[Searching('room_1')], [], [], [Searching('room_2')], [], [], [Searching('room_3')], []],
+                         sent)
+        self.assertEqual(0, outbox.getNrSuppressed())
+        self.assertEqual(3, outbox.getNrSent())
+
+    def test_same_content_over_the_limit_is_merged(self):
+        outbox = BW4TOutbox(rate_limits={'Searching': 3})
+        sent = []
+        for tick, room in enumerate(['room_1', 'room_2', 'room_2', 'room_1', None, None, None]):
+            if room is not None:
+                outbox.add(message(Searching(room)), tick)
+            sent.append([m.content for m in outbox.flush(tick)])
+        # The second room_2 is merged into the waiting one, room_1 waits behind it
+        self.assertEqual([[Searching('room_1')], [], [], [Searching('room_2')], [], [], [Searching('room_1')]], sent)
+        self.assertEqual(1, outbox.getNrSuppressed())
+
+    def test_limit_per_type_and_receivers(self):
+        outbox = BW4TOutbox(rate_limits={'Searching': 3})
+        outbox.add(message(Searching('room_1'), 'a'), 0)
+        outbox.add(message(Searching('room_1'), 'b'), 0)
+        outbox.add(message(Found('#0008ff', 1, (2, 3)), 'a'), 0)
+        self.assertEqual(3, len(outbox.flush(0)))
+        outbox.add(message(Searching('room_2'), 'a'), 1)
+        outbox.add(message(Found('#0008ff', 1, (4, 5)), 'a'), 1)
+        self.assertEqual([Found('#0008ff', 1, (4, 5))], [m.content for m in outbox.flush(1)])
+
+    def test_limits_are_not_shared(self):
+        limits = {'Searching': 3}
+        outbox = BW4TOutbox(rate_limits=limits)
+        limits['Found'] = 3
+        outbox.add(message(Found('#0008ff', 1, (2, 3))), 0)
+        outbox.add(message(Found('#0008ff', 1, (4, 5))), 0)
+        self.assertEqual(2, len(outbox.flush(0)))
+
+
+class TestCounters(unittest.TestCase):
+
+    def test_bytes_of_text_and_packed_contents(self):
+        outbox = BW4TOutbox()
+        outbox.add(message('héllo'), 0)
+        outbox.add(BW4TMessage(content=Searching('room_12'), from_id='agent'), 0)
+        text, packed = outbox.flush(0)
+        self.assertEqual(Searching('room_12'), fromBytes(packed.content))
+        self.assertEqual(len('héllo'.encode('utf-8')) + len(packed.content), outbox.getNrBytesSent())
+
+    def test_counts_start_at_zero(self):
+        outbox = BW4TOutbox()
+        self.assertEqual((0, 0, 0), (outbox.getNrSent(), outbox.getNrSuppressed(), outbox.getNrBytesSent()))
+
+
+if __name__ == '__main__':
+    unittest.main()
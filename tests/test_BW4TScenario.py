@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+from tests.worlds import run_world
+
+
+class TestScenario(unittest.TestCase):
+    '''
+    A world loaded from the scenario of a generated world runs exactly like the generated world.
+    '''
+    def check_round_trip(self, settings:dict):
+        path = os.path.join(tempfile.mkdtemp(), 'scenario.json')
+        generated = run_world(settings, save_path=path)
+        loaded = run_world(settings, scenario_path=path)
+        self.assertEqual(generated, loaded)
+
+    def test_default(self):
+        self.check_round_trip({})
+
+    def test_large_world(self):
+        self.check_round_trip({'large_world': True})
+
+    def test_bulk_blocks(self):
+        self.check_round_trip({'block_placement': 'bulk'})
+
+    def test_two_drop_zones(self):
+        self.check_round_trip({'nr_drop_zones': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from matrx.grid_world import GridWorld # type: ignore
+from tests.worlds import run_world
+
+
+class TestStateDeltas(unittest.TestCase):
+    '''
+    The agents get the same states with state deltas as without.
+    '''
+    def check_states(self, settings:dict, nr_agents:int=2):
+        nr_checked = 0
+
+        def check_deltas(world):
+            grid_world = world.getGridWorld()
+            get_state_delta = grid_world._GridWorld__get_agent_state
+            perceived = {}
+
+            def get_agent_state(agent_obj):
+                nonlocal nr_checked
+                delta = get_state_delta(agent_obj)
+                expected = GridWorld._GridWorld__get_agent_state(grid_world, agent_obj).as_dict()
+                perceived[agent_obj.obj_id] = delta.apply(perceived.get(agent_obj.obj_id, {}))
+                self.assertEqual(list(expected), list(perceived[agent_obj.obj_id]) + ['World'])
+                self.assertEqual({obj_id: props for obj_id, props in expected.items() if obj_id != 'World'},
+                                 perceived[agent_obj.obj_id])
+                self.assertEqual({**expected['World'], 'curr_tick_timestamp': None},
+                                 {**delta.world_info, 'curr_tick_timestamp': None})
+                nr_checked += 1
+                return delta
+            grid_world._GridWorld__get_agent_state = get_agent_state
+
+        run_world(settings, nr_agents, before_run=check_deltas)
+        # Every agent every tick, and the initial states
+        self.assertGreater(nr_checked, 60 * nr_agents)
+
+    def check_same_run(self, settings:dict, nr_agents:int=2):
+        self.assertEqual(run_world({**settings, 'state_deltas': False}, nr_agents),
+                         run_world({**settings, 'state_deltas': True}, nr_agents))
+
+    def test_states(self):
+        self.check_states({})
+
+    def test_states_of_agents_that_see_each_other(self):
+        self.check_states({'agent_spawn': 'doors', 'agent_sense_range': 10, 'block_sense_range': 3}, nr_agents=4)
+
+    def test_same_run(self):
+        self.check_same_run({})
+
+    def test_same_run_with_two_drop_zones(self):
+        self.check_same_run({'nr_drop_zones': 2}, nr_agents=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
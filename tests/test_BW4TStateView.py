@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from agents1.Group02Agent import CustomBaselineAgent
+from bw4t.BW4TStateView import BW4TStateView
+from bw4t.BW4TWorld import BW4TWorld, DEFAULT_WORLDSETTINGS
+
+
+def world_state(settings:dict):
+    '''
+    @param settings the world settings that differ from DEFAULT_WORLDSETTINGS
+    @return the complete state of a new world, with all its objects and agents
+    '''
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp())
+    try:
+        os.mkdir('agents1')
+        settings = dict(DEFAULT_WORLDSETTINGS, **settings, tick_duration=0)
+        agents = [{'name': f'agent{nr}', 'botclass': CustomBaselineAgent, 'settings': {}} for nr in range(2)]
+        return BW4TWorld(agents, settings).getGridWorld()._GridWorld__get_complete_state()
+    finally:
+        os.chdir(cwd)
+
+
+class TestStateView(unittest.TestCase):
+    '''
+    The view gives the same results as the State it indexes, in the same order.
+    '''
+    @classmethod
+    def setUpClass(cls):
+        # With 12 rooms there are room_1, room_10 and room_11, whose names contain room_1
+        cls.state = world_state({'nr_rooms': 12, 'rooms_per_row': 4})
+        cls.view = BW4TStateView(cls.state)
+
+    def ids(self, objs):
+        return None if objs is None else [obj['obj_id'] for obj in objs]
+
+    def test_objects_in_area(self):
+        for top_left in [(0, 0), (1, 1), (3, 2), (7, 9)]:
+            for width, height in [(1, 1), (5, 6), (10, 3)]:
+                self.assertEqual(self.ids(self.state.get_objects_in_area(top_left, width, height)),
+                                 self.ids(self.view.get_objects_in_area(top_left, width, height)))
+        self.assertEqual(self.ids(self.state.get_objects_in_area((2, 2), bottom_right=(12, 8))),
+                         self.ids(self.view.get_objects_in_area((2, 2), bottom_right=(12, 8))))
+
+    def test_room_objects(self):
+        for room_nr in range(2, 10):
+            room_name = f'room_{room_nr}'
+            self.assertEqual(self.ids(self.state.get_room_objects(room_name)),
+                             self.ids(self.view.get_room_objects(room_name)))
+        self.assertIsNone(self.view.get_room_objects('room_12'))
+
+    def test_room_names_are_exact(self):
+        # State also finds room_10 and room_11 for room_1, the view only room_1
+        state_names = {obj['room_name'] for obj in self.state.get_room('room_1')}
+        self.assertEqual({'room_1', 'room_10', 'room_11'}, state_names)
+        view_names = {obj['room_name'] for obj in self.view.get_room('room_1')}
+        self.assertEqual({'room_1'}, view_names)
+        self.assertEqual(self.ids([obj for obj in self.state.get_room('room_1') if obj['room_name'] == 'room_1']),
+                         self.ids(self.view.get_room('room_1')))
+        # room_10 has no other room names containing it, so both agree
+        self.assertEqual(self.ids(self.state.get_room_objects('room_10')),
+                         self.ids(self.view.get_room_objects('room_10')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+from tests.worlds import run_world
+
+
+class TestParallelWorkers(unittest.TestCase):
+    '''
+    A run in which the agents decide in worker processes is exactly the same as the serial run.
+    '''
+    def check_same_as_serial(self, settings:dict, nr_agents:int, nr_workers:int):
+        serial = run_world(settings, nr_agents)
+        parallel = run_world(dict(settings, parallel_workers=nr_workers), nr_agents)
+        self.assertEqual(serial, parallel)
+
+    def test_default_world(self):
+        self.check_same_as_serial({}, nr_agents=6, nr_workers=3)
+
+    def test_more_workers_than_agents(self):
+        self.check_same_as_serial({}, nr_agents=2, nr_workers=4)
+
+    def test_agents_spread_over_the_doors(self):
+        self.check_same_as_serial({'agent_spawn': 'doors'}, nr_agents=6, nr_workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
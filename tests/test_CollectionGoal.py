@@ -0,0 +1,305 @@
+import random
+import unittest
+import numpy as np # type: ignore
+from types import SimpleNamespace
+from bw4t.BW4TBlocks import CollectableBlock, GhostBlock
+from bw4t.CollectionGoal import CollectionGoal
+
+
+class StubGridWorld:
+    '''
+    The parts of the MATRX GridWorld that CollectionGoal uses. Like MATRX, a grabbed
+    block is taken out of the environment objects until it is dropped again.
+    '''
+    def __init__(self, ghost_blocks):
+        self.environment_objects = {block.obj_id: block for block in ghost_blocks}
+        self.registered_agents = {'agent': SimpleNamespace(is_carrying=[])}
+        self.current_nr_ticks = 0
+
+    def add(self, block):
+        self.environment_objects[block.obj_id] = block
+        return block
+
+    def grab(self, obj_id):
+        self.registered_agents['agent'].is_carrying.append(self.environment_objects.pop(obj_id))
+
+    def drop(self, obj_id, location):
+        carrying = self.registered_agents['agent'].is_carrying
+        block = next(block for block in carrying if block.obj_id == obj_id)
+        carrying.remove(block)
+        block.location = location
+        self.environment_objects[obj_id] = block
+
+    def remove(self, obj_id):
+        del self.environment_objects[obj_id]
+
+
+def ghost(location, zone_nr, colour, shape=0):
+    return GhostBlock(location, zone_nr, f'ghost_{zone_nr}_{location}', colour, shape, 0.5)
+
+
+def block(location, colour, shape=0, name='block'):
+    return CollectableBlock(location, name, colour, shape, 0.5)
+
+
+def zone(x, colours, zone_nr=0, bottom_y=10):
+    '''
+    @return the ghost blocks of a drop zone at column x, rank 0 at the bottom
+    '''
+    return [ghost((x, bottom_y - rank), zone_nr, colour) for rank, colour in enumerate(colours)]
+
+
+class TestProgress(unittest.TestCase):
+
+    def setUp(self):
+        self.world = StubGridWorld(zone(1, ['#f00', '#0f0']))
+        self.goal = CollectionGoal(max_nr_ticks=100)
+
+    def check(self, tick):
+        self.world.current_nr_ticks = tick
+        return self.goal.isBlocksPlaced(self.world)
+
+    def place(self, location, colour, tick):
+        '''
+        Brings a new block to the location: it is grabbed at tick - 1 and dropped at tick
+        '''
+        new = self.world.add(block((0, 0), colour, name=f'block_{tick}'))
+        self.world.grab(new.obj_id)
+        self.check(tick - 1)
+        self.world.drop(new.obj_id, location)
+        return self.check(tick)
+
+    def test_series_per_tick(self):
+        self.check(0)
+        self.assertFalse(self.place((1, 10), '#f00', 3))
+        self.check(4)
+        self.assertTrue(self.place((1, 9), '#0f0', 6))
+        self.assertEqual([0, 0, 0, 0.5, 0.5, 0.5, 1.0], self.goal.getProgressSeries())
+        self.assertEqual(1.0, self.goal.getProgress())
+        self.assertEqual(2, self.goal.getNrBlocksPlaced())
+
+    def test_skipped_ticks_repeat_the_last_progress(self):
+        self.place((1, 10), '#f00', 2)
+        self.check(6)
+        self.assertEqual([0, 0, 0.5, 0.5, 0.5, 0.5, 0.5], self.goal.getProgressSeries())
+
+    def test_repeated_checks_keep_the_latest_value_of_the_tick(self):
+        self.check(0)
+        self.check(0)
+        self.check(1)
+        self.assertEqual([0, 0], self.goal.getProgressSeries())
+
+    def test_rank_ticks_and_ticks_to_blocks(self):
+        self.place((1, 10), '#f00', 3)
+        self.place((1, 9), '#0f0', 7)
+        self.assertEqual({0: {0: 3, 1: 7}}, self.goal.getRankTicks())
+        self.assertEqual([3, 7], self.goal.getTicksToBlocks())
+
+    def test_first_ticks_are_kept_when_a_block_is_taken_away(self):
+        first = self.world.add(block((0, 0), '#f00', name='first'))
+        self.world.grab(first.obj_id)
+        self.check(1)
+        self.world.drop(first.obj_id, (1, 10))
+        self.check(2)
+        self.world.grab(first.obj_id)
+        self.check(3)
+        self.assertEqual(0, self.goal.getProgress())
+        self.assertEqual({0: {0: 2}}, self.goal.getRankTicks())
+        self.assertEqual([2], self.goal.getTicksToBlocks())
+
+    def test_out_of_order_block_is_not_counted(self):
+        self.place((1, 9), '#0f0', 2)
+        self.place((1, 10), '#f00', 4)
+        self.assertEqual(0.5, self.goal.getProgress())
+        self.assertEqual({0: {0: 4}}, self.goal.getRankTicks())
+        self.assertEqual([4], self.goal.getTicksToBlocks())
+
+
+
+class TestEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.world = StubGridWorld(zone(1, ['#f00']))
+        self.goal = CollectionGoal(max_nr_ticks=100)
+        self.goal.isBlocksPlaced(self.world)
+
+    def check(self):
+        self.world.current_nr_ticks += 1
+        return self.goal.isBlocksPlaced(self.world)
+
+    def test_removed_block_is_no_longer_placed(self):
+        first = self.world.add(block((0, 0), '#f00', name='first'))
+        self.world.grab(first.obj_id)
+        self.check()
+        self.world.drop(first.obj_id, (1, 10))
+        self.assertTrue(self.check())
+
+        self.world.remove(first.obj_id)
+        self.assertFalse(self.check())
+
+        # Dropping another block on the tile of the removed one
+        second = self.world.add(block((0, 0), '#f00', name='second'))
+        self.world.grab(second.obj_id)
+        self.check()
+        self.world.drop(second.obj_id, (1, 10))
+        self.assertTrue(self.check())
+
+    def test_removal_with_an_addition_in_the_same_tick(self):
+        first = self.world.add(block((0, 0), '#f00', name='first'))
+        self.world.grab(first.obj_id)
+        self.check()
+        self.world.drop(first.obj_id, (1, 10))
+        self.assertTrue(self.check())
+
+        # The number of objects stays the same
+        self.world.remove(first.obj_id)
+        self.world.add(block((5, 5), '#f00', name='elsewhere'))
+        self.assertFalse(self.check())
+        self.assertEqual(0, self.goal.getProgress())
+
+    def test_block_added_on_a_drop_tile_is_found(self):
+        self.world.add(block((1, 10), '#f00'))
+        self.assertTrue(self.check())
+
+    def test_addition_with_a_removal_in_the_same_tick(self):
+        other = self.world.add(block((5, 5), '#f00', name='other'))
+        self.assertFalse(self.check())
+
+        # The number of objects stays the same
+        self.world.remove(other.obj_id)
+        self.world.add(block((1, 10), '#f00', name='placed'))
+        self.assertTrue(self.check())
+
+
+
+class TestDropTileIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.world = StubGridWorld(zone(1, ['#f00', '#0f0']) + zone(3, ['#00f', '#f00'], zone_nr=1))
+        self.goal = CollectionGoal(max_nr_ticks=100)
+        self.goal.isBlocksPlaced(self.world)
+
+    def check(self):
+        self.world.current_nr_ticks += 1
+        return self.goal.isBlocksPlaced(self.world)
+
+    def bring(self, name, colour, location):
+        new = self.world.add(block((0, 0), colour, name=name))
+        self.world.grab(new.obj_id)
+        self.check()
+        self.world.drop(new.obj_id, location)
+        return self.check()
+
+    def test_drop_on_a_tile(self):
+        self.bring('red', '#f00', (1, 10))
+        self.assertEqual(1, self.goal.getNrBlocksPlaced())
+
+    def test_grab_from_a_tile(self):
+        self.bring('red', '#f00', (1, 10))
+        self.world.grab('red')
+        self.check()
+        self.assertEqual(0, self.goal.getNrBlocksPlaced())
+
+    def test_wrong_block_on_a_tile(self):
+        self.bring('green', '#0f0', (1, 10))
+        self.assertEqual(0, self.goal.getNrBlocksPlaced())
+
+    def test_multiple_zones(self):
+        self.bring('red', '#f00', (1, 10))
+        self.bring('green', '#0f0', (1, 9))
+        self.assertFalse(self.goal.isBlocksPlaced(self.world))
+        self.bring('blue', '#00f', (3, 10))
+        self.assertTrue(self.bring('red2', '#f00', (3, 9)))
+        self.assertEqual({0: {0: 2, 1: 4}, 1: {0: 6, 1: 8}}, self.goal.getRankTicks())
+
+    def test_out_of_order_placement(self):
+        self.bring('green', '#0f0', (1, 9))
+        self.bring('red', '#f00', (1, 10))
+        self.assertEqual(1, self.goal.getNrBlocksPlaced())
+        # Putting the top block back after the bottom one puts the zone in order
+        self.world.grab('green')
+        self.check()
+        self.world.drop('green', (1, 9))
+        self.check()
+        self.assertEqual(2, self.goal.getNrBlocksPlaced())
+
+    def test_invalidate(self):
+        self.bring('red', '#f00', (1, 10))
+        # Moved off the drop tile without a Grab/Drop event, which the goal can not notice by itself
+        self.world.environment_objects['red'].location = (5, 5)
+        self.check()
+        self.assertEqual(1, self.goal.getNrBlocksPlaced())
+        self.goal.invalidate()
+        self.check()
+        self.assertEqual(0, self.goal.getNrBlocksPlaced())
+
+    def test_invalidate_after_a_drop(self):
+        self.bring('red', '#f00', (1, 10))
+        self.goal.invalidate()
+        self.world.grab('red')
+        self.check()
+        self.assertEqual(0, self.goal.getNrBlocksPlaced())
+
+    def test_missed_removal(self):
+        self.bring('red', '#f00', (1, 10))
+        carried = self.world.add(block((0, 0), '#f00', name='red2'))
+        self.world.grab(carried.obj_id)
+        self.check()
+        # Within one tick a removal and an addition leave the number of objects the same, and a drop on the tile
+        # of the removed block looks like the only change
+        self.world.remove('red')
+        self.world.add(block((5, 5), '#f00', name='elsewhere'))
+        self.world.drop('red2', (1, 10))
+        self.check()
+        self.assertEqual(1, self.goal.getNrBlocksPlaced())
+
+def baseline_order_check(zone_ticks):
+    '''
+    The order check of CollectionGoal before it was vectorised.
+    @param zone_ticks per zone the ticks per rank, None if the rank has no right block
+    @return is_satisfied, progress
+    '''
+    is_satisfied = True
+    progress = 0
+    for ticks in zone_ticks:
+        zone_satisfied = True
+        for idx, tick in enumerate(ticks[:-1]):
+            if tick is None or ticks[idx+1] is None or not tick < ticks[idx+1]:
+                progress += (idx+1) if tick is not None else idx
+                zone_satisfied = False
+                break
+        if zone_satisfied and ticks[-1] is not None:
+            progress += len(ticks)
+        is_satisfied = is_satisfied and zone_satisfied
+    return is_satisfied, progress
+
+
+class TestOrderCheck(unittest.TestCase):
+    '''
+    Compares the order check over all zones at once with the baseline loop over the zones,
+    for random ticks of zones of different lengths.
+    '''
+    def check(self, zone_ticks):
+        goal = CollectionGoal(max_nr_ticks=100)
+        max_rank = max(len(ticks) for ticks in zone_ticks)
+        goal._CollectionGoal__ticks = np.array([[np.nan if tick is None else tick for tick in ticks] +
+                                                [np.nan] * (max_rank - len(ticks)) for ticks in zone_ticks])
+        goal._CollectionGoal__nr_ranks = np.array([len(ticks) for ticks in zone_ticks])
+        is_satisfied, zone_progress = goal._CollectionGoal__check_completion(StubGridWorld([]), [])
+        return is_satisfied, int(zone_progress.sum())
+
+    def test_same_as_baseline(self):
+        rng = random.Random(1)
+        for _ in range(2000):
+            zone_ticks = [[rng.choice([None, rng.randint(0, 5)]) for _ in range(rng.randint(2, 4))]
+                          for _ in range(rng.randint(1, 3))]
+            self.assertEqual(baseline_order_check(zone_ticks), self.check(zone_ticks), zone_ticks)
+
+    def test_empty_single_rank_zone(self):
+        # The baseline loop counted a zone with one rank as satisfied while that rank was empty
+        self.assertEqual((False, 0), self.check([[None]]))
+        self.assertEqual((True, 1), self.check([[3]]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import unittest
+from matrx.agents.agent_utils.state import State # type: ignore
+from agents1.Group02Agent import CustomBaselineAgent, Phase
+from bw4t.BW4TMessages import Dropped, PickingUp
+
+
+def block(colour:str, shape:int, location:tuple) -> dict:
+    return {'location': location, 'visualization': {'colour': colour, 'shape': shape}}
+
+
+class TestHints(unittest.TestCase):
+
+    def setUp(self):
+        self.agent = CustomBaselineAgent({})
+        self.agent.agent_id = 'me'
+        self.agent._current_state = State(own_id='me')
+        self.agent._current_state.state_update(
+            {'World': {'nr_ticks': 1}, 'me': {'obj_id': 'me', 'location': (4, 4), 'class_inheritance': ['AgentBody']}})
+
+    def test_wrong_hint_is_removed_from_every_goal(self):
+        # The hint matches both goals with its colour and shape, its goal_index is the last of them
+        hint = dict(block('#0008ff', 1, (4, 4)), goal_index=2)
+        goals = [block('#0008ff', 1, (1, 1)), block('#ff0000', 0, (1, 2)), block('#0008ff', 1, (1, 3))]
+        other = block('#ff0000', 0, (5, 5))
+        goals[0]['collectable_match'] = goals[2]['collectable_match'] = hint
+        goals[1]['collectable_match'] = other
+        self.agent._goal_blocks = goals
+        self.agent._target_items = [hint]
+        # There is no block under the agent, so the hint was wrong
+        self.assertFalse(self.agent._checkTargetItemsIfHint())
+        self.assertEqual([], self.agent._target_items)
+        self.assertNotIn('collectable_match', goals[0])
+        self.assertNotIn('collectable_match', goals[2])
+        self.assertIs(other, goals[1]['collectable_match'])
+        self.assertIsNone(self.agent._check_for_current_target_goal())
+
+    def test_hint_is_not_a_block_next_to_it(self):
+        hint = dict(block('#0008ff', 1, (4, 4)), goal_index=0)
+        self.agent._goal_blocks = [dict(block('#0008ff', 1, (1, 1)), collectable_match=hint)]
+        self.agent._target_items = [hint]
+        # A block of the hint south of the agent, for instance placed on a goal
+        self.agent._current_state.state_update({**self.agent._current_state.as_dict(), 'placed': dict(
+            block('#0008ff', 1, (4, 5)), obj_id='placed', class_inheritance=['CollectableBlock'], carried_by=[])})
+        self.assertFalse(self.agent._checkTargetItemsIfHint())
+        self.assertNotIn('obj_id', hint)
+
+    def test_picked_up_item_is_forgotten_by_every_goal(self):
+        item = dict(block('#0008ff', 1, (4, 4)), obj_id='block_1')
+        goals = [block('#0008ff', 1, (1, 1)), block('#0008ff', 1, (1, 2))]
+        goals[0]['collectable_match'] = item
+        # The same block, as perceived in an earlier state
+        goals[1]['collectable_match'] = dict(item)
+        self.agent._goal_blocks = goals
+        self.agent._forget_collectable_match(item)
+        self.assertNotIn('collectable_match', goals[0])
+        self.assertNotIn('collectable_match', goals[1])
+
+
+class TestGoals(unittest.TestCase):
+
+    def setUp(self):
+        self.agent = CustomBaselineAgent({})
+        self.agent.agent_id = 'me'
+        # The first and last goal have the same colour and shape
+        self.agent._goal_blocks = [block('#0008ff', 1, (1, 3)), block('#ff0000', 0, (1, 2)), block('#0008ff', 1, (1, 1))]
+
+    def test_item_is_for_the_target_goal(self):
+        item = block('#0008ff', 1, (4, 4))
+        self.agent._collectables = [item]
+        target_blocks, _ = self.agent._check_collectables()
+        self.assertEqual([item], target_blocks)
+        self.assertEqual(0, item['goal_index'])
+
+    def test_item_is_for_the_first_goal_after_the_target(self):
+        item = block('#0008ff', 1, (4, 4))
+        self.agent._target_goal_index = 1
+        self.agent._collectables = [item]
+        self.agent._check_collectables()
+        self.assertEqual(2, item['goal_index'])
+        self.assertIs(item, self.agent._goal_blocks[2]['collectable_match'])
+
+    def set_state(self, location:tuple, *blocks:dict):
+        self.agent._current_state = State(own_id='me')
+        self.agent._current_state.state_update({'World': {'nr_ticks': 1},
+            'me': {'obj_id': 'me', 'location': location, 'class_inheritance': ['AgentBody']},
+            **{f'block_{nr}': dict(block, obj_id=f'block_{nr}', class_inheritance=['CollectableBlock'], carried_by=[])
+               for nr, block in enumerate(blocks)}})
+        self.agent._state_view = None
+
+    def test_block_is_dropped_on_its_own_free_goal(self):
+        self.agent._is_carrying = [dict(block('#0008ff', 1, (1, 3)), goal_index=0)]
+        self.set_state((1, 3))
+        self.assertTrue(self.agent._verify_goal_location())
+        # A block below the goal is no reason to keep it
+        self.set_state((1, 3), block('#0008ff', 1, (1, 4)))
+        self.assertTrue(self.agent._verify_goal_location())
+        # Not on the goal of the block, for instance when a team member stands on it
+        self.set_state((1, 2))
+        self.assertFalse(self.agent._verify_goal_location())
+        # A team member placed a block on the goal first
+        self.set_state((1, 3), block('#0008ff', 1, (1, 3)))
+        self.assertFalse(self.agent._verify_goal_location())
+
+    def test_cancelled_block_is_dropped_next_to_the_goals(self):
+        self.agent._is_carrying = [dict(block('#0008ff', 1, (1, 2)), goal_index=0, obj_id='block')]
+        self.agent._sendMessage = lambda mssg: None
+        self.set_state((1, 2))
+        self.assertEqual(('MoveWest', {}), self.agent._cancelGoalPhase())
+        self.set_state((0, 2))
+        self.assertEqual(('DropObject', {'object_id': 'block'}), self.agent._cancelGoalPhase())
+
+    def test_item_placed_on_a_goal_is_not_collected_again(self):
+        self.agent._trustBeliefs = {'a': 0.5}
+        self.agent._trusting_agent = {'a': True}
+        self.agent._act_on_trust('a', {'a': [Dropped('#0008ff', 1, (1, 3))]})
+        self.assertEqual(1, self.agent._target_goal_index)
+        self.assertNotIn('collectable_match', self.agent._goal_blocks[2])
+        # Dropped elsewhere it can be collected for the last goal
+        self.agent._act_on_trust('a', {'a': [Dropped('#0008ff', 1, (5, 5))]})
+        self.assertEqual(1, self.agent._target_goal_index)
+        self.assertEqual((5, 5), self.agent._goal_blocks[2]['collectable_match']['location'])
+
+    def test_item_picked_up_by_a_team_member_is_not_collected(self):
+        self.agent._trustBeliefs = {'a': 0.5}
+        self.agent._trusting_agent = {'a': True}
+        item = dict(block('#0008ff', 1, (4, 4)), obj_id='block_1', goal_index=0)
+        self.agent._goal_blocks[0]['collectable_match'] = item
+        self.agent._goal_blocks[2]['collectable_match'] = item
+        self.agent._target_items = [item]
+        self.agent._phase = Phase.FOLLOW_PATH_TO_TARGET_ITEMS
+        # Another block of the same colour and shape is not the item
+        self.agent._act_on_trust('a', {'a': [PickingUp('#0008ff', 1, (6, 6))]})
+        self.assertEqual([item], self.agent._target_items)
+        self.assertEqual(Phase.FOLLOW_PATH_TO_TARGET_ITEMS, self.agent._phase)
+
+        self.agent._act_on_trust('a', {'a': [PickingUp('#0008ff', 1, (4, 4))]})
+        self.assertNotIn('collectable_match', self.agent._goal_blocks[0])
+        self.assertNotIn('collectable_match', self.agent._goal_blocks[2])
+        self.assertEqual([], self.agent._target_items)
+        self.assertEqual(Phase.PLAN_PATH_TO_CLOSED_DOOR, self.agent._phase)
+
+    def test_agent_goes_for_another_match_of_an_item_picked_up_by_a_team_member(self):
+        self.agent._trustBeliefs = {'a': 0.5}
+        self.agent._trusting_agent = {'a': True}
+        item = dict(block('#0008ff', 1, (4, 4)), obj_id='block_1', goal_index=0)
+        other = dict(block('#0008ff', 1, (6, 6)), obj_id='block_2', goal_index=0)
+        self.agent._goal_blocks[0]['collectable_match'] = other
+        self.agent._target_items = [item]
+        self.agent._phase = Phase.FOLLOW_PATH_TO_TARGET_ITEMS
+        self.agent._act_on_trust('a', {'a': [PickingUp('#0008ff', 1, (4, 4))]})
+        self.assertEqual([other], self.agent._target_items)
+        self.assertEqual(Phase.PLAN_PATH_TO_TARGET_ITEMS, self.agent._phase)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import contextlib
+import io
+import os
+import tempfile
+from typing import Callable
+from agents1.Group02Agent import CustomBaselineAgent
+from bw4t.BW4TWorld import BW4TWorld, DEFAULT_WORLDSETTINGS
+
+
+def run_world(settings:dict, nr_agents:int=2, scenario_path:str|None=None, save_path:str|None=None,
+              before_run:Callable[[BW4TWorld], None]|None=None) -> str:
+    '''
+    Runs a world with CustomBaselineAgents for 60 ticks in a new working directory, as the world
+    writes its log and the agents their trust files in the working directory.
+    @param settings the world settings that differ from DEFAULT_WORLDSETTINGS
+    @param nr_agents the number of agents
+    @param scenario_path the scenario file to load the world from, None to generate it
+    @param save_path the file to save the scenario of the world to before running it, or None
+    @param before_run called with the world before it runs, or None
+    @return the contents of the log of the run
+    '''
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp())
+    try:
+        os.mkdir('agents1')
+        settings = dict(DEFAULT_WORLDSETTINGS, **settings, scenario=scenario_path, deadline=60, tick_duration=0)
+        agents = [{'name': f'agent{nr}', 'botclass': CustomBaselineAgent, 'settings': {}} for nr in range(nr_agents)]
+        world = BW4TWorld(agents, settings)
+        if save_path is not None:
+            world.saveScenario(save_path)
+        if before_run is not None:
+            before_run(world)
+        with contextlib.redirect_stdout(io.StringIO()):  # the agents print their trust values at the end
+            world.run()
+        with open(world.getLogger().getFileName()) as file:
+            return file.read()
+    finally:
+        os.chdir(cwd)